@@ -1,35 +1,89 @@
-from fastapi import Depends, HTTPException, status
+import asyncio
+from functools import partial
+from typing import Optional
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from supabase import Client
-from app.database import get_supabase_client
+from jose import jwt, JWTError, ExpiredSignatureError
+from jose.exceptions import JWTClaimsError
+from app.cache import TTLCache
+from app.config import get_settings
+from app.repositories import UserRepository, get_user_repository
+from app.single_flight import profile_reads
 
-security = HTTPBearer()
+security = HTTPBearer(auto_error=False)
+settings = get_settings()
 
+profile_cache = TTLCache(
+    maxsize=settings.profile_cache_size,
+    ttl=settings.profile_cache_ttl,
+    negative_ttl=settings.profile_cache_negative_ttl,
+)
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    supabase: Client = Depends(get_supabase_client)
-):
-    token = credentials.credentials
 
-    try:
-        user_response = supabase.auth.get_user(token)
-        if not user_response or not user_response.user:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid authentication credentials"
+class InvalidTokenError(Exception):
+    pass
+
+
+def verify_token_locally(token: str) -> Optional[dict]:
+    keys = [settings.jwt_secret_key, *settings.jwt_previous_secret_keys]
+
+    for key in keys:
+        try:
+            claims = jwt.decode(
+                token,
+                key,
+                algorithms=settings.jwt_algorithms,
+                audience=settings.jwt_audience,
             )
+        except (ExpiredSignatureError, JWTClaimsError) as e:
+            raise InvalidTokenError(str(e))
+        except JWTError:
+            continue
+
+        if not claims.get("sub"):
+            raise InvalidTokenError("Token has no subject")
+        return claims
+
+    return None
 
-        profile_response = supabase.table("profiles").select("*").eq("id", user_response.user.id).maybeSingle().execute()
 
-        if not profile_response.data:
+async def _load_profile(user_id: str, users: UserRepository) -> Optional[dict]:
+    profile = await users.get_profile(user_id)
+    profile_cache.set(user_id, profile)
+    return profile
+
+
+async def authenticate(token: str, users: UserRepository) -> dict:
+    try:
+        user_id = None
+
+        if settings.jwt_local_verification:
+            claims = verify_token_locally(token)
+            if claims:
+                user_id = claims["sub"]
+
+        if user_id is None:
+            user_id = await users.get_user_id(token)
+            if not user_id:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Invalid authentication credentials"
+                )
+
+        found, profile = profile_cache.get(user_id)
+        if not found:
+            profile = await profile_reads.do(user_id, partial(_load_profile, user_id, users))
+
+        if not profile:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User profile not found"
             )
 
-        return profile_response.data
+        return dict(profile)
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -37,6 +91,55 @@ async def get_current_user(
         )
 
 
+def _bearer_token(credentials: Optional[HTTPAuthorizationCredentials]) -> str:
+    if credentials is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    return credentials.credentials
+
+
+async def get_current_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
+    users: UserRepository = Depends(get_user_repository)
+):
+    return await authenticate(_bearer_token(credentials), users)
+
+
+def _locally_verified(token: str) -> bool:
+    if not settings.jwt_local_verification:
+        return False
+    try:
+        return verify_token_locally(token) is not None
+    except InvalidTokenError:
+        return False
+
+
+async def get_pending_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
+    users: UserRepository = Depends(get_user_repository)
+) -> "asyncio.Future[dict]":
+    token = _bearer_token(credentials)
+    if _locally_verified(token):
+        return asyncio.ensure_future(authenticate(token, users))
+
+    user = asyncio.get_running_loop().create_future()
+    user.set_result(await authenticate(token, users))
+    return user
+
+
+async def get_stream_user(
+    access_token: Optional[str] = Query(None),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
+    users: UserRepository = Depends(get_user_repository)
+):
+    if credentials is None and access_token:
+        return await authenticate(access_token, users)
+    return await authenticate(_bearer_token(credentials), users)
+
+
 async def get_current_admin_user(current_user: dict = Depends(get_current_user)):
     if current_user.get("role") != "admin":
         raise HTTPException(
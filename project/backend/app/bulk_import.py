@@ -0,0 +1,151 @@
+import codecs
+import csv
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from pydantic import ValidationError
+from app.models import SweetCreate
+
+CSV_TYPES = {"text/csv", "application/csv"}
+NDJSON_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl", "application/x-jsonlines"}
+NATURAL_KEY = ("name", "category")
+MAX_LINE_LENGTH = 64 * 1024
+
+
+class BulkImportError(Exception):
+    pass
+
+
+def import_format(content_type: Optional[str]) -> Optional[str]:
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type in CSV_TYPES:
+        return "csv"
+    if media_type in NDJSON_TYPES:
+        return "ndjson"
+    return None
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, str]]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    line_number = 0
+
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            line_number += 1
+            yield line_number, line.rstrip("\r")
+
+        if len(buffer) > MAX_LINE_LENGTH:
+            raise BulkImportError(f"Line {line_number + 1} exceeds {MAX_LINE_LENGTH} characters")
+
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield line_number + 1, buffer.rstrip("\r")
+
+
+async def iter_csv_records(lines: AsyncIterator[Tuple[int, str]]) -> AsyncIterator[Tuple[int, Any]]:
+    header: Optional[List[str]] = None
+    pending: List[str] = []
+    start = 0
+
+    async for line_number, line in lines:
+        if not pending:
+            start = line_number
+        pending.append(line)
+
+        text = "\n".join(pending)
+        if text.count('"') % 2:
+            if len(text) > MAX_LINE_LENGTH:
+                raise BulkImportError(f"Line {start} has an unterminated quoted field")
+            continue
+        pending = []
+
+        if not text.strip():
+            continue
+
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [column.strip() for column in values]
+            continue
+
+        if len(values) != len(header):
+            yield start, BulkImportError(f"Expected {len(header)} columns, got {len(values)}")
+            continue
+        yield start, dict(zip(header, values))
+
+    if pending:
+        yield start, BulkImportError("Unterminated quoted field")
+
+
+async def iter_ndjson_records(lines: AsyncIterator[Tuple[int, str]]) -> AsyncIterator[Tuple[int, Any]]:
+    async for line_number, line in lines:
+        if not line.strip():
+            continue
+
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, BulkImportError(f"Invalid JSON: {e}")
+            continue
+
+        if not isinstance(record, dict):
+            yield line_number, BulkImportError("Expected a JSON object")
+            continue
+        yield line_number, record
+
+
+def validate_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        sweet = SweetCreate.model_validate(record)
+    except ValidationError as e:
+        raise BulkImportError("; ".join(
+            f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+            for error in e.errors()
+        ))
+
+    sweet_dict = sweet.model_dump()
+    sweet_dict["price"] = float(sweet_dict["price"])
+    return sweet_dict
+
+
+async def iter_sweets(chunks: AsyncIterator[bytes], fmt: str) -> AsyncIterator[Tuple[int, Any]]:
+    parse = iter_csv_records if fmt == "csv" else iter_ndjson_records
+
+    async for line_number, record in parse(iter_lines(chunks)):
+        if isinstance(record, BulkImportError):
+            yield line_number, record
+            continue
+
+        try:
+            record = validate_record(record)
+        except BulkImportError as e:
+            record = e
+        yield line_number, record
+
+
+async def iter_batches(
+    records: AsyncIterator[Tuple[int, Any]],
+    batch_size: int,
+) -> AsyncIterator[Tuple[Dict[Tuple[str, str], Tuple[int, dict]], List[Tuple[int, str]], int]]:
+    batch: Dict[Tuple[str, str], Tuple[int, dict]] = {}
+    errors: List[Tuple[int, str]] = []
+    rows = 0
+
+    async for line_number, record in records:
+        if isinstance(record, BulkImportError):
+            errors.append((line_number, str(record)))
+        else:
+            key = tuple(record[column] for column in NATURAL_KEY)
+            if key in batch:
+                errors.append((batch[key][0], f"Superseded by line {line_number} with the same name and category"))
+            else:
+                rows += 1
+            batch[key] = (line_number, record)
+
+        if rows >= batch_size or len(errors) >= batch_size:
+            yield batch, errors, rows + len(errors)
+            batch, errors, rows = {}, [], 0
+
+    if batch or errors:
+        yield batch, errors, rows + len(errors)
@@ -0,0 +1,107 @@
+import gzip
+import hashlib
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Hashable, Optional
+from fastapi import Request, Response, status
+from app.cache import TTLCache
+from app.config import get_settings
+
+settings = get_settings()
+
+
+@dataclass
+class CatalogEntry:
+    version: int
+    body: bytes
+    etag: str
+    gzip_body: Optional[bytes] = None
+    headers: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def gzip_etag(self) -> str:
+        return f'{self.etag[:-1]}-gz"'
+
+
+def _etag_matches(if_none_match: Optional[str], *etags: str) -> bool:
+    if not if_none_match:
+        return False
+
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") in etags:
+            return True
+    return False
+
+
+def _accepts_gzip(request: Request) -> bool:
+    return "gzip" in request.headers.get("accept-encoding", "").lower()
+
+
+class CatalogCache:
+    def __init__(self, maxsize: int, ttl: float, gzip_min_size: int = 1024):
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.gzip_min_size = gzip_min_size
+        self._version = 0
+        self._lock = threading.Lock()
+        self.not_modified = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def bump(self):
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+
+    def get(self, key: Hashable) -> Optional[CatalogEntry]:
+        found, entry = self._entries.get(key)
+        if found and entry.version == self._version:
+            return entry
+        return None
+
+    def put(self, key: Hashable, version: int, body: bytes, headers: Dict[str, str]) -> CatalogEntry:
+        entry = CatalogEntry(
+            version=version,
+            body=body,
+            etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+            gzip_body=gzip.compress(body, compresslevel=6) if len(body) >= self.gzip_min_size else None,
+            headers=headers,
+        )
+
+        with self._lock:
+            if version == self._version:
+                self._entries.set(key, entry)
+        return entry
+
+    def respond(self, request: Request, entry: CatalogEntry) -> Response:
+        gzipped = entry.gzip_body is not None and _accepts_gzip(request)
+        headers = {
+            **entry.headers,
+            "ETag": entry.gzip_etag if gzipped else entry.etag,
+            "Vary": "Accept-Encoding",
+        }
+
+        if _etag_matches(request.headers.get("if-none-match"), entry.etag, entry.gzip_etag):
+            with self._lock:
+                self.not_modified += 1
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        if gzipped:
+            headers["Content-Encoding"] = "gzip"
+            return Response(content=entry.gzip_body, media_type="application/json", headers=headers)
+
+        return Response(content=entry.body, media_type="application/json", headers=headers)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self._entries.stats()
+        stats["version"] = self._version
+        stats["not_modified"] = self.not_modified
+        return stats
+
+
+catalog_cache = CatalogCache(
+    maxsize=settings.catalog_cache_size,
+    ttl=settings.catalog_cache_ttl,
+)
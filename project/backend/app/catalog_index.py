@@ -0,0 +1,306 @@
+import asyncio
+import bisect
+import logging
+import threading
+import time
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+import anyio
+from app.config import get_settings
+from app.pagination import split_page
+from app.repositories import open_catalog_repository
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+CANDIDATE_SORT_RATIO = 16
+
+
+def _trigrams(text: str) -> Set[str]:
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _price(row: dict) -> Decimal:
+    return Decimal(str(row["price"]))
+
+
+def _created_at(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+def _order_key(created_at: str, sweet_id: str) -> Tuple[float, str]:
+    return -_created_at(created_at).timestamp(), sweet_id
+
+
+def _normalize(row: dict) -> dict:
+    return {**row, "price": str(_price(row))}
+
+
+class CatalogIndex:
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self.loaded_at: Optional[float] = None
+        self.reconciled_at: Optional[float] = None
+        self.last_drift = 0
+        self._rows: Dict[str, dict] = {}
+        self._sort_keys: Dict[str, Tuple[float, str]] = {}
+        self._order: List[Tuple[float, str]] = []
+        self._by_category: Dict[str, Set[str]] = {}
+        self._prices: List[Tuple[Decimal, str]] = []
+        self._grams: Dict[str, Set[str]] = {}
+        self._generation = 0
+        self._touched: Dict[str, int] = {}
+        self._lock = threading.RLock()
+
+    @property
+    def ready(self) -> bool:
+        return self.enabled and self.loaded_at is not None
+
+    @property
+    def generation(self) -> int:
+        with self._lock:
+            return self._generation
+
+    def _touch(self, sweet_id: str):
+        self._generation += 1
+        self._touched[sweet_id] = self._generation
+
+    def _touched_since(self, generation: Optional[int]) -> Set[str]:
+        if generation is None:
+            return set()
+        return {sweet_id for sweet_id, touched in self._touched.items() if touched > generation}
+
+    def load(self, rows: Iterable[dict], since: Optional[int] = None):
+        fresh = CatalogIndex(enabled=self.enabled)
+        for row in rows:
+            fresh._add(row)
+        fresh._order.sort()
+        fresh._prices.sort()
+
+        with self._lock:
+            for sweet_id in self._touched_since(since):
+                fresh._discard(sweet_id)
+                row = self._rows.get(sweet_id)
+                if row is not None:
+                    fresh._add(row, keep_sorted=True)
+
+            self._rows = fresh._rows
+            self._sort_keys = fresh._sort_keys
+            self._order = fresh._order
+            self._by_category = fresh._by_category
+            self._prices = fresh._prices
+            self._grams = fresh._grams
+            self.loaded_at = time.time()
+
+    def _add(self, row: dict, keep_sorted: bool = False):
+        sweet_id = row["id"]
+        self._rows[sweet_id] = row
+        sort_key = _order_key(row["created_at"], sweet_id)
+        self._sort_keys[sweet_id] = sort_key
+        self._by_category.setdefault(row["category"], set()).add(sweet_id)
+
+        if keep_sorted:
+            bisect.insort(self._order, sort_key)
+            bisect.insort(self._prices, (_price(row), sweet_id))
+        else:
+            self._order.append(sort_key)
+            self._prices.append((_price(row), sweet_id))
+
+        for gram in _trigrams(row["name"]):
+            self._grams.setdefault(gram, set()).add(sweet_id)
+
+    def _discard(self, sweet_id: str) -> Optional[dict]:
+        row = self._rows.pop(sweet_id, None)
+        if row is None:
+            return None
+
+        sort_key = self._sort_keys.pop(sweet_id)
+        position = bisect.bisect_left(self._order, sort_key)
+        if position < len(self._order) and self._order[position] == sort_key:
+            del self._order[position]
+
+        category_ids = self._by_category.get(row["category"])
+        if category_ids is not None:
+            category_ids.discard(sweet_id)
+            if not category_ids:
+                del self._by_category[row["category"]]
+
+        position = bisect.bisect_left(self._prices, (_price(row), sweet_id))
+        if position < len(self._prices) and self._prices[position] == (_price(row), sweet_id):
+            del self._prices[position]
+
+        for gram in _trigrams(row["name"]):
+            gram_ids = self._grams.get(gram)
+            if gram_ids is not None:
+                gram_ids.discard(sweet_id)
+                if not gram_ids:
+                    del self._grams[gram]
+        return row
+
+    def upsert(self, row: dict):
+        if not self.ready:
+            return
+
+        with self._lock:
+            self._discard(row["id"])
+            self._add(row, keep_sorted=True)
+            self._touch(row["id"])
+
+    def remove(self, sweet_id: str):
+        if not self.ready:
+            return
+
+        with self._lock:
+            self._discard(sweet_id)
+            self._touch(sweet_id)
+
+    def adjust_quantity(self, sweet_id: str, delta: int):
+        if not self.ready:
+            return
+
+        with self._lock:
+            row = self._rows.get(sweet_id)
+            if row is not None:
+                self._rows[sweet_id] = {**row, "quantity": row["quantity"] + delta}
+                self._touch(sweet_id)
+
+    def _name_candidates(self, name: str) -> Optional[Set[str]]:
+        grams = _trigrams(name)
+        if not grams:
+            return None
+
+        candidates: Optional[Set[str]] = None
+        for gram in sorted(grams, key=lambda g: len(self._grams.get(g, ()))):
+            gram_ids = self._grams.get(gram, set())
+            candidates = set(gram_ids) if candidates is None else candidates & gram_ids
+            if not candidates:
+                break
+        return candidates
+
+    def _price_candidates(self, min_price: Optional[Decimal], max_price: Optional[Decimal]) -> Set[str]:
+        lo = 0 if min_price is None else bisect.bisect_left(self._prices, (min_price,))
+        hi = len(self._prices) if max_price is None else bisect.bisect_right(self._prices, (max_price, "\U0010ffff"))
+        return {sweet_id for _, sweet_id in self._prices[lo:hi]}
+
+    def search(
+        self,
+        name: Optional[str] = None,
+        category: Optional[str] = None,
+        min_price: Optional[Decimal] = None,
+        max_price: Optional[Decimal] = None,
+        cursor: Optional[Tuple[str, str]] = None,
+        limit: int = 100,
+    ) -> Tuple[List[dict], Optional[str]]:
+        with self._lock:
+            candidates: Optional[Set[str]] = None
+
+            if category:
+                candidates = set(self._by_category.get(category, ()))
+
+            if min_price is not None or max_price is not None:
+                in_range = self._price_candidates(min_price, max_price)
+                candidates = in_range if candidates is None else candidates & in_range
+
+            if name:
+                named = self._name_candidates(name)
+                if named is not None:
+                    candidates = named if candidates is None else candidates & named
+
+            needle = name.lower() if name else None
+            after = _order_key(*cursor) if cursor else None
+
+            if candidates is not None and len(candidates) * CANDIDATE_SORT_RATIO < len(self._order):
+                keys = sorted(self._sort_keys[sweet_id] for sweet_id in candidates)
+                keys = keys[bisect.bisect_right(keys, after):] if after else keys
+            else:
+                start = bisect.bisect_right(self._order, after) if after else 0
+                if candidates is None and needle is None:
+                    keys = self._order[start:start + limit + 1]
+                else:
+                    keys = (self._order[position] for position in range(start, len(self._order)))
+
+            rows = []
+            for _, sweet_id in keys:
+                if candidates is not None and sweet_id not in candidates:
+                    continue
+                row = self._rows[sweet_id]
+                if needle is not None and needle not in row["name"].lower():
+                    continue
+                rows.append(row)
+                if len(rows) > limit:
+                    break
+
+        return split_page(rows, "created_at", limit)
+
+    def diff(self, rows: Iterable[dict], since: Optional[int] = None) -> Dict[str, Any]:
+        with self._lock:
+            skipped = self._touched_since(since)
+            indexed = {
+                sweet_id: _normalize(row) for sweet_id, row in self._rows.items() if sweet_id not in skipped
+            }
+        table = {row["id"]: _normalize(row) for row in rows if row["id"] not in skipped}
+
+        mismatched = {}
+        for sweet_id in table.keys() & indexed.keys():
+            fields = sorted(
+                field for field in table[sweet_id].keys() | indexed[sweet_id].keys()
+                if table[sweet_id].get(field) != indexed[sweet_id].get(field)
+            )
+            if fields:
+                mismatched[sweet_id] = fields
+
+        return {
+            "consistent": not mismatched and table.keys() == indexed.keys(),
+            "table_rows": len(table),
+            "index_rows": len(indexed),
+            "missing_from_index": sorted(table.keys() - indexed.keys()),
+            "not_in_table": sorted(indexed.keys() - table.keys()),
+            "mismatched": mismatched,
+        }
+
+    def reconcile(self, rows: List[dict], since: Optional[int] = None) -> Dict[str, Any]:
+        report = self.diff(rows, since)
+        self.load(rows, since)
+        self.reconciled_at = time.time()
+        self.last_drift = (
+            len(report["missing_from_index"])
+            + len(report["not_in_table"])
+            + len(report["mismatched"])
+        )
+        return report
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "ready": self.ready,
+                "rows": len(self._rows),
+                "categories": len(self._by_category),
+                "trigrams": len(self._grams),
+                "loaded_at": self.loaded_at,
+                "reconciled_at": self.reconciled_at,
+                "last_drift": self.last_drift,
+            }
+
+
+catalog_index = CatalogIndex(enabled=settings.catalog_index_enabled)
+
+
+async def refresh_catalog_index() -> Dict[str, Any]:
+    since = catalog_index.generation
+    async with open_catalog_repository() as sweets:
+        rows = await sweets.fetch_all()
+    return await anyio.to_thread.run_sync(catalog_index.reconcile, rows, since)
+
+
+async def reconcile_catalog_index(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            report = await refresh_catalog_index()
+            if not report["consistent"]:
+                logger.warning("Catalog index drifted from the sweets table: %s", catalog_index.last_drift)
+        except Exception:
+            logger.exception("Catalog index reconcile failed")
@@ -1,16 +1,118 @@
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import List, Literal
+
+DEFAULT_JWT_SECRET_KEY = "your-secret-key-change-in-production"
 
 
 class Settings(BaseSettings):
-    supabase_url: str
-    supabase_key: str
-    supabase_service_role_key: str
-    jwt_secret_key: str = "your-secret-key-change-in-production"
+    storage_backend: Literal["supabase", "memory"] = "supabase"
+    memory_admin_emails: List[str] = []
+
+    supabase_url: str = ""
+    supabase_key: str = ""
+    supabase_service_role_key: str = ""
+    supabase_read_urls: List[str] = []
+    replica_failure_threshold: int = 3
+    replica_ejection_time: float = 30.0
+    read_your_writes_window: float = 5.0
+    read_your_writes_default: bool = False
+    read_your_writes_max_sessions: int = 100000
+    jwt_secret_key: str = DEFAULT_JWT_SECRET_KEY
+    jwt_previous_secret_keys: List[str] = []
+    jwt_algorithms: List[str] = ["HS256"]
+    jwt_audience: str = "authenticated"
+    jwt_local_verification: bool = False
+
+    profile_cache_size: int = 10000
+    profile_cache_ttl: float = 60.0
+    profile_cache_negative_ttl: float = 5.0
+
+    catalog_page_size: int = 100
+    catalog_max_page_size: int = 500
+    catalog_cache_size: int = 1024
+    search_result_limit: int = 20
+
+    catalog_index_enabled: bool = False
+    catalog_index_reconcile_interval: float = 60.0
+    catalog_cache_ttl: float = 5.0
+
+    bulk_import_batch_size: int = 500
+    bulk_import_max_batch_size: int = 5000
+    bulk_import_max_errors: int = 1000
+    export_batch_size: int = 1000
+    purchase_history_page_size: int = 50
+    purchase_history_max_page_size: int = 200
+
+    analytics_default_days: int = 30
+    analytics_max_days: int = 366
+    analytics_max_hourly_days: int = 31
+
+    fast_json_enabled: bool = False
+    trusted_upstream_responses: bool = False
+
+    idempotency_store: Literal["local", "database"] = "local"
+    idempotency_ttl: float = 86400.0
+    idempotency_lock_timeout: float = 30.0
+    idempotency_wait_timeout: float = 10.0
+    idempotency_max_keys: int = 100000
+
+    stream_history_size: int = 1000
+    stream_client_buffer: int = 256
+    stream_max_subscribers: int = 10000
+    stream_heartbeat_interval: float = 15.0
+
+    reservation_ttl: float = 120.0
+    reservation_max_ttl: float = 900.0
+    reservation_batch_size: int = 20
+    reservation_sweep_interval: float = 5.0
+    reservation_escrow_stale_after: float = 60.0
+
+    metrics_enabled: bool = True
+    server_timing_enabled: bool = False
+
+    supabase_pool_size: int = 40
+    supabase_pool_acquire_timeout: float = 5.0
+    supabase_request_timeout: float = 10.0
+    supabase_keepalive_connections: int = 20
+    supabase_keepalive_expiry: float = 30.0
+    upstream_max_concurrency: int = 40
+
+    rate_limit_enabled: bool = True
+    rate_limit_max_keys: int = 100000
+    rate_limit_trust_forwarded_for: bool = False
+    login_ip_rate_limit: str = "30/minute"
+    login_user_rate_limit: str = "10/minute"
+    register_ip_rate_limit: str = "10/minute"
+    register_user_rate_limit: str = ""
+    purchase_ip_rate_limit: str = "120/minute"
+    purchase_user_rate_limit: str = "60/minute"
+    checkout_ip_rate_limit: str = "60/minute"
+    checkout_user_rate_limit: str = "30/minute"
+    admission_max_concurrency: int = 40
+    admission_max_queue: int = 100
+    admission_queue_timeout: float = 2.0
+    admission_retry_after: int = 1
 
     class Config:
         env_file = ".env"
 
+    @model_validator(mode="after")
+    def require_supabase(self):
+        if self.storage_backend == "supabase":
+            missing = [
+                name for name in ("supabase_url", "supabase_key", "supabase_service_role_key")
+                if not getattr(self, name)
+            ]
+            if missing:
+                raise ValueError(f"Missing Supabase settings: {', '.join(missing)}")
+        elif self.idempotency_store == "database":
+            raise ValueError("IDEMPOTENCY_STORE=database requires STORAGE_BACKEND=supabase")
+        if self.jwt_local_verification and self.jwt_secret_key in ("", DEFAULT_JWT_SECRET_KEY):
+            raise ValueError("JWT_LOCAL_VERIFICATION requires JWT_SECRET_KEY to be set to the project's JWT secret")
+        return self
+
 
 @lru_cache()
 def get_settings():
@@ -1,12 +1,362 @@
-from supabase import create_client, Client
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import anyio
+import httpx
+from fastapi import HTTPException, Request, status
+from gotrue.http_clients import SyncClient as AuthHttpClient
+from postgrest import SyncPostgrestClient
+from postgrest.utils import SyncClient as RestHttpClient
+from supabase import Client, SupabaseAuthClient
+from supabase.lib.client_options import ClientOptions
 from app.config import get_settings
+from app.metrics import record_upstream, upstream_labels
+from app.replicas import Replica, primary_required, replica_set
 
 settings = get_settings()
 
+SWEET_NOT_FOUND = "SW404"
+INSUFFICIENT_STOCK = "SW409"
+INVALID_PARAMETER = "22023"
+UNIQUE_VIOLATION = "23505"
+
+
+class PoolTimeoutError(Exception):
+    pass
+
+
+@dataclass
+class PooledClientOptions(ClientOptions):
+    limits: httpx.Limits = field(default_factory=httpx.Limits)
+    on_result: Optional[Callable[[bool], None]] = None
+
+
+class HealthCheckedTransport(httpx.BaseTransport):
+    def __init__(self, transport: httpx.BaseTransport, on_result: Callable[[bool], None]):
+        self._transport = transport
+        self._on_result = on_result
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        try:
+            response = self._transport.handle_request(request)
+        except httpx.TransportError:
+            self._on_result(False)
+            raise
+        self._on_result(response.status_code < 500)
+        return response
+
+    def close(self):
+        self._transport.close()
+
+
+class PooledPostgrestClient(SyncPostgrestClient):
+    def __init__(
+        self,
+        base_url: str,
+        *,
+        limits: httpx.Limits,
+        on_result: Optional[Callable[[bool], None]] = None,
+        **kwargs
+    ):
+        self._limits = limits
+        self._on_result = on_result
+        super().__init__(base_url, **kwargs)
+
+    def create_session(self, base_url, headers, timeout) -> RestHttpClient:
+        if self._on_result is None:
+            return RestHttpClient(
+                base_url=base_url,
+                headers=headers,
+                timeout=timeout,
+                limits=self._limits,
+            )
+
+        return RestHttpClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            transport=HealthCheckedTransport(httpx.HTTPTransport(limits=self._limits), self._on_result),
+        )
+
+
+class PooledClient(Client):
+    @staticmethod
+    def _init_supabase_auth_client(auth_url: str, client_options: PooledClientOptions) -> SupabaseAuthClient:
+        return SupabaseAuthClient(
+            url=auth_url,
+            auto_refresh_token=client_options.auto_refresh_token,
+            persist_session=client_options.persist_session,
+            storage=client_options.storage,
+            headers=client_options.headers,
+            flow_type=client_options.flow_type,
+            http_client=AuthHttpClient(
+                follow_redirects=True,
+                http2=True,
+                timeout=client_options.postgrest_client_timeout,
+                limits=client_options.limits,
+            ),
+        )
+
+    def _init_postgrest_client(self, rest_url, headers, schema, timeout) -> PooledPostgrestClient:
+        return PooledPostgrestClient(
+            rest_url,
+            headers=headers,
+            schema=schema,
+            timeout=timeout,
+            limits=self.options.limits,
+            on_result=self.options.on_result,
+        )
+
+    def _listen_to_auth_events(self, event, session):
+        if event in ["SIGNED_IN", "TOKEN_REFRESHED", "SIGNED_OUT"] and self._postgrest is not None:
+            self._postgrest.aclose()
+        super()._listen_to_auth_events(event, session)
+
+    def has_session(self) -> bool:
+        return self._auth_token["Authorization"] != f"Bearer {self.supabase_key}"
+
+    def reset_session(self):
+        self.auth._remove_session()
+        self._listen_to_auth_events("SIGNED_OUT", None)
+
+    def close(self):
+        if self._postgrest is not None:
+            self._postgrest.aclose()
+        self.auth.close()
+
+
+class SupabasePool:
+    def __init__(
+        self,
+        url: str,
+        key: str,
+        size: int,
+        acquire_timeout: float,
+        request_timeout: float,
+        keepalive_connections: int,
+        keepalive_expiry: float,
+        on_result: Optional[Callable[[bool], None]] = None,
+    ):
+        self.url = url
+        self.key = key
+        self.on_result = on_result
+        self.size = size
+        self.acquire_timeout = acquire_timeout
+        self.request_timeout = request_timeout
+        self.limits = httpx.Limits(
+            max_keepalive_connections=keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self._idle: List[PooledClient] = []
+        self._in_use = 0
+        self._created = 0
+        self._timeouts = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def _create_client(self) -> PooledClient:
+        options = PooledClientOptions(
+            auto_refresh_token=False,
+            persist_session=False,
+            postgrest_client_timeout=self.request_timeout,
+            limits=self.limits,
+            on_result=self.on_result,
+        )
+        return PooledClient.create(self.url, self.key, options)
+
+    def acquire(self) -> PooledClient:
+        with self._cond:
+            if self._closed:
+                raise PoolTimeoutError("Supabase client pool is closed")
+
+            if not self._idle and self._created >= self.size:
+                ready = self._cond.wait_for(
+                    lambda: self._idle or self._created < self.size or self._closed,
+                    timeout=self.acquire_timeout,
+                )
+                if not ready or self._closed:
+                    self._timeouts += 1
+                    raise PoolTimeoutError("Timed out waiting for a Supabase client")
+
+            self._in_use += 1
+            if self._idle:
+                return self._idle.pop()
+            self._created += 1
+
+        try:
+            return self._create_client()
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._created -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, client: PooledClient):
+        if client.has_session():
+            client.reset_session()
+
+        with self._cond:
+            self._in_use -= 1
+            if self._closed:
+                client.close()
+            else:
+                self._idle.append(client)
+            self._cond.notify()
+
+    @contextmanager
+    def client(self) -> Iterator[PooledClient]:
+        client = self.acquire()
+        try:
+            yield client
+        finally:
+            self.release(client)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {
+                "size": self.size,
+                "created": self._created,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "acquire_timeouts": self._timeouts,
+            }
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+
+        for client in idle:
+            client.close()
+
+
+_pools: Dict[str, SupabasePool] = {}
+_pools_lock = threading.Lock()
+
+
+def _build_pool(key: str, replica: Optional[Replica] = None) -> SupabasePool:
+    return SupabasePool(
+        url=replica.url if replica else settings.supabase_url,
+        key=key,
+        size=settings.supabase_pool_size,
+        acquire_timeout=settings.supabase_pool_acquire_timeout,
+        request_timeout=settings.supabase_request_timeout,
+        keepalive_connections=settings.supabase_keepalive_connections,
+        keepalive_expiry=settings.supabase_keepalive_expiry,
+        on_result=partial(replica_set.record, replica) if replica else None,
+    )
+
+
+def get_pool(name: str = "anon", replica: Optional[Replica] = None) -> SupabasePool:
+    pool_name = f"{name}@{replica.index}" if replica else name
+    pool = _pools.get(pool_name)
+    if pool is not None:
+        return pool
+
+    with _pools_lock:
+        if pool_name not in _pools:
+            key = settings.supabase_service_role_key if name == "admin" else settings.supabase_key
+            _pools[pool_name] = _build_pool(key, replica)
+        return _pools[pool_name]
+
+
+def init_pools():
+    for replica in [None, *replica_set.members]:
+        get_pool("anon", replica)
+        get_pool("admin", replica)
+
+
+def close_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+
+    for pool in pools:
+        pool.close()
+
+
+def pool_stats() -> Dict[str, Dict[str, int]]:
+    return {name: pool.stats() for name, pool in list(_pools.items())}
+
+
+_upstream_limiter: Optional[anyio.CapacityLimiter] = None
+
+
+def get_upstream_limiter() -> anyio.CapacityLimiter:
+    global _upstream_limiter
+    if _upstream_limiter is None:
+        _upstream_limiter = anyio.CapacityLimiter(settings.upstream_max_concurrency)
+    return _upstream_limiter
+
+
+async def run_upstream(func: Callable[..., Any], *args, **kwargs) -> Any:
+    table, operation = upstream_labels(func)
+    started = time.perf_counter()
+    try:
+        return await anyio.to_thread.run_sync(
+            partial(func, *args, **kwargs),
+            limiter=get_upstream_limiter()
+        )
+    finally:
+        record_upstream(table, operation, time.perf_counter() - started)
+
+
+async def execute(query) -> Any:
+    return await run_upstream(query.execute)
+
+
+def _acquire(pool: SupabasePool) -> PooledClient:
+    try:
+        return pool.acquire()
+    except PoolTimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Database connection pool exhausted"
+        )
+
+
+async def acquire_client(pool: SupabasePool) -> PooledClient:
+    return await anyio.to_thread.run_sync(_acquire, pool)
+
+
+def _pooled_client(pool: SupabasePool) -> Iterator[Client]:
+    client = _acquire(pool)
+
+    try:
+        yield client
+    finally:
+        pool.release(client)
+
+
+def read_pool(name: str, request: Request) -> SupabasePool:
+    if replica_set.members and not primary_required(request):
+        replica = replica_set.pick()
+        if replica is not None:
+            return get_pool(name, replica)
+    return get_pool(name)
+
+
+def get_supabase_client() -> Iterator[Client]:
+    yield from _pooled_client(get_pool("anon"))
+
+
+def get_supabase_admin_client() -> Iterator[Client]:
+    yield from _pooled_client(get_pool("admin"))
+
+
+def get_supabase_read_client(request: Request) -> Iterator[Client]:
+    yield from _pooled_client(read_pool("anon", request))
+
 
-def get_supabase_client() -> Client:
-    return create_client(settings.supabase_url, settings.supabase_key)
+def get_supabase_admin_read_client(request: Request) -> Iterator[Client]:
+    yield from _pooled_client(read_pool("admin", request))
 
 
-def get_supabase_admin_client() -> Client:
-    return create_client(settings.supabase_url, settings.supabase_service_role_key)
+def get_supabase_admin_pool() -> SupabasePool:
+    return get_pool("admin")
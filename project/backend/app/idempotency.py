@@ -0,0 +1,302 @@
+import asyncio
+import hashlib
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional, Tuple
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.auth import get_current_user
+from app.config import get_settings
+from app.database import acquire_client, execute, get_pool
+
+settings = get_settings()
+
+REPLAYED_HEADER = "Idempotent-Replayed"
+STORED_HEADERS = {"content-type", "etag", "location"}
+MAX_KEY_LENGTH = 255
+
+
+@dataclass
+class IdempotencyRecord:
+    fingerprint: str
+    status_code: Optional[int] = None
+    body: bytes = b""
+    headers: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def completed(self) -> bool:
+        return self.status_code is not None
+
+
+class IdempotentReplay(Exception):
+    def __init__(self, record: IdempotencyRecord):
+        self.record = record
+
+
+class IdempotencyStore(ABC):
+    def __init__(self, ttl: float, lock_timeout: float, wait_timeout: float, poll_interval: float = 0.05):
+        self.ttl = ttl
+        self.lock_timeout = lock_timeout
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        self.replays = 0
+        self.waits = 0
+
+    @abstractmethod
+    async def reserve(self, key: str, fingerprint: str) -> bool:
+        pass
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[IdempotencyRecord]:
+        pass
+
+    @abstractmethod
+    async def complete(self, key: str, record: IdempotencyRecord):
+        pass
+
+    @abstractmethod
+    async def release(self, key: str):
+        pass
+
+    async def claim(self, key: str, fingerprint: str) -> Optional[IdempotencyRecord]:
+        deadline = time.monotonic() + self.wait_timeout
+        waited = False
+
+        while True:
+            if await self.reserve(key, fingerprint):
+                return None
+
+            record = await self.get(key)
+            if record is None:
+                continue
+
+            if record.fingerprint != fingerprint:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail="Idempotency-Key was already used for a different request"
+                )
+
+            if record.completed:
+                self.replays += 1
+                return record
+
+            if time.monotonic() >= deadline:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="A request with this Idempotency-Key is still in progress",
+                    headers={"Retry-After": "1"}
+                )
+
+            if not waited:
+                waited = True
+                self.waits += 1
+            await asyncio.sleep(self.poll_interval)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"replays": self.replays, "waits": self.waits}
+
+
+class LocalIdempotencyStore(IdempotencyStore):
+    def __init__(self, max_keys: int, clock: Callable[[], float] = time.monotonic, **kwargs):
+        super().__init__(**kwargs)
+        self.max_keys = max_keys
+        self._clock = clock
+        self._entries: Dict[str, Tuple[float, IdempotencyRecord]] = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key: str) -> Optional[IdempotencyRecord]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= self._clock():
+            del self._entries[key]
+            return None
+        return entry[1]
+
+    def _evict(self):
+        now = self._clock()
+        for key in [key for key, (expires_at, _) in self._entries.items() if expires_at <= now]:
+            del self._entries[key]
+        while len(self._entries) > self.max_keys:
+            del self._entries[next(iter(self._entries))]
+
+    async def reserve(self, key: str, fingerprint: str) -> bool:
+        with self._lock:
+            if self._live(key) is not None:
+                return False
+            self._entries[key] = (self._clock() + self.lock_timeout, IdempotencyRecord(fingerprint))
+            if len(self._entries) > self.max_keys:
+                self._evict()
+            return True
+
+    async def get(self, key: str) -> Optional[IdempotencyRecord]:
+        with self._lock:
+            return self._live(key)
+
+    async def complete(self, key: str, record: IdempotencyRecord):
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, record)
+
+    async def release(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not entry[1].completed:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**super().stats(), "store": "local", "keys": len(self._entries)}
+
+
+class SupabaseIdempotencyStore(IdempotencyStore):
+    async def _call(self, build: Callable[[Any], Any]) -> Any:
+        pool = get_pool("admin")
+        client = await acquire_client(pool)
+        try:
+            return (await execute(build(client))).data
+        finally:
+            pool.release(client)
+
+    async def reserve(self, key: str, fingerprint: str) -> bool:
+        return bool(await self._call(lambda client: client.rpc("claim_idempotency_key", {
+            "p_key": key,
+            "p_fingerprint": fingerprint,
+            "p_lock_seconds": self.lock_timeout
+        })))
+
+    async def get(self, key: str) -> Optional[IdempotencyRecord]:
+        rows = await self._call(
+            lambda client: client.table("idempotency_keys")
+            .select("fingerprint,status_code,body,headers")
+            .eq("key", key)
+            .gt("expires_at", datetime.now(timezone.utc).isoformat())
+        )
+        if not rows:
+            return None
+
+        row = rows[0]
+        return IdempotencyRecord(
+            fingerprint=row["fingerprint"],
+            status_code=row["status_code"],
+            body=(row["body"] or "").encode(),
+            headers=row["headers"] or {}
+        )
+
+    async def complete(self, key: str, record: IdempotencyRecord):
+        await self._call(lambda client: client.rpc("complete_idempotency_key", {
+            "p_key": key,
+            "p_status_code": record.status_code,
+            "p_body": record.body.decode(),
+            "p_headers": record.headers,
+            "p_ttl_seconds": self.ttl
+        }))
+
+    async def release(self, key: str):
+        await self._call(
+            lambda client: client.table("idempotency_keys")
+            .delete()
+            .eq("key", key)
+            .is_("status_code", "null")
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "store": "database"}
+
+
+def _build_store() -> IdempotencyStore:
+    options = {
+        "ttl": settings.idempotency_ttl,
+        "lock_timeout": settings.idempotency_lock_timeout,
+        "wait_timeout": settings.idempotency_wait_timeout,
+    }
+    if settings.idempotency_store == "database":
+        return SupabaseIdempotencyStore(**options)
+    return LocalIdempotencyStore(max_keys=settings.idempotency_max_keys, **options)
+
+
+idempotency_store = _build_store()
+
+
+@dataclass
+class IdempotencyClaim:
+    store: IdempotencyStore
+    key: str
+    fingerprint: str
+
+
+async def idempotency_guard(request: Request, current_user: dict = Depends(get_current_user)):
+    idempotency_key = request.headers.get("idempotency-key")
+    if idempotency_key is None:
+        return
+
+    if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters"
+        )
+
+    digest = hashlib.sha256(f"{request.method} {request.url.path}\n".encode())
+    digest.update(await request.body())
+    fingerprint = digest.hexdigest()
+    key = f"{current_user['id']}:{idempotency_key}"
+
+    record = await idempotency_store.claim(key, fingerprint)
+    if record is not None:
+        raise IdempotentReplay(record)
+
+    request.state.idempotency = IdempotencyClaim(idempotency_store, key, fingerprint)
+
+
+async def replay_response(request: Request, exc: IdempotentReplay) -> Response:
+    record = exc.record
+    return Response(
+        content=record.body,
+        status_code=record.status_code,
+        headers={**record.headers, REPLAYED_HEADER: "true"}
+    )
+
+
+class IdempotencyMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not any(name == b"idempotency-key" for name, _ in scope["headers"]):
+            await self.app(scope, receive, send)
+            return
+
+        status_code = None
+        headers: Dict[str, str] = {}
+        body = bytearray()
+
+        async def capture(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                for name, value in message.get("headers", []):
+                    if name.decode().lower() in STORED_HEADERS:
+                        headers[name.decode().lower()] = value.decode()
+            elif message["type"] == "http.response.body":
+                body.extend(message.get("body", b""))
+            await send(message)
+
+        completed = False
+        try:
+            await self.app(scope, receive, capture)
+            completed = True
+        finally:
+            claim = (scope.get("state") or {}).get("idempotency")
+            if claim is not None:
+                if completed and status_code is not None and status_code < 500 and status_code != 429:
+                    record = IdempotencyRecord(claim.fingerprint, status_code, bytes(body), headers)
+                    await claim.store.complete(claim.key, record)
+                else:
+                    await claim.store.release(claim.key)
@@ -1,11 +1,59 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import auth, sweets
+from app.catalog_index import catalog_index, refresh_catalog_index, reconcile_catalog_index
+from app.config import get_settings
+from app.database import init_pools, close_pools
+from app.idempotency import IdempotencyMiddleware, IdempotentReplay, replay_response
+from app.metrics import MetricsMiddleware, registry
+from app.replicas import ReadYourWritesMiddleware
+from app.reservations import release_all_reservations, sweep_reservations
+from app.serialization import FastJSONResponse
+from app.routers import admin, analytics, auth, orders, purchases, sweets
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.storage_backend == "supabase":
+        init_pools()
+
+    reconciler = None
+    if catalog_index.enabled:
+        try:
+            await refresh_catalog_index()
+        except Exception:
+            logger.exception("Catalog index load failed; search falls back to Supabase")
+        reconciler = asyncio.create_task(
+            reconcile_catalog_index(settings.catalog_index_reconcile_interval)
+        )
+
+    sweeper = asyncio.create_task(sweep_reservations(settings.reservation_sweep_interval))
+
+    yield
+
+    sweeper.cancel()
+    try:
+        await release_all_reservations()
+    except Exception:
+        logger.exception("Returning reserved stock on shutdown failed")
+    if reconciler is not None:
+        reconciler.cancel()
+    if settings.storage_backend == "supabase":
+        close_pools()
+
 
 app = FastAPI(
     title="Sweet Shop Management System",
     description="A comprehensive API for managing a sweet shop with inventory and purchases",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse if settings.fast_json_enabled else JSONResponse
 )
 
 app.add_middleware(
@@ -14,10 +62,26 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "Server-Timing"],
 )
 
+app.add_middleware(IdempotencyMiddleware)
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_exception_handler(IdempotentReplay, replay_response)
+
+if settings.metrics_enabled:
+    app.add_middleware(
+        MetricsMiddleware,
+        routes=app.router.routes,
+        server_timing=settings.server_timing_enabled
+    )
+
 app.include_router(auth.router)
 app.include_router(sweets.router)
+app.include_router(orders.router)
+app.include_router(purchases.router)
+app.include_router(analytics.router)
+app.include_router(admin.router)
 
 
 @app.get("/")
@@ -32,3 +96,8 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,246 @@
+import bisect
+import contextvars
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+from starlette.routing import BaseRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+Labels = Tuple[Tuple[str, str], ...]
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21)
+
+OPERATIONS = {"GET": "select", "HEAD": "select", "POST": "insert", "PATCH": "update", "PUT": "upsert", "DELETE": "delete"}
+
+
+def _labels(**labels: str) -> Labels:
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values: Dict[Labels, float] = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        with self._lock:
+            self._values[_labels(**labels)] += amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(_labels(**labels), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{_format_labels(labels)} {_format_value(value)}" for labels, value in sorted(self._values.items())]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels: str):
+        self.inc(-amount, **labels)
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self._series: Dict[Labels, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str):
+        key = _labels(**labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            series[bisect.bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            series = self._series.get(_labels(**labels))
+            return int(sum(series[:-1])) if series else 0
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for labels, series in sorted(self._series.items()):
+                cumulative = 0.0
+                for bound, count in zip((*self.buckets, float("inf")), series[:-1]):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_format_labels(labels, ('le', _format_value(bound)))} {_format_value(cumulative)}")
+                lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(series[-1])}")
+                lines.append(f"{self.name}_count{_format_labels(labels)} {_format_value(cumulative)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[Any] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.register(Counter("http_requests_total", "HTTP requests by route and status."))
+http_latency = registry.register(Histogram("http_request_duration_seconds", "HTTP request latency by route."))
+http_in_flight = registry.register(Gauge("http_requests_in_flight", "HTTP requests currently being served."))
+upstream_calls = registry.register(Counter("upstream_calls_total", "Supabase calls by table and operation."))
+upstream_latency = registry.register(Histogram("upstream_call_duration_seconds", "Supabase call latency by table and operation."))
+request_upstream_calls = registry.register(Histogram("request_upstream_calls", "Supabase calls made per HTTP request.", COUNT_BUCKETS))
+request_upstream_time = registry.register(Histogram("request_upstream_seconds", "Time spent in Supabase calls per HTTP request."))
+rate_limit_rejections = registry.register(Counter("rate_limit_rejections_total", "Requests shed by rate limits and admission control by route and reason."))
+single_flight_calls = registry.register(Counter("single_flight_calls_total", "Coalesced read calls by group and whether the caller led or joined an in-flight call."))
+admission_waiting = registry.register(Gauge("admission_queue_depth", "Requests waiting for an admission slot."))
+
+
+@dataclass
+class RequestTiming:
+    calls: int = 0
+    upstream: float = 0.0
+    by_call: Dict[Tuple[str, str], List[float]] = field(default_factory=dict)
+
+    def record(self, table: str, operation: str, duration: float):
+        self.calls += 1
+        self.upstream += duration
+        totals = self.by_call.setdefault((table, operation), [0, 0.0])
+        totals[0] += 1
+        totals[1] += duration
+
+    def server_timing(self, total: float) -> str:
+        entries = [f'upstream;dur={self.upstream * 1000:.1f};desc="{self.calls} calls"']
+        for (table, operation), (count, duration) in sorted(self.by_call.items()):
+            entries.append(f'{table}.{operation};dur={duration * 1000:.1f};desc="{count}x"')
+        entries.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(entries)
+
+
+_current_timing: contextvars.ContextVar[Optional[RequestTiming]] = contextvars.ContextVar("request_timing", default=None)
+
+
+def upstream_labels(func: Callable) -> Tuple[str, str]:
+    query = getattr(func, "__self__", None)
+    path = getattr(query, "path", None)
+    method = getattr(query, "http_method", None)
+    name = getattr(func, "__name__", "call")
+
+    if name == "execute" and isinstance(path, str):
+        table = path.rsplit("/", 1)[-1]
+        if path.startswith("/rpc/"):
+            return table, "rpc"
+        headers = getattr(query, "headers", None)
+        prefer = headers.get("Prefer", "") if isinstance(headers, Mapping) else ""
+        if method == "POST" and "resolution=" in prefer:
+            return table, "upsert"
+        return table, OPERATIONS.get(method, str(method).lower())
+
+    if "gotrue" in type(query).__module__:
+        return "auth", name
+    return "-", name
+
+
+def record_upstream(table: str, operation: str, duration: float):
+    upstream_calls.inc(table=table, operation=operation)
+    upstream_latency.observe(duration, table=table, operation=operation)
+
+    timing = _current_timing.get()
+    if timing is not None:
+        timing.record(table, operation, duration)
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp, routes: List[BaseRoute], server_timing: bool = False):
+        self.app = app
+        self.routes = routes
+        self.server_timing = server_timing
+        self._route_paths: Dict[Any, str] = {}
+
+    def _route(self, scope: Scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+
+        if endpoint not in self._route_paths:
+            for route in self.routes:
+                if getattr(route, "endpoint", None) is endpoint:
+                    self._route_paths[endpoint] = getattr(route, "path", "unmatched")
+                    break
+            else:
+                self._route_paths[endpoint] = "unmatched"
+        return self._route_paths[endpoint]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming()
+        token = _current_timing.set(timing)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_metrics(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing:
+                    header = timing.server_timing(time.perf_counter() - started)
+                    message["headers"] = [*message.get("headers", []), (b"server-timing", header.encode())]
+            await send(message)
+
+        http_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            duration = time.perf_counter() - started
+            route = self._route(scope)
+            method = scope["method"]
+
+            http_in_flight.dec()
+            http_requests.inc(method=method, route=route, status=str(status_code))
+            http_latency.observe(duration, method=method, route=route)
+            request_upstream_calls.observe(timing.calls, route=route)
+            request_upstream_time.observe(timing.upstream, route=route)
+            _current_timing.reset(token)
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr, Field
-from typing import Optional
+from pydantic import BaseModel, EmailStr, Field, field_validator, model_validator
+from typing import List, Optional
 from datetime import datetime
 from decimal import Decimal
 
@@ -57,6 +57,18 @@ class SweetResponse(SweetBase):
     updated_at: datetime
 
 
+class SweetListItem(BaseModel):
+    id: Optional[str] = None
+    name: Optional[str] = None
+    description: Optional[str] = None
+    category: Optional[str] = None
+    price: Optional[Decimal] = None
+    quantity: Optional[int] = None
+    image_url: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+
 class PurchaseRequest(BaseModel):
     quantity: int = Field(..., gt=0)
 
@@ -74,6 +86,123 @@ class PurchaseResponse(BaseModel):
     purchased_at: datetime
 
 
+class PurchaseSweetSummary(BaseModel):
+    name: str
+    price: Decimal
+
+
+class PurchaseHistoryItem(PurchaseResponse):
+    sweet: Optional[PurchaseSweetSummary] = None
+
+
+class CheckoutItem(BaseModel):
+    sweet_id: str
+    quantity: int = Field(..., gt=0)
+
+
+class CheckoutRequest(BaseModel):
+    items: List[CheckoutItem] = Field(default_factory=list, max_length=100)
+    reservation_ids: List[str] = Field(default_factory=list, max_length=100)
+
+    @model_validator(mode="after")
+    def items_or_reservations(self):
+        if bool(self.items) == bool(self.reservation_ids):
+            raise ValueError("Provide either items or reservation_ids")
+        return self
+
+
+class ReserveRequest(BaseModel):
+    quantity: int = Field(..., gt=0)
+    ttl_seconds: Optional[float] = Field(None, gt=0)
+
+
+class ReservationResponse(BaseModel):
+    id: str
+    sweet_id: str
+    quantity: int
+    expires_at: datetime
+
+
+class OrderResponse(BaseModel):
+    items: List[PurchaseResponse]
+    total_price: Decimal
+
+
+class BulkImportRowError(BaseModel):
+    line: int
+    error: str
+
+
+class BulkImportResponse(BaseModel):
+    received: int
+    upserted: int
+    failed: int
+    errors: List[BulkImportRowError]
+    errors_truncated: bool = False
+
+
+class SweetSales(BaseModel):
+    sweet_id: str
+    name: Optional[str] = None
+    category: str
+    units: int
+    revenue: Decimal
+
+
+class CategorySales(BaseModel):
+    category: str
+    units: int
+    revenue: Decimal
+
+
+class SalesBucket(BaseModel):
+    bucket: datetime
+    units: int
+    revenue: Decimal
+
+
+class SalesSummary(BaseModel):
+    start: datetime
+    end: datetime
+    granularity: str
+    units: int
+    revenue: Decimal
+    by_sweet: List[SweetSales]
+    by_category: List[CategorySales]
+    timeline: List[SalesBucket]
+    top_sellers: List[SweetSales]
+
+
+class RestockItem(BaseModel):
+    sweet_id: str
+    quantity_delta: int
+
+    @field_validator("quantity_delta")
+    @classmethod
+    def non_zero(cls, value: int) -> int:
+        if value == 0:
+            raise ValueError("quantity_delta must be non-zero")
+        return value
+
+
+class PriceItem(BaseModel):
+    sweet_id: str
+    price: Decimal = Field(..., ge=0)
+
+
+class BulkRestockRequest(BaseModel):
+    items: List[RestockItem] = Field(..., min_length=1, max_length=1000)
+
+
+class BulkPriceRequest(BaseModel):
+    items: List[PriceItem] = Field(..., min_length=1, max_length=1000)
+
+
+class BulkUpdateResponse(BaseModel):
+    updated: int
+    items: List[SweetResponse]
+
+
 class SearchParams(BaseModel):
     name: Optional[str] = None
     category: Optional[str] = None
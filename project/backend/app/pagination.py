@@ -0,0 +1,49 @@
+import base64
+import binascii
+import json
+from typing import Any, List, Optional, Tuple
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+def encode_cursor(sort_value: Any, row_id: Any) -> str:
+    payload = json.dumps([sort_value, row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise InvalidCursorError("Invalid cursor")
+
+    if not isinstance(sort_value, str) or not isinstance(row_id, str):
+        raise InvalidCursorError("Invalid cursor")
+    return sort_value, row_id
+
+
+def _quote(value: str) -> str:
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def apply_keyset(query, sort_column: str, cursor: Optional[Tuple[str, str]], limit: int):
+    if cursor:
+        sort_value, row_id = _quote(cursor[0]), _quote(cursor[1])
+        query = query.or_(
+            f"{sort_column}.lt.{sort_value},"
+            f"and({sort_column}.eq.{sort_value},id.gt.{row_id})"
+        )
+    # PostgREST only honours one "order" parameter, so both keys go in a single clause.
+    return query.order(f"{sort_column}.desc,id").limit(limit + 1)
+
+
+def split_page(rows: List[dict], sort_column: str, limit: int) -> Tuple[List[dict], Optional[str]]:
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last[sort_column], last["id"])
@@ -0,0 +1,219 @@
+import math
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Callable, Dict, Hashable, Optional, Tuple
+import anyio
+from fastapi import Depends, HTTPException, Request, status
+from app.auth import get_current_user
+from app.config import get_settings
+from app.metrics import admission_waiting, rate_limit_rejections
+
+settings = get_settings()
+
+ROUTES = ("login", "register", "purchase", "checkout")
+SCOPES = ("ip", "user")
+PERIODS = {"second": 1.0, "minute": 60.0, "hour": 3600.0}
+RATE_PATTERN = re.compile(r"^\s*(\d+)\s*/\s*(second|minute|hour)\s*$")
+
+
+def parse_rate(spec: str) -> Optional[Tuple[int, float]]:
+    if not spec or not spec.strip():
+        return None
+
+    match = RATE_PATTERN.match(spec)
+    if not match:
+        raise ValueError(f"Invalid rate limit {spec!r}; expected '<count>/<second|minute|hour>'")
+
+    count = int(match.group(1))
+    return (count, PERIODS[match.group(2)]) if count > 0 else None
+
+
+class TokenBucketLimiter:
+    def __init__(
+        self,
+        capacity: int,
+        period: float,
+        max_keys: int = 100000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.capacity = capacity
+        self.period = period
+        self.rate = capacity / period
+        self.max_keys = max_keys
+        self._clock = clock
+        self._buckets: "OrderedDict[Hashable, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.rejected = 0
+
+    def take(self, key: Hashable) -> float:
+        with self._lock:
+            now = self._clock()
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                tokens = float(self.capacity)
+            else:
+                tokens = min(float(self.capacity), bucket[0] + (now - bucket[1]) * self.rate)
+
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+                self.allowed += 1
+            else:
+                wait = (1 - tokens) / self.rate
+                self.rejected += 1
+
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return wait
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            return {
+                "capacity": self.capacity,
+                "period": self.period,
+                "tracked_keys": len(self._buckets),
+                "allowed": self.allowed,
+                "rejected": self.rejected,
+            }
+
+
+class AdmissionLimiter:
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = anyio.Semaphore(max_concurrency)
+        self.waiting = 0
+        self.admitted = 0
+        self.queue_full = 0
+        self.timed_out = 0
+
+    @property
+    def active(self) -> int:
+        return self.max_concurrency - self._semaphore.value
+
+    async def acquire(self) -> Optional[str]:
+        if self._semaphore.value == 0 and self.waiting >= self.max_queue:
+            self.queue_full += 1
+            return "queue_full"
+
+        self.waiting += 1
+        admission_waiting.inc()
+        try:
+            with anyio.move_on_after(self.queue_timeout):
+                await self._semaphore.acquire()
+                self.admitted += 1
+                return None
+        finally:
+            self.waiting -= 1
+            admission_waiting.dec()
+
+        self.timed_out += 1
+        return "queue_timeout"
+
+    def release(self):
+        self._semaphore.release()
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "queue_timeout": self.queue_timeout,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "queue_full": self.queue_full,
+            "queue_timeout_rejections": self.timed_out,
+        }
+
+
+def _build_limiters() -> Dict[Tuple[str, str], TokenBucketLimiter]:
+    limiters = {}
+    for route in ROUTES:
+        for scope in SCOPES:
+            rate = parse_rate(getattr(settings, f"{route}_{scope}_rate_limit"))
+            if rate:
+                limiters[(route, scope)] = TokenBucketLimiter(*rate, max_keys=settings.rate_limit_max_keys)
+    return limiters
+
+
+limiters = _build_limiters()
+admission = AdmissionLimiter(
+    max_concurrency=settings.admission_max_concurrency,
+    max_queue=settings.admission_max_queue,
+    queue_timeout=settings.admission_queue_timeout,
+)
+
+
+def client_ip(request: Request) -> str:
+    if settings.rate_limit_trust_forwarded_for:
+        forwarded = request.headers.get("x-forwarded-for", "").split(",")[0].strip()
+        if forwarded:
+            return forwarded
+    return request.client.host if request.client else "unknown"
+
+
+def _reject(route: str, reason: str, retry_after: float):
+    rate_limit_rejections.inc(route=route, reason=reason)
+    raise HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many requests",
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+    )
+
+
+def enforce_rate_limit(route: str, scope: str, key: str):
+    if not settings.rate_limit_enabled:
+        return
+
+    limiter = limiters.get((route, scope))
+    if limiter is None:
+        return
+
+    wait = limiter.take(key)
+    if wait > 0:
+        _reject(route, scope, wait)
+
+
+def admission_control(route: str) -> Callable[[Request], AsyncIterator[None]]:
+    async def dependency(request: Request) -> AsyncIterator[None]:
+        if not settings.rate_limit_enabled:
+            yield
+            return
+
+        enforce_rate_limit(route, "ip", client_ip(request))
+
+        rejected = await admission.acquire()
+        if rejected:
+            _reject(route, rejected, settings.admission_retry_after)
+
+        try:
+            yield
+        finally:
+            admission.release()
+
+    return dependency
+
+
+def rate_limited_user(route: str) -> Callable[..., dict]:
+    async def dependency(current_user: dict = Depends(get_current_user)) -> dict:
+        enforce_rate_limit(route, "user", current_user["id"])
+        return current_user
+
+    return dependency
+
+
+def rate_limit_stats() -> dict:
+    return {
+        "enabled": settings.rate_limit_enabled,
+        "admission": admission.stats(),
+        "limits": {
+            f"{route}:{scope}": limiter.stats()
+            for (route, scope), limiter in limiters.items()
+        },
+    }
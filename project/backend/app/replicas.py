@@ -0,0 +1,175 @@
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.config import get_settings
+
+settings = get_settings()
+
+CONSISTENCY_HEADER = "x-read-consistency"
+READ_YOUR_WRITES_HEADER = "x-read-your-writes"
+SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+@dataclass
+class Replica:
+    index: int
+    url: str
+    consecutive_failures: int = 0
+    ejected_until: float = 0.0
+    picks: int = 0
+    errors: int = 0
+    ejections: int = 0
+
+
+class ReplicaSet:
+    def __init__(
+        self,
+        urls: List[str],
+        failure_threshold: int,
+        ejection_time: float,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.members = [Replica(index, url.rstrip("/")) for index, url in enumerate(urls)]
+        self.failure_threshold = failure_threshold
+        self.ejection_time = ejection_time
+        self._clock = clock
+        self._next = 0
+        self.fallbacks = 0
+        self._lock = threading.Lock()
+
+    def pick(self) -> Optional[Replica]:
+        with self._lock:
+            now = self._clock()
+            healthy = [replica for replica in self.members if replica.ejected_until <= now]
+            if not healthy:
+                self.fallbacks += 1
+                return None
+
+            replica = healthy[self._next % len(healthy)]
+            self._next += 1
+            replica.picks += 1
+            return replica
+
+    def record(self, replica: Replica, ok: bool):
+        with self._lock:
+            if ok:
+                replica.consecutive_failures = 0
+                return
+
+            replica.errors += 1
+            replica.consecutive_failures += 1
+            if replica.consecutive_failures >= self.failure_threshold:
+                replica.consecutive_failures = 0
+                replica.ejected_until = self._clock() + self.ejection_time
+                replica.ejections += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            now = self._clock()
+            return {
+                "fallbacks": self.fallbacks,
+                "replicas": [
+                    {
+                        "url": replica.url,
+                        "healthy": replica.ejected_until <= now,
+                        "picks": replica.picks,
+                        "errors": replica.errors,
+                        "ejections": replica.ejections,
+                    }
+                    for replica in self.members
+                ],
+            }
+
+
+class SessionPins:
+    def __init__(self, window: float, max_sessions: int, clock: Callable[[], float] = time.monotonic):
+        self.window = window
+        self.max_sessions = max_sessions
+        self._clock = clock
+        self._pins: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def pin(self, session: str):
+        with self._lock:
+            self._pins.pop(session, None)
+            self._pins[session] = self._clock() + self.window
+            while len(self._pins) > self.max_sessions:
+                del self._pins[next(iter(self._pins))]
+
+    def pinned(self, session: str) -> bool:
+        with self._lock:
+            expires_at = self._pins.get(session)
+            if expires_at is None:
+                return False
+            if expires_at <= self._clock():
+                del self._pins[session]
+                return False
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._pins.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"window": self.window, "pinned_sessions": len(self._pins)}
+
+
+replica_set = ReplicaSet(
+    settings.supabase_read_urls,
+    failure_threshold=settings.replica_failure_threshold,
+    ejection_time=settings.replica_ejection_time,
+)
+session_pins = SessionPins(settings.read_your_writes_window, settings.read_your_writes_max_sessions)
+
+
+def session_key(authorization: Optional[str]) -> Optional[str]:
+    if not authorization:
+        return None
+    return hashlib.sha256(authorization.encode()).hexdigest()
+
+
+def primary_required(connection: HTTPConnection) -> bool:
+    if not replica_set.members:
+        return False
+    if connection.headers.get(CONSISTENCY_HEADER, "").lower() == "primary":
+        return True
+    session = session_key(connection.headers.get("authorization"))
+    return session is not None and session_pins.pinned(session)
+
+
+def replica_stats() -> Dict[str, Any]:
+    return {**replica_set.stats(), "read_your_writes": session_pins.stats()}
+
+
+class ReadYourWritesMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    def _session_to_pin(self, scope: Scope) -> Optional[str]:
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            return None
+        if not replica_set.members or session_pins.window <= 0:
+            return None
+
+        headers = HTTPConnection(scope).headers
+        option = headers.get(READ_YOUR_WRITES_HEADER)
+        wanted = settings.read_your_writes_default if option is None else option.lower() == "true"
+        return session_key(headers.get("authorization")) if wanted else None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        session = self._session_to_pin(scope)
+        if session is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def pin_on_success(message: Message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                session_pins.pin(session)
+            await send(message)
+
+        await self.app(scope, receive, pin_on_success)
@@ -0,0 +1,43 @@
+from app.config import get_settings
+from app.repositories.base import (
+    AuthSession, Lease, RepositoryError, SweetNotFoundError, InsufficientStockError,
+    InvalidRequestError, UserExistsError, SweetExistsError,
+    SweetRepository, InventoryRepository, PurchaseRepository, UserRepository
+)
+from app.repositories.memory import (
+    memory_store, get_memory_sweet_repository, open_memory_catalog_repository, get_memory_inventory_repository,
+    open_memory_inventory_repository,
+    get_memory_purchase_repository, get_memory_user_repository, get_memory_purchase_lease
+)
+from app.repositories.supabase import (
+    get_supabase_sweet_repository, get_supabase_sweet_read_repository,
+    get_supabase_catalog_repository, open_supabase_catalog_repository,
+    get_supabase_inventory_repository, open_supabase_inventory_repository,
+    get_supabase_purchase_repository, get_supabase_purchase_read_repository,
+    get_supabase_user_repository, get_supabase_purchase_lease
+)
+
+settings = get_settings()
+
+if settings.storage_backend == "memory":
+    get_sweet_repository = get_memory_sweet_repository
+    get_sweet_read_repository = get_memory_sweet_repository
+    get_catalog_repository = get_memory_sweet_repository
+    open_catalog_repository = open_memory_catalog_repository
+    get_inventory_repository = get_memory_inventory_repository
+    open_inventory_repository = open_memory_inventory_repository
+    get_purchase_repository = get_memory_purchase_repository
+    get_purchase_read_repository = get_memory_purchase_repository
+    get_user_repository = get_memory_user_repository
+    get_purchase_lease = get_memory_purchase_lease
+else:
+    get_sweet_repository = get_supabase_sweet_repository
+    get_sweet_read_repository = get_supabase_sweet_read_repository
+    get_catalog_repository = get_supabase_catalog_repository
+    open_catalog_repository = open_supabase_catalog_repository
+    get_inventory_repository = get_supabase_inventory_repository
+    open_inventory_repository = open_supabase_inventory_repository
+    get_purchase_repository = get_supabase_purchase_repository
+    get_purchase_read_repository = get_supabase_purchase_read_repository
+    get_user_repository = get_supabase_user_repository
+    get_purchase_lease = get_supabase_purchase_lease
@@ -0,0 +1,188 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+Cursor = Tuple[str, str]
+
+
+class RepositoryError(Exception):
+    pass
+
+
+class SweetNotFoundError(RepositoryError):
+    def __init__(self, sweet_id: Optional[str] = None):
+        super().__init__("Sweet not found")
+        self.sweet_id = sweet_id
+
+
+class InsufficientStockError(RepositoryError):
+    def __init__(self, sweet_id: Optional[str], available: Any):
+        super().__init__("Not enough stock")
+        self.sweet_id = sweet_id
+        self.available = available
+
+
+class InvalidRequestError(RepositoryError):
+    pass
+
+
+class UserExistsError(RepositoryError):
+    pass
+
+
+class SweetExistsError(RepositoryError):
+    def __init__(self, name: str, category: str):
+        super().__init__("A sweet with this name and category already exists")
+        self.name = name
+        self.category = category
+
+
+@dataclass
+class AuthSession:
+    user_id: str
+    access_token: str
+
+
+class SweetRepository(ABC):
+    @abstractmethod
+    async def page(
+        self,
+        columns: Optional[List[str]],
+        cursor: Optional[Cursor],
+        limit: int,
+        name: Optional[str] = None,
+        category: Optional[str] = None,
+        min_price: Optional[Decimal] = None,
+        max_price: Optional[Decimal] = None,
+    ) -> Tuple[List[dict], Optional[str]]:
+        ...
+
+    @abstractmethod
+    async def ranked_search(
+        self,
+        name: str,
+        category: Optional[str],
+        min_price: Optional[Decimal],
+        max_price: Optional[Decimal],
+        limit: int,
+    ) -> List[dict]:
+        ...
+
+    @abstractmethod
+    async def fetch_all(self) -> List[dict]:
+        ...
+
+    @abstractmethod
+    async def create(self, sweet: Dict[str, Any]) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    async def update(self, sweet_id: str, changes: Dict[str, Any]) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    async def delete(self, sweet_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    async def upsert_many(self, sweets: List[Dict[str, Any]], returning: bool) -> List[dict]:
+        ...
+
+
+class InventoryRepository(ABC):
+    @abstractmethod
+    async def purchase(self, user_id: str, sweet_id: str, quantity: int) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    async def checkout(self, user_id: str, items: List[Dict[str, Any]]) -> List[dict]:
+        ...
+
+    @abstractmethod
+    async def restock(self, sweet_id: str, quantity: int) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    async def bulk_restock(self, items: List[Dict[str, Any]]) -> List[dict]:
+        ...
+
+    @abstractmethod
+    async def bulk_update_prices(self, items: List[Dict[str, Any]]) -> List[dict]:
+        ...
+
+    @abstractmethod
+    async def withdraw_stock(self, holder: str, sweet_id: str, quantity: int, minimum: int) -> int:
+        ...
+
+    @abstractmethod
+    async def return_stock(self, holder: str, items: List[Dict[str, Any]]) -> List[dict]:
+        ...
+
+    @abstractmethod
+    async def confirm_reserved(self, holder: str, user_id: str, items: List[Dict[str, Any]]) -> List[dict]:
+        ...
+
+    @abstractmethod
+    async def escrow(self, holder: str) -> Dict[str, int]:
+        ...
+
+    @abstractmethod
+    async def reclaim_escrow(self, holder: str, stale_seconds: float) -> List[dict]:
+        ...
+
+
+class PurchaseRepository(ABC):
+    @abstractmethod
+    async def export_page(
+        self,
+        filters: List[Tuple[str, str, str]],
+        cursor: Optional[Cursor],
+        limit: int,
+    ) -> Tuple[List[dict], Optional[Cursor]]:
+        ...
+
+    @abstractmethod
+    async def history_page(
+        self,
+        column: str,
+        value: str,
+        cursor: Optional[Cursor],
+        limit: int,
+        include_sweet: bool,
+    ) -> Tuple[List[dict], Optional[str]]:
+        ...
+
+    @abstractmethod
+    async def sales_summary(self, start: datetime, end: datetime, granularity: str, top: int) -> Dict[str, Any]:
+        ...
+
+
+class UserRepository(ABC):
+    @abstractmethod
+    async def sign_up(self, email: str, password: str, full_name: str) -> Optional[AuthSession]:
+        ...
+
+    @abstractmethod
+    async def sign_in(self, email: str, password: str) -> Optional[AuthSession]:
+        ...
+
+    @abstractmethod
+    async def get_user_id(self, token: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    async def get_profile(self, user_id: str) -> Optional[dict]:
+        ...
+
+
+class Lease:
+    def __init__(self, repository: Any, release: Optional[Callable[[], None]] = None):
+        self.repository = repository
+        self._release = release
+
+    def release(self):
+        release, self._release = self._release, None
+        if release is not None:
+            release()
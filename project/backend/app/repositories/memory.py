@@ -0,0 +1,563 @@
+import difflib
+import hashlib
+import hmac
+import os
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+import anyio
+from jose import jwt, JWTError
+from app.bulk_import import NATURAL_KEY
+from app.config import get_settings
+from app.pagination import split_page
+from app.repositories.base import (
+    AuthSession, Lease, SweetNotFoundError, InsufficientStockError, InvalidRequestError, UserExistsError, SweetExistsError,
+    SweetRepository, InventoryRepository, PurchaseRepository, UserRepository
+)
+
+settings = get_settings()
+
+PASSWORD_ITERATIONS = 100_000
+TOKEN_LIFETIME = timedelta(hours=1)
+RANKED_MIN_SIMILARITY = 0.6
+ESCROW_MAX_SHARE = 4
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _timestamp(value: str) -> datetime:
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment
+
+
+def _money(value: Any) -> Decimal:
+    return Decimal(str(value))
+
+
+def _hash_password(password: str, salt: bytes) -> bytes:
+    return hashlib.pbkdf2_hmac("sha256", password.encode(), salt, PASSWORD_ITERATIONS)
+
+
+def _keyset(rows: List[dict], sort_column: str, cursor: Optional[Tuple[str, str]], limit: int) -> List[dict]:
+    ordered = sorted(rows, key=lambda row: (-_timestamp(row[sort_column]).timestamp(), row["id"]))
+    if cursor:
+        after = (-_timestamp(cursor[0]).timestamp(), cursor[1])
+        ordered = [row for row in ordered if (-_timestamp(row[sort_column]).timestamp(), row["id"]) > after]
+    return [dict(row) for row in ordered[:limit + 1]]
+
+
+def _similarity(query: str, text: str) -> float:
+    query, text = query.lower(), text.lower()
+    if not query or not text:
+        return 0.0
+    if query in text:
+        return 1.0
+    return max(
+        difflib.SequenceMatcher(None, query, word).ratio()
+        for word in text.split() or [text]
+    )
+
+
+class MemoryStore:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.sweets: Dict[str, dict] = {}
+            self.purchases: List[dict] = []
+            self.users: Dict[str, dict] = {}
+            self.profiles: Dict[str, dict] = {}
+            self.escrow: Dict[Tuple[str, str], dict] = {}
+
+
+memory_store = MemoryStore()
+
+
+class MemorySweetRepository(SweetRepository):
+    def __init__(self, store: MemoryStore):
+        self.store = store
+
+    def _matching(self, name=None, category=None, min_price=None, max_price=None) -> List[dict]:
+        needle = name.lower() if name else None
+        return [
+            row for row in self.store.sweets.values()
+            if (needle is None or needle in row["name"].lower())
+            and (not category or row["category"] == category)
+            and (min_price is None or _money(row["price"]) >= min_price)
+            and (max_price is None or _money(row["price"]) <= max_price)
+        ]
+
+    async def page(self, columns, cursor, limit, name=None, category=None, min_price=None, max_price=None):
+        with self.store.lock:
+            rows = _keyset(self._matching(name, category, min_price, max_price), "created_at", cursor, limit)
+        return split_page(rows, "created_at", limit)
+
+    async def ranked_search(self, name, category, min_price, max_price, limit):
+        with self.store.lock:
+            scored = []
+            for row in self._matching(None, category, min_price, max_price):
+                name_score = _similarity(name, row["name"])
+                description_score = _similarity(name, row.get("description") or "")
+                if max(name_score, description_score) >= RANKED_MIN_SIMILARITY:
+                    score = max(name_score, 0.5 * description_score)
+                    scored.append((-score, row["name"], row["id"], dict(row)))
+        return [row for *_, row in sorted(scored)[:limit]]
+
+    async def fetch_all(self):
+        with self.store.lock:
+            return [dict(row) for row in self.store.sweets.values()]
+
+    def _insert(self, sweet: Dict[str, Any]) -> dict:
+        now = _now()
+        row = {
+            "description": "",
+            "image_url": "",
+            **sweet,
+            "id": str(uuid.uuid4()),
+            "created_at": now,
+            "updated_at": now,
+        }
+        self.store.sweets[row["id"]] = row
+        return row
+
+    def _check_natural_key(self, sweet: Dict[str, Any], sweet_id: Optional[str] = None):
+        key = tuple(sweet[field] for field in NATURAL_KEY)
+        for row in self.store.sweets.values():
+            if row["id"] != sweet_id and tuple(row[field] for field in NATURAL_KEY) == key:
+                raise SweetExistsError(*key)
+
+    async def create(self, sweet):
+        with self.store.lock:
+            self._check_natural_key(sweet)
+            return dict(self._insert(sweet))
+
+    async def update(self, sweet_id, changes):
+        with self.store.lock:
+            row = self.store.sweets.get(sweet_id)
+            if row is None:
+                return None
+            self._check_natural_key({**row, **changes}, sweet_id)
+            row.update(changes, updated_at=_now())
+            return dict(row)
+
+    async def delete(self, sweet_id):
+        with self.store.lock:
+            for key in [key for key in self.store.escrow if key[1] == sweet_id]:
+                del self.store.escrow[key]
+            return self.store.sweets.pop(sweet_id, None) is not None
+
+    async def upsert_many(self, sweets, returning):
+        with self.store.lock:
+            by_key = {tuple(row[field] for field in NATURAL_KEY): row for row in self.store.sweets.values()}
+            rows = []
+            for sweet in sweets:
+                row = by_key.get(tuple(sweet[field] for field in NATURAL_KEY))
+                if row is None:
+                    row = self._insert(sweet)
+                else:
+                    row.update(sweet, updated_at=_now())
+                rows.append(dict(row))
+        return rows if returning else []
+
+
+class MemoryInventoryRepository(InventoryRepository):
+    def __init__(self, store: MemoryStore):
+        self.store = store
+
+    def _record_purchase(self, user_id: str, sweet: dict, quantity: int) -> dict:
+        sweet["quantity"] -= quantity
+        sweet["updated_at"] = _now()
+        return self._insert_purchase(user_id, sweet, quantity)
+
+    def _insert_purchase(self, user_id: str, sweet: dict, quantity: int) -> dict:
+        purchase = {
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "sweet_id": sweet["id"],
+            "quantity": quantity,
+            "total_price": float(_money(sweet["price"]) * quantity),
+            "purchased_at": _now(),
+        }
+        self.store.purchases.append(purchase)
+        return dict(purchase)
+
+    async def purchase(self, user_id, sweet_id, quantity):
+        with self.store.lock:
+            sweet = self.store.sweets.get(sweet_id)
+            if sweet is None:
+                raise SweetNotFoundError(sweet_id)
+            if sweet["quantity"] < quantity:
+                raise InsufficientStockError(sweet_id, sweet["quantity"])
+            return self._record_purchase(user_id, sweet, quantity)
+
+    async def checkout(self, user_id, items):
+        wanted: Dict[str, int] = defaultdict(int)
+        for item in items:
+            wanted[item["sweet_id"]] += item["quantity"]
+
+        with self.store.lock:
+            for sweet_id in sorted(wanted):
+                sweet = self.store.sweets.get(sweet_id)
+                if sweet is None:
+                    raise SweetNotFoundError(sweet_id)
+                if sweet["quantity"] < wanted[sweet_id]:
+                    raise InsufficientStockError(sweet_id, sweet["quantity"])
+
+            return [
+                self._record_purchase(user_id, self.store.sweets[sweet_id], wanted[sweet_id])
+                for sweet_id in sorted(wanted)
+            ]
+
+    async def restock(self, sweet_id, quantity):
+        rows = await self.bulk_restock([{"sweet_id": sweet_id, "quantity_delta": quantity}])
+        return rows[0] if rows else None
+
+    async def bulk_restock(self, items):
+        if not items:
+            raise InvalidRequestError("Batch has no items")
+
+        deltas: Dict[str, int] = defaultdict(int)
+        for item in items:
+            deltas[item["sweet_id"]] += item["quantity_delta"]
+
+        if any(delta == 0 for delta in deltas.values()):
+            raise InvalidRequestError("Quantity delta must be non-zero")
+
+        with self.store.lock:
+            for sweet_id in sorted(deltas):
+                if sweet_id not in self.store.sweets:
+                    raise SweetNotFoundError(sweet_id)
+            for sweet_id in sorted(deltas):
+                available = self.store.sweets[sweet_id]["quantity"]
+                if available + deltas[sweet_id] < 0:
+                    raise InsufficientStockError(sweet_id, available)
+
+            rows = []
+            for sweet_id in sorted(deltas):
+                sweet = self.store.sweets[sweet_id]
+                sweet["quantity"] += deltas[sweet_id]
+                sweet["updated_at"] = _now()
+                rows.append(dict(sweet))
+            return rows
+
+    async def bulk_update_prices(self, items):
+        if not items:
+            raise InvalidRequestError("Batch has no items")
+
+        prices = {item["sweet_id"]: _money(item["price"]) for item in items}
+        if len(prices) != len(items):
+            raise InvalidRequestError("Each sweet may appear only once")
+        if any(price < 0 for price in prices.values()):
+            raise InvalidRequestError("Price must be zero or greater")
+
+        with self.store.lock:
+            for sweet_id in sorted(prices):
+                if sweet_id not in self.store.sweets:
+                    raise SweetNotFoundError(sweet_id)
+
+            rows = []
+            for sweet_id in sorted(prices):
+                sweet = self.store.sweets[sweet_id]
+                sweet["price"] = float(prices[sweet_id])
+                sweet["updated_at"] = _now()
+                rows.append(dict(sweet))
+            return rows
+
+    def _escrow_entry(self, holder: str, sweet_id: str) -> dict:
+        entry = self.store.escrow.setdefault((holder, sweet_id), {"quantity": 0})
+        entry["updated_at"] = time.time()
+        return entry
+
+    def _check_escrow(self, holder: str, wanted: Dict[str, int], missing_ok: bool):
+        for sweet_id in sorted(wanted):
+            entry = self.store.escrow.get((holder, sweet_id))
+            if entry is None and missing_ok:
+                continue
+            if entry is None or entry["quantity"] < wanted[sweet_id]:
+                raise InvalidRequestError(f"Escrow balance too low for sweet {sweet_id}")
+
+    async def withdraw_stock(self, holder, sweet_id, quantity, minimum):
+        if minimum <= 0 or quantity < minimum:
+            raise InvalidRequestError("Quantity must be at least the minimum and greater than zero")
+
+        with self.store.lock:
+            sweet = self.store.sweets.get(sweet_id)
+            if sweet is None:
+                raise SweetNotFoundError(sweet_id)
+            if sweet["quantity"] < minimum:
+                raise InsufficientStockError(sweet_id, sweet["quantity"])
+
+            taken = minimum + min(quantity - minimum, (sweet["quantity"] - minimum) // ESCROW_MAX_SHARE)
+            sweet["quantity"] -= taken
+            sweet["updated_at"] = _now()
+            self._escrow_entry(holder, sweet_id)["quantity"] += taken
+            return taken
+
+    async def return_stock(self, holder, items):
+        wanted: Dict[str, int] = defaultdict(int)
+        for item in items:
+            wanted[item["sweet_id"]] += item["quantity"]
+
+        with self.store.lock:
+            self._check_escrow(holder, wanted, missing_ok=True)
+
+            rows = []
+            for sweet_id in sorted(wanted):
+                sweet = self.store.sweets.get(sweet_id)
+                if sweet is None or (holder, sweet_id) not in self.store.escrow:
+                    continue
+                entry = self._escrow_entry(holder, sweet_id)
+                entry["quantity"] -= wanted[sweet_id]
+                if entry["quantity"] == 0:
+                    del self.store.escrow[(holder, sweet_id)]
+                sweet["quantity"] += wanted[sweet_id]
+                sweet["updated_at"] = _now()
+                rows.append(dict(sweet))
+            return rows
+
+    async def confirm_reserved(self, holder, user_id, items):
+        wanted: Dict[str, int] = defaultdict(int)
+        for item in items:
+            wanted[item["sweet_id"]] += item["quantity"]
+
+        with self.store.lock:
+            for sweet_id in sorted(wanted):
+                if sweet_id not in self.store.sweets:
+                    raise SweetNotFoundError(sweet_id)
+            self._check_escrow(holder, wanted, missing_ok=False)
+
+            for sweet_id in sorted(wanted):
+                entry = self._escrow_entry(holder, sweet_id)
+                entry["quantity"] -= wanted[sweet_id]
+                if entry["quantity"] == 0:
+                    del self.store.escrow[(holder, sweet_id)]
+
+            return [
+                self._insert_purchase(user_id, self.store.sweets[item["sweet_id"]], item["quantity"])
+                for item in items
+            ]
+
+    async def escrow(self, holder):
+        with self.store.lock:
+            return {
+                sweet_id: entry["quantity"]
+                for (owner, sweet_id), entry in self.store.escrow.items()
+                if owner == holder and entry["quantity"] > 0
+            }
+
+    async def reclaim_escrow(self, holder, stale_seconds):
+        now = time.time()
+        with self.store.lock:
+            reclaimed: Dict[str, int] = defaultdict(int)
+            for (owner, sweet_id), entry in list(self.store.escrow.items()):
+                if owner == holder:
+                    entry["updated_at"] = now
+                elif entry["updated_at"] < now - stale_seconds:
+                    del self.store.escrow[(owner, sweet_id)]
+                    if entry["quantity"] > 0 and sweet_id in self.store.sweets:
+                        reclaimed[sweet_id] += entry["quantity"]
+
+            for sweet_id, quantity in reclaimed.items():
+                sweet = self.store.sweets[sweet_id]
+                sweet["quantity"] += quantity
+                sweet["updated_at"] = _now()
+            return [{"sweet_id": sweet_id, "quantity": quantity} for sweet_id, quantity in sorted(reclaimed.items())]
+
+
+class MemoryPurchaseRepository(PurchaseRepository):
+    def __init__(self, store: MemoryStore):
+        self.store = store
+
+    @staticmethod
+    def _matches(row: dict, column: str, operator: str, value: str) -> bool:
+        if column == "purchased_at":
+            left, right = _timestamp(row[column]), _timestamp(value)
+        else:
+            left, right = row[column], value
+
+        if operator == "gte":
+            return left >= right
+        if operator == "lt":
+            return left < right
+        return left == right
+
+    async def export_page(self, filters, cursor, limit):
+        with self.store.lock:
+            rows = [
+                row for row in self.store.purchases
+                if all(self._matches(row, column, operator, value) for column, operator, value in filters)
+            ]
+            rows = _keyset(rows, "purchased_at", cursor, limit)
+
+        rows, next_cursor = split_page(rows, "purchased_at", limit)
+        return rows, (rows[-1]["purchased_at"], rows[-1]["id"]) if next_cursor else None
+
+    async def history_page(self, column, value, cursor, limit, include_sweet):
+        with self.store.lock:
+            rows = _keyset([row for row in self.store.purchases if row[column] == value], "purchased_at", cursor, limit)
+            if include_sweet:
+                for row in rows:
+                    sweet = self.store.sweets.get(row["sweet_id"])
+                    row["sweet"] = {"name": sweet["name"], "price": sweet["price"]} if sweet else None
+        return split_page(rows, "purchased_at", limit)
+
+    async def sales_summary(self, start, end, granularity, top):
+        if granularity == "hour":
+            first = start.replace(minute=0, second=0, microsecond=0)
+        else:
+            first = start.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        with self.store.lock:
+            purchases = [
+                row for row in self.store.purchases
+                if first <= _timestamp(row["purchased_at"]) < end
+            ]
+            sweets = {sweet_id: dict(row) for sweet_id, row in self.store.sweets.items()}
+
+        by_sweet: Dict[str, dict] = {}
+        timeline: Dict[datetime, dict] = {}
+        for row in purchases:
+            moment = _timestamp(row["purchased_at"]).astimezone(timezone.utc)
+            if granularity == "hour":
+                bucket = moment.replace(minute=0, second=0, microsecond=0, tzinfo=None)
+            else:
+                bucket = moment.replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+            sweet = sweets.get(row["sweet_id"], {})
+            revenue = _money(row["total_price"])
+
+            totals = by_sweet.setdefault(row["sweet_id"], {
+                "sweet_id": row["sweet_id"],
+                "name": sweet.get("name"),
+                "category": sweet.get("category", ""),
+                "units": 0,
+                "revenue": Decimal("0"),
+            })
+            totals["units"] += row["quantity"]
+            totals["revenue"] += revenue
+
+            point = timeline.setdefault(bucket, {"bucket": bucket.isoformat(), "units": 0, "revenue": Decimal("0")})
+            point["units"] += row["quantity"]
+            point["revenue"] += revenue
+
+        sweet_rows = [row for row in by_sweet.values() if row["units"]]
+        categories: Dict[str, dict] = {}
+        for row in sweet_rows:
+            totals = categories.setdefault(row["category"], {"category": row["category"], "units": 0, "revenue": Decimal("0")})
+            totals["units"] += row["units"]
+            totals["revenue"] += row["revenue"]
+
+        return {
+            "units": sum(row["units"] for row in sweet_rows),
+            "revenue": sum((row["revenue"] for row in sweet_rows), Decimal("0")),
+            "by_sweet": sorted(sweet_rows, key=lambda row: (-row["revenue"], row["sweet_id"])),
+            "by_category": sorted(categories.values(), key=lambda row: (-row["revenue"], row["category"])),
+            "timeline": [timeline[bucket] for bucket in sorted(timeline)],
+            "top_sellers": sorted(sweet_rows, key=lambda row: (-row["units"], -row["revenue"], row["sweet_id"]))[:top],
+        }
+
+
+class MemoryUserRepository(UserRepository):
+    def __init__(self, store: MemoryStore):
+        self.store = store
+
+    @staticmethod
+    def _session(user_id: str) -> AuthSession:
+        now = datetime.now(timezone.utc)
+        token = jwt.encode(
+            {"sub": user_id, "aud": settings.jwt_audience, "iat": now, "exp": now + TOKEN_LIFETIME},
+            settings.jwt_secret_key,
+            algorithm=settings.jwt_algorithms[0]
+        )
+        return AuthSession(user_id=user_id, access_token=token)
+
+    async def sign_up(self, email, password, full_name):
+        email = email.lower()
+        salt = os.urandom(16)
+        password_hash = await anyio.to_thread.run_sync(_hash_password, password, salt)
+
+        with self.store.lock:
+            if email in self.store.users:
+                raise UserExistsError(email)
+
+            user_id = str(uuid.uuid4())
+            self.store.users[email] = {"id": user_id, "salt": salt, "password_hash": password_hash}
+            self.store.profiles[user_id] = {
+                "id": user_id,
+                "email": email,
+                "full_name": full_name,
+                "role": "admin" if email in settings.memory_admin_emails else "user",
+                "created_at": _now(),
+            }
+        return self._session(user_id)
+
+    async def sign_in(self, email, password):
+        with self.store.lock:
+            user = self.store.users.get(email.lower())
+
+        if user is None:
+            return None
+
+        password_hash = await anyio.to_thread.run_sync(_hash_password, password, user["salt"])
+        if not hmac.compare_digest(password_hash, user["password_hash"]):
+            return None
+        return self._session(user["id"])
+
+    async def get_user_id(self, token):
+        try:
+            claims = jwt.decode(
+                token,
+                settings.jwt_secret_key,
+                algorithms=settings.jwt_algorithms,
+                audience=settings.jwt_audience
+            )
+        except JWTError:
+            return None
+        return claims.get("sub")
+
+    async def get_profile(self, user_id):
+        with self.store.lock:
+            profile = self.store.profiles.get(user_id)
+            return dict(profile) if profile else None
+
+
+def get_memory_sweet_repository() -> SweetRepository:
+    return MemorySweetRepository(memory_store)
+
+
+@asynccontextmanager
+async def open_memory_catalog_repository() -> AsyncIterator[SweetRepository]:
+    yield MemorySweetRepository(memory_store)
+
+
+def get_memory_inventory_repository() -> InventoryRepository:
+    return MemoryInventoryRepository(memory_store)
+
+
+@asynccontextmanager
+async def open_memory_inventory_repository() -> AsyncIterator[InventoryRepository]:
+    yield MemoryInventoryRepository(memory_store)
+
+
+def get_memory_purchase_repository() -> PurchaseRepository:
+    return MemoryPurchaseRepository(memory_store)
+
+
+def get_memory_user_repository() -> UserRepository:
+    return MemoryUserRepository(memory_store)
+
+
+def get_memory_purchase_lease() -> Callable[[], Awaitable[Lease]]:
+    async def open_lease() -> Lease:
+        return Lease(MemoryPurchaseRepository(memory_store))
+    return open_lease
@@ -0,0 +1,334 @@
+import json
+from contextlib import asynccontextmanager
+from datetime import datetime
+from decimal import Decimal
+from functools import partial
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from fastapi import Depends
+from postgrest import APIError
+from postgrest.types import ReturnMethod
+from supabase import Client
+from app.bulk_import import NATURAL_KEY
+from app.database import (
+    SupabasePool, acquire_client, execute, run_upstream,
+    get_supabase_client, get_supabase_admin_client, get_supabase_admin_pool,
+    get_supabase_read_client, get_supabase_admin_read_client,
+    SWEET_NOT_FOUND, INSUFFICIENT_STOCK, INVALID_PARAMETER, UNIQUE_VIOLATION
+)
+from app.pagination import apply_keyset, split_page
+from app.repositories.base import (
+    AuthSession, Cursor, Lease, RepositoryError, SweetNotFoundError, InsufficientStockError,
+    InvalidRequestError, UserExistsError, SweetExistsError,
+    SweetRepository, InventoryRepository, PurchaseRepository, UserRepository
+)
+
+PAGE_KEY_FIELDS = ["created_at", "id"]
+PURCHASE_FIELDS = ["id", "user_id", "sweet_id", "quantity", "total_price", "purchased_at"]
+PURCHASE_SWEET_EMBED = "sweet:sweets(name,price)"
+FETCH_BATCH_SIZE = 1000
+
+
+def _select_clause(columns: Optional[List[str]]) -> str:
+    if columns is None:
+        return "*"
+    return ",".join(dict.fromkeys([*columns, *PAGE_KEY_FIELDS]))
+
+
+def _price(value: Optional[Decimal]) -> Optional[float]:
+    return float(value) if value is not None else None
+
+
+def _repository_error(e: APIError, sweet_id: Optional[str] = None) -> RepositoryError:
+    if e.code == SWEET_NOT_FOUND:
+        return SweetNotFoundError(e.details or sweet_id)
+    if e.code == INSUFFICIENT_STOCK:
+        try:
+            line = json.loads(e.details)
+        except (TypeError, ValueError):
+            line = e.details
+        if isinstance(line, dict):
+            return InsufficientStockError(line["sweet_id"], line["available"])
+        return InsufficientStockError(sweet_id, e.details)
+    if e.code == INVALID_PARAMETER:
+        return InvalidRequestError(e.message)
+    return RepositoryError(e.message)
+
+
+async def _rpc(client: Client, function: str, params: Dict[str, Any], sweet_id: Optional[str] = None) -> Any:
+    try:
+        response = await execute(client.rpc(function, params))
+    except APIError as e:
+        raise _repository_error(e, sweet_id)
+    return response.data
+
+
+class SupabaseSweetRepository(SweetRepository):
+    def __init__(self, client: Client):
+        self.client = client
+
+    async def page(self, columns, cursor, limit, name=None, category=None, min_price=None, max_price=None):
+        query = self.client.table("sweets").select(_select_clause(columns))
+
+        if name:
+            query = query.ilike("name", f"%{name}%")
+
+        if category:
+            query = query.eq("category", category)
+
+        if min_price is not None:
+            query = query.gte("price", float(min_price))
+
+        if max_price is not None:
+            query = query.lte("price", float(max_price))
+
+        result = await execute(apply_keyset(query, "created_at", cursor, limit))
+        return split_page(result.data, "created_at", limit)
+
+    async def ranked_search(self, name, category, min_price, max_price, limit):
+        rows = await _rpc(self.client, "search_sweets_ranked", {
+            "p_query": name,
+            "p_category": category,
+            "p_min_price": _price(min_price),
+            "p_max_price": _price(max_price),
+            "p_limit": limit
+        })
+        return rows or []
+
+    async def fetch_all(self) -> List[dict]:
+        rows: List[dict] = []
+        cursor = None
+
+        while True:
+            query = self.client.table("sweets").select("*")
+            result = await execute(apply_keyset(query, "created_at", cursor, FETCH_BATCH_SIZE))
+            page, next_cursor = split_page(result.data, "created_at", FETCH_BATCH_SIZE)
+            rows.extend(page)
+
+            if not next_cursor:
+                return rows
+            cursor = (page[-1]["created_at"], page[-1]["id"])
+
+    async def _write(self, query, sweet: Dict[str, Any]) -> Optional[dict]:
+        try:
+            response = await execute(query)
+        except APIError as e:
+            if e.code == UNIQUE_VIOLATION:
+                raise SweetExistsError(sweet.get("name"), sweet.get("category"))
+            raise
+        return response.data[0] if response.data else None
+
+    async def create(self, sweet):
+        return await self._write(self.client.table("sweets").insert(sweet), sweet)
+
+    async def update(self, sweet_id, changes):
+        return await self._write(self.client.table("sweets").update(changes).eq("id", sweet_id), changes)
+
+    async def delete(self, sweet_id):
+        response = await execute(self.client.table("sweets").delete().eq("id", sweet_id))
+        return bool(response.data)
+
+    async def upsert_many(self, sweets, returning):
+        try:
+            response = await execute(self.client.table("sweets").upsert(
+                sweets,
+                on_conflict=",".join(NATURAL_KEY),
+                returning=ReturnMethod.representation if returning else ReturnMethod.minimal
+            ))
+        except APIError as e:
+            raise RepositoryError(e.message)
+        return response.data or []
+
+
+class SupabaseInventoryRepository(InventoryRepository):
+    def __init__(self, client: Client):
+        self.client = client
+
+    async def purchase(self, user_id, sweet_id, quantity):
+        purchase = await _rpc(self.client, "purchase_sweet", {
+            "p_user_id": user_id,
+            "p_sweet_id": sweet_id,
+            "p_quantity": quantity
+        }, sweet_id)
+
+        if isinstance(purchase, list):
+            purchase = purchase[0] if purchase else None
+        return purchase
+
+    async def checkout(self, user_id, items):
+        rows = await _rpc(self.client, "checkout_order", {
+            "p_user_id": user_id,
+            "p_items": items
+        })
+        return rows or []
+
+    async def restock(self, sweet_id, quantity):
+        rows = await self.bulk_restock([{"sweet_id": sweet_id, "quantity_delta": quantity}])
+        return rows[0] if rows else None
+
+    async def bulk_restock(self, items):
+        return await _rpc(self.client, "bulk_restock", {"p_items": items}) or []
+
+    async def bulk_update_prices(self, items):
+        return await _rpc(self.client, "bulk_update_prices", {"p_items": items}) or []
+
+    async def withdraw_stock(self, holder, sweet_id, quantity, minimum):
+        return await _rpc(self.client, "withdraw_stock", {
+            "p_holder": holder,
+            "p_sweet_id": sweet_id,
+            "p_quantity": quantity,
+            "p_minimum": minimum
+        }, sweet_id)
+
+    async def return_stock(self, holder, items):
+        return await _rpc(self.client, "return_stock", {"p_holder": holder, "p_items": items}) or []
+
+    async def confirm_reserved(self, holder, user_id, items):
+        return await _rpc(self.client, "confirm_reserved_order", {
+            "p_holder": holder,
+            "p_user_id": user_id,
+            "p_items": items
+        }) or []
+
+    async def escrow(self, holder):
+        result = await execute(
+            self.client.table("stock_escrow").select("sweet_id,quantity").eq("holder", holder).gt("quantity", 0)
+        )
+        return {row["sweet_id"]: row["quantity"] for row in result.data}
+
+    async def reclaim_escrow(self, holder, stale_seconds):
+        return await _rpc(self.client, "reclaim_stale_escrow", {
+            "p_holder": holder,
+            "p_stale_seconds": stale_seconds
+        }) or []
+
+
+class SupabasePurchaseRepository(PurchaseRepository):
+    def __init__(self, client: Client):
+        self.client = client
+
+    async def export_page(self, filters, cursor, limit) -> Tuple[List[dict], Optional[Cursor]]:
+        query = self.client.table("purchases").select(",".join(PURCHASE_FIELDS))
+        for column, operator, value in filters:
+            query = getattr(query, operator)(column, value)
+
+        result = await execute(apply_keyset(query, "purchased_at", cursor, limit))
+        rows, next_cursor = split_page(result.data, "purchased_at", limit)
+        return rows, (rows[-1]["purchased_at"], rows[-1]["id"]) if next_cursor else None
+
+    async def history_page(self, column, value, cursor, limit, include_sweet):
+        fields = [*PURCHASE_FIELDS, PURCHASE_SWEET_EMBED] if include_sweet else PURCHASE_FIELDS
+        query = self.client.table("purchases").select(",".join(fields)).eq(column, value)
+        result = await execute(apply_keyset(query, "purchased_at", cursor, limit))
+        return split_page(result.data, "purchased_at", limit)
+
+    async def sales_summary(self, start: datetime, end: datetime, granularity: str, top: int):
+        return await _rpc(self.client, "sales_summary", {
+            "p_from": start.isoformat(),
+            "p_to": end.isoformat(),
+            "p_granularity": granularity,
+            "p_top": top
+        })
+
+
+class SupabaseUserRepository(UserRepository):
+    def __init__(self, client: Client):
+        self.client = client
+
+    async def sign_up(self, email, password, full_name):
+        try:
+            response = await run_upstream(self.client.auth.sign_up, {
+                "email": email,
+                "password": password,
+                "options": {
+                    "data": {
+                        "full_name": full_name
+                    }
+                }
+            })
+        except Exception as e:
+            if "already registered" in str(e).lower() or "already exists" in str(e).lower():
+                raise UserExistsError(str(e))
+            raise
+
+        if not response.user or not response.session:
+            return None
+        return AuthSession(user_id=response.user.id, access_token=response.session.access_token)
+
+    async def sign_in(self, email, password):
+        response = await run_upstream(self.client.auth.sign_in_with_password, {
+            "email": email,
+            "password": password
+        })
+
+        if not response.user or not response.session:
+            return None
+        return AuthSession(user_id=response.user.id, access_token=response.session.access_token)
+
+    async def get_user_id(self, token):
+        response = await run_upstream(self.client.auth.get_user, token)
+        if not response or not response.user:
+            return None
+        return response.user.id
+
+    async def get_profile(self, user_id):
+        response = await execute(
+            self.client.table("profiles").select("*").eq("id", user_id).maybe_single()
+        )
+        return response.data if response else None
+
+
+def get_supabase_sweet_repository(supabase: Client = Depends(get_supabase_client)) -> SweetRepository:
+    return SupabaseSweetRepository(supabase)
+
+
+def get_supabase_sweet_read_repository(supabase: Client = Depends(get_supabase_read_client)) -> SweetRepository:
+    return SupabaseSweetRepository(supabase)
+
+
+def get_supabase_catalog_repository(supabase_admin: Client = Depends(get_supabase_admin_client)) -> SweetRepository:
+    return SupabaseSweetRepository(supabase_admin)
+
+
+@asynccontextmanager
+async def open_supabase_catalog_repository() -> AsyncIterator[SweetRepository]:
+    pool = get_supabase_admin_pool()
+    client = await acquire_client(pool)
+    try:
+        yield SupabaseSweetRepository(client)
+    finally:
+        pool.release(client)
+
+
+def get_supabase_inventory_repository(supabase_admin: Client = Depends(get_supabase_admin_client)) -> InventoryRepository:
+    return SupabaseInventoryRepository(supabase_admin)
+
+
+@asynccontextmanager
+async def open_supabase_inventory_repository() -> AsyncIterator[InventoryRepository]:
+    pool = get_supabase_admin_pool()
+    client = await acquire_client(pool)
+    try:
+        yield SupabaseInventoryRepository(client)
+    finally:
+        pool.release(client)
+
+
+def get_supabase_purchase_repository(supabase_admin: Client = Depends(get_supabase_admin_client)) -> PurchaseRepository:
+    return SupabasePurchaseRepository(supabase_admin)
+
+
+def get_supabase_purchase_read_repository(
+    supabase_admin: Client = Depends(get_supabase_admin_read_client)
+) -> PurchaseRepository:
+    return SupabasePurchaseRepository(supabase_admin)
+
+
+def get_supabase_user_repository(supabase: Client = Depends(get_supabase_client)) -> UserRepository:
+    return SupabaseUserRepository(supabase)
+
+
+def get_supabase_purchase_lease(pool: SupabasePool = Depends(get_supabase_admin_pool)) -> Callable[[], Awaitable[Lease]]:
+    async def open_lease() -> Lease:
+        client = await acquire_client(pool)
+        return Lease(SupabasePurchaseRepository(client), partial(pool.release, client))
+    return open_lease
@@ -0,0 +1,280 @@
+import asyncio
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import anyio
+from app.catalog_cache import catalog_cache
+from app.catalog_index import catalog_index
+from app.config import get_settings
+from app.stock_stream import stock_stream
+from app.repositories import InsufficientStockError, InventoryRepository, open_inventory_repository
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+WITHDRAW_ATTEMPTS = 3
+
+
+class ReservationNotFoundError(Exception):
+    def __init__(self, reservation_id: str):
+        super().__init__("Reservation not found or expired")
+        self.reservation_id = reservation_id
+
+
+@dataclass
+class Hold:
+    id: str
+    user_id: str
+    sweet_id: str
+    quantity: int
+    expires_at: float
+
+    def as_response(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "sweet_id": self.sweet_id,
+            "quantity": self.quantity,
+            "expires_at": datetime.fromtimestamp(self.expires_at, timezone.utc),
+        }
+
+
+def _stock_changed(sweet_id: str, delta: int):
+    catalog_cache.bump()
+    catalog_index.adjust_quantity(sweet_id, delta)
+    stock_stream.adjust_quantity(sweet_id, delta)
+
+
+class ReservationLedger:
+    def __init__(self, holder: str, batch_size: int, clock: Callable[[], float] = time.time):
+        self.holder = holder
+        self.batch_size = batch_size
+        self._clock = clock
+        self.pools: Dict[str, int] = defaultdict(int)
+        self.holds: Dict[str, Hold] = {}
+        self.last_reserved: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.counters = dict.fromkeys(("reserved", "confirmed", "released", "expired", "withdrawals", "returns"), 0)
+
+    def _take(self, user_id: str, sweet_id: str, quantity: int, ttl: float) -> Optional[Hold]:
+        with self._lock:
+            now = self._clock()
+            self.last_reserved[sweet_id] = now
+            if self.pools[sweet_id] < quantity:
+                return None
+            self.pools[sweet_id] -= quantity
+            hold = Hold(str(uuid.uuid4()), user_id, sweet_id, quantity, now + ttl)
+            self.holds[hold.id] = hold
+            self.counters["reserved"] += 1
+            return hold
+
+    def _pooled(self, sweet_id: str) -> int:
+        with self._lock:
+            return self.pools[sweet_id]
+
+    def _refill(self, sweet_id: str, quantity: int):
+        with self._lock:
+            self.pools[sweet_id] += quantity
+
+    async def reserve(
+        self, inventory: InventoryRepository, user_id: str, sweet_id: str, quantity: int, ttl: float
+    ) -> Hold:
+        for _ in range(WITHDRAW_ATTEMPTS):
+            hold = self._take(user_id, sweet_id, quantity, ttl)
+            if hold is not None:
+                return hold
+
+            pooled = self._pooled(sweet_id)
+            shortfall = quantity - pooled
+            try:
+                with anyio.CancelScope(shield=True):
+                    withdrawn = await inventory.withdraw_stock(
+                        self.holder, sweet_id, max(shortfall, self.batch_size), shortfall
+                    )
+                    self._refill(sweet_id, withdrawn)
+            except InsufficientStockError as e:
+                raise InsufficientStockError(sweet_id, (e.available or 0) + pooled)
+
+            with self._lock:
+                self.counters["withdrawals"] += 1
+            _stock_changed(sweet_id, -withdrawn)
+
+        raise InsufficientStockError(sweet_id, self._pooled(sweet_id))
+
+    def _claim(self, user_id: str, reservation_ids: List[str]) -> List[Hold]:
+        with self._lock:
+            now = self._clock()
+            holds = []
+            for reservation_id in dict.fromkeys(reservation_ids):
+                hold = self.holds.get(reservation_id)
+                if hold is None or hold.user_id != user_id or hold.expires_at <= now:
+                    raise ReservationNotFoundError(reservation_id)
+                holds.append(hold)
+            for hold in holds:
+                del self.holds[hold.id]
+            return holds
+
+    def _restore(self, holds: List[Hold]):
+        with self._lock:
+            now = self._clock()
+            for hold in holds:
+                if hold.expires_at > now:
+                    self.holds[hold.id] = hold
+                else:
+                    self.pools[hold.sweet_id] += hold.quantity
+                    self.counters["expired"] += 1
+
+    async def confirm(self, inventory: InventoryRepository, user_id: str, reservation_ids: List[str]) -> List[dict]:
+        holds = self._claim(user_id, reservation_ids)
+        items = [{"sweet_id": hold.sweet_id, "quantity": hold.quantity} for hold in holds]
+        try:
+            with anyio.CancelScope(shield=True):
+                purchases = await inventory.confirm_reserved(self.holder, user_id, items)
+        except Exception:
+            self._restore(holds)
+            raise
+
+        with self._lock:
+            self.counters["confirmed"] += len(holds)
+        return purchases
+
+    def release(self, user_id: str, reservation_id: str):
+        hold = self._claim(user_id, [reservation_id])[0]
+        with self._lock:
+            self.pools[hold.sweet_id] += hold.quantity
+            self.counters["released"] += 1
+
+    def expire(self) -> int:
+        with self._lock:
+            now = self._clock()
+            expired = [hold for hold in self.holds.values() if hold.expires_at <= now]
+            for hold in expired:
+                del self.holds[hold.id]
+                self.pools[hold.sweet_id] += hold.quantity
+            self.counters["expired"] += len(expired)
+            return len(expired)
+
+    def drain(self):
+        with self._lock:
+            for hold in self.holds.values():
+                self.pools[hold.sweet_id] += hold.quantity
+            self.holds.clear()
+
+    def _take_idle_pools(self, idle_after: float, sweet_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            cutoff = self._clock() - idle_after
+            items = [
+                {"sweet_id": sweet_id, "quantity": quantity}
+                for sweet_id, quantity in self.pools.items()
+                if quantity > 0
+                and (sweet_ids is None or sweet_id in sweet_ids)
+                and self.last_reserved.get(sweet_id, 0) <= cutoff
+            ]
+            for item in items:
+                self.pools[item["sweet_id"]] = 0
+            return items
+
+    async def flush(
+        self, inventory: InventoryRepository, idle_after: float = 0.0, sweet_ids: Optional[List[str]] = None
+    ) -> int:
+        items = self._take_idle_pools(idle_after, sweet_ids)
+        if not items:
+            return 0
+
+        try:
+            with anyio.CancelScope(shield=True):
+                await inventory.return_stock(self.holder, items)
+        except Exception:
+            for item in items:
+                self._refill(item["sweet_id"], item["quantity"])
+            raise
+
+        with self._lock:
+            self.counters["returns"] += 1
+        for item in items:
+            _stock_changed(item["sweet_id"], item["quantity"])
+        return sum(item["quantity"] for item in items)
+
+    def balances(self) -> Dict[str, int]:
+        with self._lock:
+            totals = defaultdict(int, self.pools)
+            for hold in self.holds.values():
+                totals[hold.sweet_id] += hold.quantity
+            return {sweet_id: quantity for sweet_id, quantity in totals.items() if quantity > 0}
+
+    def clear(self):
+        with self._lock:
+            self.pools.clear()
+            self.holds.clear()
+            self.last_reserved.clear()
+            self.counters = dict.fromkeys(self.counters, 0)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "holder": self.holder,
+                "holds": len(self.holds),
+                "held": sum(hold.quantity for hold in self.holds.values()),
+                "pooled": sum(self.pools.values()),
+                **self.counters,
+            }
+
+
+reservations = ReservationLedger(
+    holder=f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}",
+    batch_size=settings.reservation_batch_size,
+)
+
+
+async def returning_pools_when_short(inventory: InventoryRepository, attempt: Callable[[], Awaitable[Any]]) -> Any:
+    while True:
+        try:
+            return await attempt()
+        except InsufficientStockError as e:
+            if not await reservations.flush(inventory, sweet_ids=[e.sweet_id]):
+                raise
+
+
+async def sweep_reservations_once(idle_after: float) -> Dict[str, Any]:
+    expired = reservations.expire()
+    async with open_inventory_repository() as inventory:
+        returned = await reservations.flush(inventory, idle_after)
+        reclaimed = await inventory.reclaim_escrow(reservations.holder, settings.reservation_escrow_stale_after)
+
+    for item in reclaimed:
+        _stock_changed(item["sweet_id"], item["quantity"])
+    return {"expired": expired, "returned": returned, "reclaimed": reclaimed}
+
+
+async def sweep_reservations(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await sweep_reservations_once(idle_after=interval)
+        except Exception:
+            logger.exception("Reservation sweep failed")
+
+
+async def release_all_reservations():
+    reservations.drain()
+    async with open_inventory_repository() as inventory:
+        await reservations.flush(inventory)
+
+
+async def reconcile_reservations() -> Dict[str, Any]:
+    async with open_inventory_repository() as inventory:
+        escrow = await inventory.escrow(reservations.holder)
+
+    ledger = reservations.balances()
+    drift = [
+        {"sweet_id": sweet_id, "ledger": ledger.get(sweet_id, 0), "database": escrow.get(sweet_id, 0)}
+        for sweet_id in sorted(set(ledger) | set(escrow))
+        if ledger.get(sweet_id, 0) != escrow.get(sweet_id, 0)
+    ]
+    return {"consistent": not drift, "drift": drift}
@@ -0,0 +1,114 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from app.catalog_index import catalog_index
+from app.database import pool_stats
+from app.auth import get_current_admin_user, profile_cache
+from app.catalog_cache import catalog_cache
+from app.idempotency import idempotency_store
+from app.rate_limit import rate_limit_stats
+from app.replicas import replica_stats
+from app.reservations import reconcile_reservations, reservations
+from app.single_flight import single_flight_stats
+from app.stock_stream import stock_stream
+from app.repositories import SweetRepository, get_catalog_repository
+
+router = APIRouter(prefix="/api/admin", tags=["admin"])
+
+
+@router.get("/pool")
+async def get_pool_stats(current_user: dict = Depends(get_current_admin_user)):
+    return pool_stats()
+
+
+@router.get("/replicas")
+async def get_replica_stats(current_user: dict = Depends(get_current_admin_user)):
+    return replica_stats()
+
+
+@router.get("/rate-limits")
+async def get_rate_limit_stats(current_user: dict = Depends(get_current_admin_user)):
+    return rate_limit_stats()
+
+
+@router.get("/single-flight")
+async def get_single_flight_stats(current_user: dict = Depends(get_current_admin_user)):
+    return single_flight_stats()
+
+
+@router.get("/stream")
+async def get_stream_stats(current_user: dict = Depends(get_current_admin_user)):
+    return stock_stream.stats()
+
+
+@router.get("/idempotency")
+async def get_idempotency_stats(current_user: dict = Depends(get_current_admin_user)):
+    return idempotency_store.stats()
+
+
+@router.get("/reservations")
+async def get_reservation_stats(current_user: dict = Depends(get_current_admin_user)):
+    return reservations.stats()
+
+
+@router.get("/reservations/check")
+async def check_reservations(current_user: dict = Depends(get_current_admin_user)):
+    return await reconcile_reservations()
+
+
+@router.get("/cache/catalog")
+async def get_catalog_cache_stats(current_user: dict = Depends(get_current_admin_user)):
+    return catalog_cache.stats()
+
+
+@router.get("/cache/profiles")
+async def get_profile_cache_stats(current_user: dict = Depends(get_current_admin_user)):
+    return profile_cache.stats()
+
+
+@router.delete("/cache/profiles", status_code=status.HTTP_204_NO_CONTENT)
+async def clear_profile_cache(current_user: dict = Depends(get_current_admin_user)):
+    profile_cache.clear()
+    return None
+
+
+@router.delete("/cache/profiles/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def invalidate_profile(
+    user_id: str,
+    current_user: dict = Depends(get_current_admin_user)
+):
+    profile_cache.invalidate(user_id)
+    return None
+
+
+@router.get("/catalog-index")
+async def get_catalog_index_stats(current_user: dict = Depends(get_current_admin_user)):
+    return catalog_index.stats()
+
+
+@router.get("/catalog-index/check")
+async def check_catalog_index(
+    current_user: dict = Depends(get_current_admin_user),
+    sweets: SweetRepository = Depends(get_catalog_repository)
+):
+    if not catalog_index.ready:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Catalog index is not enabled"
+        )
+    since = catalog_index.generation
+    rows = await sweets.fetch_all()
+    return catalog_index.diff(rows, since)
+
+
+@router.post("/catalog-index/reload")
+async def reload_catalog_index(
+    current_user: dict = Depends(get_current_admin_user),
+    sweets: SweetRepository = Depends(get_catalog_repository)
+):
+    if not catalog_index.enabled:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Catalog index is not enabled"
+        )
+    since = catalog_index.generation
+    rows = await sweets.fetch_all()
+    return catalog_index.reconcile(rows, since)
@@ -0,0 +1,54 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from app.auth import get_current_admin_user
+from app.config import get_settings
+from app.models import SalesSummary
+from app.repositories import PurchaseRepository, get_purchase_read_repository
+
+router = APIRouter(prefix="/api/analytics", tags=["analytics"])
+settings = get_settings()
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+@router.get("/sales", response_model=SalesSummary)
+async def sales_summary(
+    since: Optional[datetime] = Query(None, alias="from"),
+    until: Optional[datetime] = Query(None, alias="to"),
+    granularity: str = Query("day", pattern="^(day|hour)$"),
+    top: int = Query(10, ge=1, le=100),
+    current_user: dict = Depends(get_current_admin_user),
+    purchases: PurchaseRepository = Depends(get_purchase_read_repository)
+):
+    end = _as_utc(until) if until else datetime.now(timezone.utc)
+    start = _as_utc(since) if since else end - timedelta(days=settings.analytics_default_days)
+    max_days = settings.analytics_max_hourly_days if granularity == "hour" else settings.analytics_max_days
+
+    if start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'from' must be before 'to'"
+        )
+
+    if end - start > timedelta(days=max_days):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range too large for {granularity} granularity (max {max_days} days)"
+        )
+
+    try:
+        summary = await purchases.sales_summary(start, end, granularity, top)
+
+        return SalesSummary(start=start, end=end, granularity=granularity, **summary)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to load sales analytics: {str(e)}"
+        )
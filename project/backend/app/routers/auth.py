@@ -1,102 +1,94 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from supabase import Client
-from app.database import get_supabase_client
 from app.models import UserRegister, UserLogin, TokenResponse, UserResponse
+from app.rate_limit import admission_control, enforce_rate_limit
+from app.repositories import UserRepository, UserExistsError, get_user_repository
 
 router = APIRouter(prefix="/api/auth", tags=["authentication"])
 
 
-@router.post("/register", response_model=TokenResponse, status_code=status.HTTP_201_CREATED)
+def _user_response(profile: dict) -> UserResponse:
+    return UserResponse(
+        id=profile["id"],
+        email=profile["email"],
+        full_name=profile["full_name"],
+        role=profile["role"],
+        created_at=profile["created_at"]
+    )
+
+
+@router.post(
+    "/register",
+    response_model=TokenResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(admission_control("register"))]
+)
 async def register(
     user_data: UserRegister,
-    supabase: Client = Depends(get_supabase_client)
+    users: UserRepository = Depends(get_user_repository)
 ):
     try:
-        auth_response = supabase.auth.sign_up({
-            "email": user_data.email,
-            "password": user_data.password,
-            "options": {
-                "data": {
-                    "full_name": user_data.full_name
-                }
-            }
-        })
-
-        if not auth_response.user:
+        enforce_rate_limit("register", "user", user_data.email.lower())
+        session = await users.sign_up(user_data.email, user_data.password, user_data.full_name)
+
+        if not session:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Registration failed"
             )
 
-        profile_response = supabase.table("profiles").select("*").eq("id", auth_response.user.id).maybeSingle().execute()
+        profile = await users.get_profile(session.user_id)
 
-        if not profile_response.data:
+        if not profile:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Profile creation failed"
             )
 
-        user_response = UserResponse(
-            id=profile_response.data["id"],
-            email=profile_response.data["email"],
-            full_name=profile_response.data["full_name"],
-            role=profile_response.data["role"],
-            created_at=profile_response.data["created_at"]
-        )
-
         return TokenResponse(
-            access_token=auth_response.session.access_token,
-            user=user_response
+            access_token=session.access_token,
+            user=_user_response(profile)
         )
 
+    except UserExistsError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User with this email already exists"
+        )
+    except HTTPException:
+        raise
     except Exception as e:
-        if "already registered" in str(e).lower() or "already exists" in str(e).lower():
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="User with this email already exists"
-            )
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Registration failed: {str(e)}"
         )
 
 
-@router.post("/login", response_model=TokenResponse)
+@router.post("/login", response_model=TokenResponse, dependencies=[Depends(admission_control("login"))])
 async def login(
     credentials: UserLogin,
-    supabase: Client = Depends(get_supabase_client)
+    users: UserRepository = Depends(get_user_repository)
 ):
     try:
-        auth_response = supabase.auth.sign_in_with_password({
-            "email": credentials.email,
-            "password": credentials.password
-        })
+        enforce_rate_limit("login", "user", credentials.email.lower())
+        session = await users.sign_in(credentials.email, credentials.password)
 
-        if not auth_response.user or not auth_response.session:
+        if not session:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid email or password"
             )
 
-        profile_response = supabase.table("profiles").select("*").eq("id", auth_response.user.id).maybeSingle().execute()
+        profile = await users.get_profile(session.user_id)
 
-        if not profile_response.data:
+        if not profile:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User profile not found"
             )
 
-        user_response = UserResponse(
-            id=profile_response.data["id"],
-            email=profile_response.data["email"],
-            full_name=profile_response.data["full_name"],
-            role=profile_response.data["role"],
-            created_at=profile_response.data["created_at"]
-        )
-
         return TokenResponse(
-            access_token=auth_response.session.access_token,
-            user=user_response
+            access_token=session.access_token,
+            user=_user_response(profile)
         )
 
     except HTTPException:
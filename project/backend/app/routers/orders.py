@@ -0,0 +1,75 @@
+from functools import partial
+from decimal import Decimal
+from fastapi import APIRouter, Depends, HTTPException, status
+from app.models import CheckoutRequest, OrderResponse
+from app.rate_limit import admission_control, rate_limited_user
+from app.reservations import ReservationNotFoundError, reservations, returning_pools_when_short
+from app.catalog_cache import catalog_cache
+from app.catalog_index import catalog_index
+from app.serialization import trusted_response
+from app.stock_stream import stock_stream
+from app.repositories import (
+    InventoryRepository, SweetNotFoundError, InsufficientStockError, get_inventory_repository
+)
+
+router = APIRouter(prefix="/api/orders", tags=["orders"])
+
+
+@router.post(
+    "/checkout",
+    response_model=OrderResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(admission_control("checkout"))]
+)
+async def checkout(
+    order_data: CheckoutRequest,
+    current_user: dict = Depends(rate_limited_user("checkout")),
+    inventory: InventoryRepository = Depends(get_inventory_repository)
+):
+    try:
+        if order_data.reservation_ids:
+            items = await reservations.confirm(inventory, current_user["id"], order_data.reservation_ids)
+        else:
+            items = await returning_pools_when_short(inventory, partial(
+                inventory.checkout,
+                current_user["id"],
+                [item.model_dump() for item in order_data.items]
+            ))
+
+        if not items:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Checkout failed"
+            )
+
+        catalog_cache.bump()
+        if not order_data.reservation_ids:
+            for item in items:
+                catalog_index.adjust_quantity(item["sweet_id"], -item["quantity"])
+                stock_stream.adjust_quantity(item["sweet_id"], -item["quantity"])
+
+        total_price = sum((Decimal(str(item["total_price"])) for item in items), Decimal("0"))
+
+        return trusted_response({"items": items, "total_price": total_price}, OrderResponse, status.HTTP_201_CREATED)
+    except SweetNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Sweet not found: {e.sweet_id}"
+        )
+    except ReservationNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Reservation not found or expired: {e.reservation_id}"
+        )
+    except InsufficientStockError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Not enough stock for sweet {e.sweet_id}. Available: {e.available}"
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Checkout failed: {str(e)}"
+        )
@@ -0,0 +1,155 @@
+import csv
+import io
+import json
+import logging
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from app.auth import get_current_admin_user, get_current_user
+from app.config import get_settings
+from app.models import PurchaseHistoryItem
+from app.pagination import decode_cursor, InvalidCursorError
+from app.repositories import Lease, PurchaseRepository, get_purchase_lease, get_purchase_read_repository
+
+router = APIRouter(prefix="/api/purchases", tags=["purchases"])
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+PURCHASE_FIELDS = ["id", "user_id", "sweet_id", "quantity", "total_price", "purchased_at"]
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _encode_rows(rows: List[dict], fmt: str, header: bool) -> bytes:
+    if fmt == "ndjson":
+        return b"".join(
+            json.dumps({field: row.get(field) for field in PURCHASE_FIELDS}, separators=(",", ":")).encode() + b"\n"
+            for row in rows
+        )
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if header:
+        writer.writerow(PURCHASE_FIELDS)
+    writer.writerows([row.get(field) for field in PURCHASE_FIELDS] for row in rows)
+    return buffer.getvalue().encode()
+
+
+async def _stream_export(lease: Lease, filters, rows, cursor, fmt: str, gzip: bool) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip else None
+    header = True
+
+    try:
+        while True:
+            chunk = _encode_rows(rows, fmt, header)
+            header = False
+
+            if compressor is not None:
+                chunk = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            if chunk:
+                yield chunk
+
+            if cursor is None:
+                break
+            rows, cursor = await lease.repository.export_page(filters, cursor, settings.export_batch_size)
+
+        if compressor is not None:
+            yield compressor.flush()
+    except Exception:
+        logger.exception("Purchase export aborted")
+        raise
+    finally:
+        lease.release()
+
+
+async def purchase_history_page(
+    purchases: PurchaseRepository,
+    column: str,
+    value: str,
+    limit: Optional[int],
+    cursor: Optional[str],
+    include_sweet: bool,
+    response: Response
+) -> List[dict]:
+    try:
+        page_cursor = decode_cursor(cursor) if cursor else None
+    except InvalidCursorError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+    try:
+        rows, next_cursor = await purchases.history_page(
+            column, value, page_cursor, limit or settings.purchase_history_page_size, include_sweet
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch purchases: {str(e)}"
+        )
+
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return rows
+
+
+@router.get("/me", response_model=List[PurchaseHistoryItem], response_model_exclude_unset=True)
+async def get_my_purchases(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=settings.purchase_history_max_page_size),
+    cursor: Optional[str] = Query(None),
+    include_sweet: bool = Query(False),
+    current_user: dict = Depends(get_current_user),
+    purchases: PurchaseRepository = Depends(get_purchase_read_repository)
+):
+    return await purchase_history_page(purchases, "user_id", current_user["id"], limit, cursor, include_sweet, response)
+
+
+@router.get("/export")
+async def export_purchases(
+    request: Request,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    since: Optional[datetime] = Query(None, alias="from"),
+    until: Optional[datetime] = Query(None, alias="to"),
+    sweet_id: Optional[str] = Query(None),
+    user_id: Optional[str] = Query(None),
+    current_user: dict = Depends(get_current_admin_user),
+    open_lease: Callable[[], Awaitable[Lease]] = Depends(get_purchase_lease)
+):
+    filters = []
+    if since is not None:
+        filters.append(("purchased_at", "gte", since.isoformat()))
+    if until is not None:
+        filters.append(("purchased_at", "lt", until.isoformat()))
+    if sweet_id:
+        filters.append(("sweet_id", "eq", sweet_id))
+    if user_id:
+        filters.append(("user_id", "eq", user_id))
+
+    lease = await open_lease()
+    try:
+        rows, cursor = await lease.repository.export_page(filters, None, settings.export_batch_size)
+    except Exception as e:
+        lease.release()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Export failed: {str(e)}"
+        )
+
+    gzip = "gzip" in request.headers.get("accept-encoding", "").lower()
+    headers = {
+        "Content-Disposition": f'attachment; filename="purchases.{format}"',
+        "Vary": "Accept-Encoding",
+    }
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+
+    return StreamingResponse(
+        _stream_export(lease, filters, rows, cursor, format, gzip),
+        media_type=MEDIA_TYPES[format],
+        headers=headers,
+        background=BackgroundTask(lease.release)
+    )
@@ -1,84 +1,313 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from supabase import Client
-from typing import List, Optional
+import asyncio
+import anyio
+from functools import partial
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from typing import AsyncIterator, Awaitable, List, Optional
 from decimal import Decimal
-from app.database import get_supabase_client
+from app.bulk_import import BulkImportError, import_format, iter_batches, iter_sweets
 from app.models import (
-    SweetCreate, SweetUpdate, SweetResponse,
-    PurchaseRequest, RestockRequest, PurchaseResponse
+    SweetCreate, SweetUpdate, SweetResponse, SweetListItem,
+    PurchaseRequest, RestockRequest, PurchaseResponse, PurchaseHistoryItem, ReserveRequest, ReservationResponse,
+    BulkImportResponse, BulkImportRowError,
+    BulkRestockRequest, BulkPriceRequest, BulkUpdateResponse
+)
+from app.auth import authenticate, get_current_admin_user, get_current_user, get_pending_user, get_stream_user
+from app.catalog_cache import catalog_cache
+from app.catalog_index import catalog_index
+from app.idempotency import idempotency_guard
+from app.config import get_settings
+from app.pagination import decode_cursor, InvalidCursorError
+from app.rate_limit import admission_control, rate_limited_user
+from app.replicas import primary_required
+from app.reservations import ReservationNotFoundError, reservations, returning_pools_when_short
+from app.routers.purchases import purchase_history_page
+from app.serialization import dumps, to_jsonable, trusted_response
+from app.single_flight import catalog_reads
+from app.stock_stream import StreamFullError, Subscription, stock_stream
+from app.repositories import (
+    SweetRepository, InventoryRepository, PurchaseRepository, RepositoryError, SweetNotFoundError,
+    InsufficientStockError, InvalidRequestError, SweetExistsError, UserRepository,
+    get_sweet_repository, get_sweet_read_repository, get_inventory_repository,
+    get_purchase_read_repository, get_user_repository
 )
-from app.auth import get_current_user, get_current_admin_user
 
 router = APIRouter(prefix="/api/sweets", tags=["sweets"])
+settings = get_settings()
 
+SWEET_FIELDS = list(SweetResponse.model_fields)
+
+sweet_list_adapter = TypeAdapter(List[SweetListItem])
+
+
+def _parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    if not fields:
+        return None
+
+    columns = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [column for column in columns if column not in SWEET_FIELDS]
+    if unknown or not columns:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown) or fields}"
+        )
+    return columns
+
+
+def _parse_cursor(cursor: Optional[str]):
+    if not cursor:
+        return None
 
-@router.get("", response_model=List[SweetResponse])
-async def get_all_sweets(
-    current_user: dict = Depends(get_current_user),
-    supabase: Client = Depends(get_supabase_client)
-):
     try:
-        response = supabase.table("sweets").select("*").order("created_at", desc=True).execute()
-        return response.data
-    except Exception as e:
+        return decode_cursor(cursor)
+    except InvalidCursorError:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to fetch sweets: {str(e)}"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def _project(rows: List[dict], columns: Optional[List[str]]) -> List[dict]:
+    if columns is None:
+        return rows
+    return [{column: row.get(column) for column in columns} for row in rows]
+
+
+def _cache_page(key, version: int, rows: List[dict], next_cursor: Optional[str]):
+    if settings.trusted_upstream_responses:
+        body = dumps([to_jsonable(row, SweetListItem, exclude_unset=True) for row in rows])
+    else:
+        body = sweet_list_adapter.dump_json(
+            sweet_list_adapter.validate_python(rows),
+            exclude_unset=True
         )
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+    return catalog_cache.put(key, version, body, headers)
+
 
+def _discard_result(task: asyncio.Future):
+    if not task.cancelled():
+        task.exception()
 
-@router.get("/search", response_model=List[SweetResponse])
+
+async def _load_while_authenticating(pending_user: "asyncio.Future[dict]", load):
+    task = asyncio.ensure_future(load())
+    try:
+        await pending_user
+    except BaseException:
+        task.cancel()
+        task.add_done_callback(_discard_result)
+        raise
+    return await task
+
+
+@router.get("", response_model=List[SweetListItem], response_model_exclude_unset=True)
+async def get_all_sweets(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=settings.catalog_max_page_size),
+    cursor: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None),
+    pending_user: "asyncio.Future[dict]" = Depends(get_pending_user),
+    sweets: SweetRepository = Depends(get_sweet_read_repository)
+):
+    key = ("list", limit, cursor, fields)
+    primary = primary_required(request)
+
+    async def load():
+        columns = _parse_fields(fields)
+        page_cursor = _parse_cursor(cursor)
+
+        entry = None if primary else catalog_cache.get(key)
+        if entry:
+            return entry
+
+        version = catalog_cache.version
+
+        async def fetch():
+            rows, next_cursor = await sweets.page(columns, page_cursor, limit or settings.catalog_page_size)
+            return _cache_page(key, version, _project(rows, columns), next_cursor)
+
+        try:
+            return await catalog_reads.do((key, version, primary), fetch)
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Failed to fetch sweets: {str(e)}"
+            )
+
+    entry = await _load_while_authenticating(pending_user, load)
+    return catalog_cache.respond(request, entry)
+
+
+@router.get("/search", response_model=List[SweetListItem], response_model_exclude_unset=True)
 async def search_sweets(
+    request: Request,
     name: Optional[str] = Query(None),
     category: Optional[str] = Query(None),
     min_price: Optional[Decimal] = Query(None),
     max_price: Optional[Decimal] = Query(None),
-    current_user: dict = Depends(get_current_user),
-    supabase: Client = Depends(get_supabase_client)
+    mode: str = Query("substring", pattern="^(substring|ranked)$"),
+    limit: Optional[int] = Query(None, ge=1, le=settings.catalog_max_page_size),
+    cursor: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None),
+    pending_user: "asyncio.Future[dict]" = Depends(get_pending_user),
+    sweets: SweetRepository = Depends(get_sweet_read_repository)
 ):
-    try:
-        query = supabase.table("sweets").select("*")
+    key = ("search", mode, name, category, min_price, max_price, limit, cursor, fields)
+    primary = primary_required(request)
 
-        if name:
-            query = query.ilike("name", f"%{name}%")
+    async def load():
+        columns = _parse_fields(fields)
 
-        if category:
-            query = query.eq("category", category)
+        if mode == "ranked" and not name:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Ranked search requires a name"
+            )
+        if mode == "ranked" and cursor:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Ranked search does not support cursor"
+            )
+        page_cursor = _parse_cursor(cursor)
+
+        entry = None if primary else catalog_cache.get(key)
+        if entry:
+            return entry
+
+        version = catalog_cache.version
+
+        async def fetch():
+            if mode == "ranked":
+                rows = await sweets.ranked_search(
+                    name, category, min_price, max_price,
+                    limit or settings.search_result_limit
+                )
+                next_cursor = None
+            elif catalog_index.ready:
+                rows, next_cursor = catalog_index.search(
+                    name, category, min_price, max_price,
+                    page_cursor, limit or settings.catalog_page_size
+                )
+            else:
+                rows, next_cursor = await sweets.page(
+                    columns, page_cursor, limit or settings.catalog_page_size,
+                    name, category, min_price, max_price
+                )
+
+            return _cache_page(key, version, _project(rows, columns), next_cursor)
+
+        try:
+            return await catalog_reads.do((key, version, primary), fetch)
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Search failed: {str(e)}"
+            )
 
-        if min_price is not None:
-            query = query.gte("price", float(min_price))
+    entry = await _load_while_authenticating(pending_user, load)
+    return catalog_cache.respond(request, entry)
 
-        if max_price is not None:
-            query = query.lte("price", float(max_price))
 
-        response = query.order("created_at", desc=True).execute()
-        return response.data
-    except Exception as e:
+def _subscribe(last_event_id: Optional[str]) -> Subscription:
+    try:
+        return stock_stream.subscribe(last_event_id)
+    except StreamFullError:
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Search failed: {str(e)}"
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many stream subscribers"
         )
 
 
-@router.post("", response_model=SweetResponse, status_code=status.HTTP_201_CREATED)
+async def _sse_events(subscription: Subscription) -> AsyncIterator[bytes]:
+    try:
+        while True:
+            event = await subscription.get(settings.stream_heartbeat_interval)
+            yield event.sse if event else b": ping\n\n"
+    finally:
+        subscription.close()
+
+
+@router.get("/stream")
+async def stream_stock_updates(
+    request: Request,
+    last_event_id: Optional[str] = Query(None),
+    current_user: dict = Depends(get_stream_user)
+):
+    subscription = _subscribe(request.headers.get("last-event-id") or last_event_id)
+    return StreamingResponse(
+        _sse_events(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/stream/ws")
+async def stream_stock_updates_ws(
+    websocket: WebSocket,
+    access_token: str = Query(""),
+    last_event_id: Optional[str] = Query(None),
+    users: UserRepository = Depends(get_user_repository)
+):
+    try:
+        await authenticate(access_token, users)
+        subscription = _subscribe(last_event_id)
+    except HTTPException as e:
+        await websocket.close(code=1013 if e.status_code == status.HTTP_503_SERVICE_UNAVAILABLE else 1008)
+        return
+
+    async def forward(scope: anyio.CancelScope):
+        try:
+            while True:
+                event = await subscription.get(settings.stream_heartbeat_interval)
+                await websocket.send_text(event.data.decode() if event else '{"type":"ping"}')
+        except (WebSocketDisconnect, RuntimeError):
+            scope.cancel()
+
+    try:
+        await websocket.accept()
+        async with anyio.create_task_group() as tasks:
+            tasks.start_soon(forward, tasks.cancel_scope)
+            while (await websocket.receive())["type"] != "websocket.disconnect":
+                pass
+            tasks.cancel_scope.cancel()
+    finally:
+        subscription.close()
+
+
+@router.post(
+    "",
+    response_model=SweetResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(idempotency_guard)]
+)
 async def create_sweet(
     sweet_data: SweetCreate,
     current_user: dict = Depends(get_current_admin_user),
-    supabase: Client = Depends(get_supabase_client)
+    sweets: SweetRepository = Depends(get_sweet_repository)
 ):
     try:
         sweet_dict = sweet_data.model_dump()
         sweet_dict["price"] = float(sweet_dict["price"])
 
-        response = supabase.table("sweets").insert(sweet_dict).execute()
+        sweet = await sweets.create(sweet_dict)
 
-        if not response.data:
+        if not sweet:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Failed to create sweet"
             )
 
-        return response.data[0]
+        catalog_cache.bump()
+        catalog_index.upsert(sweet)
+        stock_stream.upsert(sweet)
+        return trusted_response(sweet, SweetResponse, status.HTTP_201_CREATED)
+    except SweetExistsError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -88,12 +317,136 @@ async def create_sweet(
         )
 
 
+@router.post("/bulk", response_model=BulkImportResponse)
+async def bulk_import_sweets(
+    request: Request,
+    batch_size: Optional[int] = Query(None, ge=1, le=settings.bulk_import_max_batch_size),
+    current_user: dict = Depends(get_current_admin_user),
+    sweets: SweetRepository = Depends(get_sweet_repository)
+):
+    fmt = import_format(request.headers.get("content-type"))
+    if fmt is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Upload must be text/csv or application/x-ndjson"
+        )
+
+    received = upserted = failed = 0
+    errors: List[BulkImportRowError] = []
+
+    def record_error(line: int, error: str):
+        nonlocal failed
+        failed += 1
+        if len(errors) < settings.bulk_import_max_errors:
+            errors.append(BulkImportRowError(line=line, error=error))
+
+    try:
+        records = iter_sweets(request.stream(), fmt)
+        async for batch, batch_errors, count in iter_batches(records, batch_size or settings.bulk_import_batch_size):
+            received += count
+            for line, error in batch_errors:
+                record_error(line, error)
+
+            if not batch:
+                continue
+
+            try:
+                rows = await sweets.upsert_many(
+                    [sweet for _, sweet in batch.values()],
+                    returning=catalog_index.ready
+                )
+            except RepositoryError as e:
+                for line, _ in batch.values():
+                    record_error(line, f"Batch rejected: {str(e)}")
+                continue
+
+            upserted += len(batch)
+            for row in rows:
+                catalog_index.upsert(row)
+    except BulkImportError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Bulk import failed after {upserted} rows: {str(e)}"
+        )
+    finally:
+        if upserted:
+            catalog_cache.bump()
+            stock_stream.reset()
+
+    return BulkImportResponse(
+        received=received,
+        upserted=upserted,
+        failed=failed,
+        errors=errors,
+        errors_truncated=failed > len(errors)
+    )
+
+
+async def _bulk_update(update: Awaitable[List[dict]], action: str) -> BulkUpdateResponse:
+    try:
+        rows = await update
+
+        catalog_cache.bump()
+        for row in rows:
+            catalog_index.upsert(row)
+            stock_stream.upsert(row)
+
+        return trusted_response({"updated": len(rows), "items": rows}, BulkUpdateResponse)
+    except SweetNotFoundError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Sweet not found: {e.sweet_id}"
+        )
+    except InsufficientStockError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Not enough stock for sweet {e.sweet_id}. Available: {e.available}"
+        )
+    except InvalidRequestError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"{action} failed: {str(e)}"
+        )
+
+
+@router.post("/bulk/restock", response_model=BulkUpdateResponse)
+async def bulk_restock(
+    restock_data: BulkRestockRequest,
+    current_user: dict = Depends(get_current_admin_user),
+    inventory: InventoryRepository = Depends(get_inventory_repository)
+):
+    items = [item.model_dump() for item in restock_data.items]
+    return await _bulk_update(inventory.bulk_restock(items), "Bulk restock")
+
+
+@router.post("/bulk/prices", response_model=BulkUpdateResponse)
+async def bulk_update_prices(
+    price_data: BulkPriceRequest,
+    current_user: dict = Depends(get_current_admin_user),
+    inventory: InventoryRepository = Depends(get_inventory_repository)
+):
+    items = [{"sweet_id": item.sweet_id, "price": str(item.price)} for item in price_data.items]
+    return await _bulk_update(inventory.bulk_update_prices(items), "Bulk price update")
+
+
 @router.put("/{sweet_id}", response_model=SweetResponse)
 async def update_sweet(
     sweet_id: str,
     sweet_data: SweetUpdate,
     current_user: dict = Depends(get_current_admin_user),
-    supabase: Client = Depends(get_supabase_client)
+    sweets: SweetRepository = Depends(get_sweet_repository)
 ):
     try:
         update_dict = sweet_data.model_dump(exclude_unset=True)
@@ -107,15 +460,23 @@ async def update_sweet(
                 detail="No fields to update"
             )
 
-        response = supabase.table("sweets").update(update_dict).eq("id", sweet_id).execute()
+        sweet = await sweets.update(sweet_id, update_dict)
 
-        if not response.data:
+        if not sweet:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Sweet not found"
             )
 
-        return response.data[0]
+        catalog_cache.bump()
+        catalog_index.upsert(sweet)
+        stock_stream.upsert(sweet)
+        return trusted_response(sweet, SweetResponse)
+    except SweetExistsError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e)
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -129,17 +490,18 @@ async def update_sweet(
 async def delete_sweet(
     sweet_id: str,
     current_user: dict = Depends(get_current_admin_user),
-    supabase: Client = Depends(get_supabase_client)
+    sweets: SweetRepository = Depends(get_sweet_repository)
 ):
     try:
-        response = supabase.table("sweets").delete().eq("id", sweet_id).execute()
-
-        if not response.data:
+        if not await sweets.delete(sweet_id):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Sweet not found"
             )
 
+        catalog_cache.bump()
+        catalog_index.remove(sweet_id)
+        stock_stream.remove(sweet_id)
         return None
     except HTTPException:
         raise
@@ -150,52 +512,42 @@ async def delete_sweet(
         )
 
 
-@router.post("/{sweet_id}/purchase", response_model=PurchaseResponse)
+@router.post(
+    "/{sweet_id}/purchase",
+    response_model=PurchaseResponse,
+    dependencies=[Depends(admission_control("purchase")), Depends(idempotency_guard)]
+)
 async def purchase_sweet(
     sweet_id: str,
     purchase_data: PurchaseRequest,
-    current_user: dict = Depends(get_current_user),
-    supabase: Client = Depends(get_supabase_client)
+    current_user: dict = Depends(rate_limited_user("purchase")),
+    inventory: InventoryRepository = Depends(get_inventory_repository)
 ):
     try:
-        sweet_response = supabase.table("sweets").select("*").eq("id", sweet_id).maybeSingle().execute()
-
-        if not sweet_response.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Sweet not found"
-            )
-
-        sweet = sweet_response.data
-
-        if sweet["quantity"] < purchase_data.quantity:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Not enough stock. Available: {sweet['quantity']}"
-            )
-
-        total_price = float(sweet["price"]) * purchase_data.quantity
-
-        new_quantity = sweet["quantity"] - purchase_data.quantity
-        supabase.table("sweets").update({"quantity": new_quantity}).eq("id", sweet_id).execute()
-
-        purchase_dict = {
-            "user_id": current_user["id"],
-            "sweet_id": sweet_id,
-            "quantity": purchase_data.quantity,
-            "total_price": total_price
-        }
-
-        purchase_response = supabase.table("purchases").insert(purchase_dict).execute()
+        purchase = await returning_pools_when_short(
+            inventory, partial(inventory.purchase, current_user["id"], sweet_id, purchase_data.quantity)
+        )
 
-        if not purchase_response.data:
-            supabase.table("sweets").update({"quantity": sweet["quantity"]}).eq("id", sweet_id).execute()
+        if not purchase:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Purchase failed"
             )
 
-        return purchase_response.data[0]
+        catalog_cache.bump()
+        catalog_index.adjust_quantity(sweet_id, -purchase_data.quantity)
+        stock_stream.adjust_quantity(sweet_id, -purchase_data.quantity)
+        return trusted_response(purchase, PurchaseResponse)
+    except SweetNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Sweet not found"
+        )
+    except InsufficientStockError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Not enough stock. Available: {e.available}"
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -205,34 +557,94 @@ async def purchase_sweet(
         )
 
 
-@router.post("/{sweet_id}/restock", response_model=SweetResponse)
-async def restock_sweet(
+@router.get("/{sweet_id}/purchases", response_model=List[PurchaseHistoryItem], response_model_exclude_unset=True)
+async def get_sweet_purchases(
     sweet_id: str,
-    restock_data: RestockRequest,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=settings.purchase_history_max_page_size),
+    cursor: Optional[str] = Query(None),
+    include_sweet: bool = Query(False),
     current_user: dict = Depends(get_current_admin_user),
-    supabase: Client = Depends(get_supabase_client)
+    purchases: PurchaseRepository = Depends(get_purchase_read_repository)
+):
+    return await purchase_history_page(purchases, "sweet_id", sweet_id, limit, cursor, include_sweet, response)
+
+
+@router.post(
+    "/{sweet_id}/reserve",
+    response_model=ReservationResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(admission_control("purchase")), Depends(idempotency_guard)]
+)
+async def reserve_sweet(
+    sweet_id: str,
+    reserve_data: ReserveRequest,
+    current_user: dict = Depends(rate_limited_user("purchase")),
+    inventory: InventoryRepository = Depends(get_inventory_repository)
 ):
+    ttl = min(reserve_data.ttl_seconds or settings.reservation_ttl, settings.reservation_max_ttl)
     try:
-        sweet_response = supabase.table("sweets").select("*").eq("id", sweet_id).maybeSingle().execute()
+        hold = await reservations.reserve(inventory, current_user["id"], sweet_id, reserve_data.quantity, ttl)
+        return trusted_response(hold.as_response(), ReservationResponse, status.HTTP_201_CREATED)
+    except SweetNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Sweet not found"
+        )
+    except InsufficientStockError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Not enough stock. Available: {e.available}"
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Reservation failed: {str(e)}"
+        )
 
-        if not sweet_response.data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Sweet not found"
-            )
 
-        sweet = sweet_response.data
-        new_quantity = sweet["quantity"] + restock_data.quantity
+@router.delete("/reservations/{reservation_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def release_reservation(
+    reservation_id: str,
+    current_user: dict = Depends(get_current_user)
+):
+    try:
+        reservations.release(current_user["id"], reservation_id)
+        return None
+    except ReservationNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Reservation not found or expired"
+        )
+
 
-        update_response = supabase.table("sweets").update({"quantity": new_quantity}).eq("id", sweet_id).execute()
+@router.post("/{sweet_id}/restock", response_model=SweetResponse, dependencies=[Depends(idempotency_guard)])
+async def restock_sweet(
+    sweet_id: str,
+    restock_data: RestockRequest,
+    current_user: dict = Depends(get_current_admin_user),
+    inventory: InventoryRepository = Depends(get_inventory_repository)
+):
+    try:
+        sweet = await inventory.restock(sweet_id, restock_data.quantity)
 
-        if not update_response.data:
+        if not sweet:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Restock failed"
             )
 
-        return update_response.data[0]
+        catalog_cache.bump()
+        catalog_index.upsert(sweet)
+        stock_stream.upsert(sweet)
+        return trusted_response(sweet, SweetResponse)
+    except SweetNotFoundError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Sweet not found"
+        )
     except HTTPException:
         raise
     except Exception as e:
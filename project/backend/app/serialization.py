@@ -0,0 +1,98 @@
+import typing
+from datetime import datetime
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Type, Union
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from app.config import get_settings
+
+settings = get_settings()
+
+DECIMAL = "decimal"
+DATETIME = "datetime"
+MODEL = "model"
+MODEL_LIST = "model_list"
+
+FieldPlan = Tuple[Tuple[str, Optional[str], Any], ...]
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _unwrap_optional(annotation: Any) -> Any:
+    if typing.get_origin(annotation) is Union:
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return annotation
+
+
+def _is_model(annotation: Any) -> bool:
+    return isinstance(annotation, type) and issubclass(annotation, BaseModel)
+
+
+@lru_cache(maxsize=None)
+def _plan(model: Type[BaseModel]) -> FieldPlan:
+    plan = []
+    for name, field in model.model_fields.items():
+        annotation = _unwrap_optional(field.annotation)
+        origin = typing.get_origin(annotation)
+
+        if annotation is Decimal:
+            plan.append((name, DECIMAL, None))
+        elif annotation is datetime:
+            plan.append((name, DATETIME, None))
+        elif _is_model(annotation):
+            plan.append((name, MODEL, annotation))
+        elif origin in (list, List) and _is_model(typing.get_args(annotation)[0]):
+            plan.append((name, MODEL_LIST, typing.get_args(annotation)[0]))
+        else:
+            plan.append((name, None, None))
+    return tuple(plan)
+
+
+def _encode_value(kind: Optional[str], nested: Any, value: Any, exclude_unset: bool) -> Any:
+    if value is None or kind is None:
+        return value
+    if kind == DECIMAL:
+        return str(value if isinstance(value, Decimal) else Decimal(str(value)))
+    if kind == DATETIME:
+        return datetime.fromisoformat(value) if isinstance(value, str) else value
+    if kind == MODEL:
+        return to_jsonable(value, nested, exclude_unset)
+    return [to_jsonable(item, nested, exclude_unset) for item in value]
+
+
+def to_jsonable(row: Any, model: Type[BaseModel], exclude_unset: bool = False) -> Dict[str, Any]:
+    if isinstance(row, BaseModel):
+        return row.model_dump(mode="json", exclude_unset=exclude_unset)
+
+    encoded = {}
+    for name, kind, nested in _plan(model):
+        if name in row:
+            encoded[name] = _encode_value(kind, nested, row[name], exclude_unset)
+        elif not exclude_unset:
+            encoded[name] = None
+    return encoded
+
+
+def trusted_response(content: Any, model: Type[BaseModel], status_code: int = 200) -> Any:
+    if not settings.trusted_upstream_responses:
+        return content
+    return FastJSONResponse(to_jsonable(content, model), status_code=status_code)
@@ -0,0 +1,76 @@
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List
+from app.metrics import single_flight_calls
+
+
+class SingleFlight:
+    def __init__(self, name: str, max_tracked_keys: int = 1000):
+        self.name = name
+        self.max_tracked_keys = max_tracked_keys
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+        self._per_key: "OrderedDict[Hashable, List[int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def _record(self, key: Hashable, coalesced: bool):
+        with self._lock:
+            counts = self._per_key.get(key)
+            if counts is None:
+                counts = self._per_key[key] = [0, 0]
+            counts[1 if coalesced else 0] += 1
+            self._per_key.move_to_end(key)
+            while len(self._per_key) > self.max_tracked_keys:
+                self._per_key.popitem(last=False)
+
+            if coalesced:
+                self.coalesced += 1
+            else:
+                self.leaders += 1
+
+        single_flight_calls.inc(group=self.name, role="coalesced" if coalesced else "leader")
+
+    def _forget(self, key: Hashable, call: asyncio.Future):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        if not call.cancelled():
+            call.exception()
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        call = self._calls.get(key)
+        if call is not None and call.get_loop() is asyncio.get_running_loop():
+            self._record(key, coalesced=True)
+            return await asyncio.shield(call)
+
+        call = asyncio.ensure_future(fn())
+        self._calls[key] = call
+        call.add_done_callback(lambda done: self._forget(key, done))
+        self._record(key, coalesced=False)
+        return await asyncio.shield(call)
+
+    def stats(self, top: int = 20) -> Dict[str, Any]:
+        with self._lock:
+            keys = sorted(self._per_key.items(), key=lambda item: item[1][1], reverse=True)[:top]
+            return {
+                "in_flight": self.in_flight,
+                "leaders": self.leaders,
+                "coalesced": self.coalesced,
+                "top_keys": [
+                    {"key": repr(key), "leaders": leaders, "coalesced": coalesced}
+                    for key, (leaders, coalesced) in keys if coalesced
+                ],
+            }
+
+
+catalog_reads = SingleFlight("catalog")
+profile_reads = SingleFlight("profile")
+
+
+def single_flight_stats() -> Dict[str, Any]:
+    return {group.name: group.stats() for group in (catalog_reads, profile_reads)}
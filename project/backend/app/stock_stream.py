@@ -0,0 +1,179 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Optional, Set
+from app.config import get_settings
+from app.models import SweetResponse
+from app.serialization import dumps, to_jsonable
+
+settings = get_settings()
+
+
+class StreamFullError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class StreamEvent:
+    seq: int
+    id: str
+    type: str
+    data: bytes
+
+    @property
+    def sse(self) -> bytes:
+        return b"id: %s\nevent: %s\ndata: %s\n\n" % (self.id.encode(), self.type.encode(), self.data)
+
+
+def _wake(waiter: asyncio.Future):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class Subscription:
+    def __init__(self, stream: "StockStream", buffer_size: int):
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self.buffer: Deque[StreamEvent] = deque()
+        self.overflows = 0
+        self._waiter: Optional[asyncio.Future] = None
+        self._lock = threading.Lock()
+
+    def push(self, event: StreamEvent):
+        with self._lock:
+            if len(self.buffer) >= self.buffer_size:
+                self.buffer.clear()
+                self.buffer.append(self.stream.reset_event(event.seq))
+                self.overflows += 1
+            else:
+                self.buffer.append(event)
+            waiter, self._waiter = self._waiter, None
+
+        if waiter is not None:
+            try:
+                waiter.get_loop().call_soon_threadsafe(_wake, waiter)
+            except RuntimeError:
+                pass
+
+    async def get(self, timeout: float) -> Optional[StreamEvent]:
+        with self._lock:
+            if self.buffer:
+                return self.buffer.popleft()
+            waiter = self._waiter = asyncio.get_running_loop().create_future()
+
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            pass
+
+        with self._lock:
+            if self._waiter is waiter:
+                self._waiter = None
+            return self.buffer.popleft() if self.buffer else None
+
+    def close(self):
+        self.stream.unsubscribe(self)
+
+
+class StockStream:
+    def __init__(self, history_size: int, buffer_size: int, max_subscribers: int):
+        self.epoch = format(int(time.time() * 1000), "x")
+        self.buffer_size = buffer_size
+        self.max_subscribers = max_subscribers
+        self.seq = 0
+        self.history: Deque[StreamEvent] = deque(maxlen=history_size)
+        self.subscribers: Set[Subscription] = set()
+        self._lock = threading.Lock()
+        self.published = 0
+        self.resets = 0
+        self.overflows = 0
+
+    def _event(self, seq: int, type: str, payload: Dict[str, Any]) -> StreamEvent:
+        data = dumps({"seq": seq, "type": type, **payload})
+        return StreamEvent(seq=seq, id=f"{self.epoch}-{seq}", type=type, data=data)
+
+    def reset_event(self, seq: int) -> StreamEvent:
+        return self._event(seq, "reset", {})
+
+    def publish(self, type: str, **payload) -> StreamEvent:
+        with self._lock:
+            self.seq += 1
+            event = self._event(self.seq, type, payload)
+            self.history.append(event)
+            self.published += 1
+            for subscription in self.subscribers:
+                subscription.push(event)
+        return event
+
+    def upsert(self, row: dict):
+        self.publish("upsert", sweet=to_jsonable(row, SweetResponse))
+
+    def remove(self, sweet_id: str):
+        self.publish("delete", id=sweet_id)
+
+    def adjust_quantity(self, sweet_id: str, delta: int):
+        self.publish("stock", id=sweet_id, delta=delta)
+
+    def reset(self):
+        with self._lock:
+            self.resets += 1
+        self.publish("reset")
+
+    def _parse_last_event_id(self, last_event_id: str) -> Optional[int]:
+        epoch, _, seq = last_event_id.strip().partition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        return int(seq)
+
+    def _replay(self, subscription: Subscription, last_event_id: str):
+        last_seq = self._parse_last_event_id(last_event_id)
+        oldest = self.history[0].seq if self.history else self.seq + 1
+
+        if last_seq is None or last_seq > self.seq or last_seq < oldest - 1:
+            subscription.push(self.reset_event(self.seq))
+            return
+
+        for event in self.history:
+            if event.seq > last_seq:
+                subscription.push(event)
+
+    @property
+    def full(self) -> bool:
+        return len(self.subscribers) >= self.max_subscribers
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> Subscription:
+        subscription = Subscription(self, self.buffer_size)
+        with self._lock:
+            if self.full:
+                raise StreamFullError("Too many stream subscribers")
+            if last_event_id:
+                self._replay(subscription, last_event_id)
+            self.subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription in self.subscribers:
+                self.subscribers.discard(subscription)
+                self.overflows += subscription.overflows
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "epoch": self.epoch,
+                "seq": self.seq,
+                "history": len(self.history),
+                "subscribers": len(self.subscribers),
+                "published": self.published,
+                "resets": self.resets,
+                "overflows": self.overflows + sum(subscription.overflows for subscription in self.subscribers),
+            }
+
+
+stock_stream = StockStream(
+    history_size=settings.stream_history_size,
+    buffer_size=settings.stream_client_buffer,
+    max_subscribers=settings.stream_max_subscribers,
+)
@@ -0,0 +1,93 @@
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+
+import httpx
+from app.main import app
+from app.auth import get_pending_user
+from app.catalog_cache import catalog_cache
+from app.repositories import get_sweet_read_repository
+from app.repositories.supabase import SupabaseSweetRepository
+
+ROWS = [
+    {
+        "id": f"sweet-{i}",
+        "name": f"Sweet {i}",
+        "description": "",
+        "category": "chocolate",
+        "price": 1.5,
+        "quantity": 10,
+        "image_url": "",
+        "created_at": "2025-12-14T10:00:00+00:00",
+        "updated_at": "2025-12-14T10:00:00+00:00"
+    }
+    for i in range(20)
+]
+
+
+class SlowQuery:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        time.sleep(self.latency)
+        return type("Response", (), {"data": ROWS})()
+
+
+class SlowSupabase:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def table(self, name):
+        return SlowQuery(self.latency)
+
+
+def slow_auth(latency: float):
+    async def dependency():
+        async def authenticate():
+            await asyncio.to_thread(time.sleep, latency)
+            return {"id": "bench-user", "role": "user"}
+        return asyncio.ensure_future(authenticate())
+    return dependency
+
+
+async def run(concurrency: int, requests: int, latency: float) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        remaining = iter(range(requests))
+
+        async def worker():
+            for _ in remaining:
+                catalog_cache.bump()
+                response = await client.get("/api/sweets", headers={"Authorization": "Bearer bench"})
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return requests / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Catalog list throughput against a simulated slow Supabase")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    args = parser.parse_args()
+
+    app.dependency_overrides[get_pending_user] = slow_auth(args.latency)
+    app.dependency_overrides[get_sweet_read_repository] = lambda: SupabaseSweetRepository(SlowSupabase(args.latency))
+
+    print(f"{'concurrency':>12} {'req/s':>10}")
+    for concurrency in args.concurrency:
+        throughput = asyncio.run(run(concurrency, args.requests, args.latency))
+        print(f"{concurrency:>12} {throughput:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
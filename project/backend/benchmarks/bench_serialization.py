@@ -0,0 +1,134 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+from typing import List
+
+os.environ["STORAGE_BACKEND"] = "memory"
+os.environ.setdefault("CATALOG_MAX_PAGE_SIZE", "10000")
+
+import httpx
+from fastapi import FastAPI
+from app.main import app
+from app.catalog_cache import catalog_cache
+from app.config import get_settings
+from app.models import SweetResponse
+from app.repositories import memory_store
+from app.serialization import FastJSONResponse, to_jsonable
+
+settings = get_settings()
+
+
+def make_rows(count: int) -> List[dict]:
+    return [
+        {
+            "id": f"00000000-0000-0000-0000-{i:012d}",
+            "name": f"Sweet {i}",
+            "description": f"A delicious sweet number {i}",
+            "category": ("chocolate", "candy", "toffee", "fudge")[i % 4],
+            "price": round(0.5 + (i % 200) * 0.05, 2),
+            "quantity": i % 100,
+            "image_url": f"https://example.com/sweets/{i}.jpg",
+            "created_at": f"2025-12-14T10:{(i // 60) % 60:02d}:{i % 60:02d}.{i % 1000000:06d}+00:00",
+            "updated_at": "2025-12-14T12:00:00+00:00"
+        }
+        for i in range(count)
+    ]
+
+
+def serializer_app(rows: List[dict]) -> FastAPI:
+    bench = FastAPI()
+
+    @bench.get("/validated", response_model=List[SweetResponse])
+    async def validated():
+        return rows
+
+    @bench.get("/validated-orjson", response_model=List[SweetResponse], response_class=FastJSONResponse)
+    async def validated_orjson():
+        return rows
+
+    @bench.get("/trusted", response_model=List[SweetResponse])
+    async def trusted():
+        return FastJSONResponse([to_jsonable(row, SweetResponse) for row in rows])
+
+    return bench
+
+
+async def register() -> dict:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.post("/api/auth/register", json={"email": "bench@example.com", "password": "benchpass123"})
+        response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def cpu_per_request(target: FastAPI, path: str, requests: int, headers=None, before=None) -> dict:
+    transport = httpx.ASGITransport(app=target)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+        if before:
+            before()
+        warmup = await client.get(path)
+        warmup.raise_for_status()
+
+        cpu_started, wall_started = time.process_time(), time.perf_counter()
+        for _ in range(requests):
+            if before:
+                before()
+            response = await client.get(path)
+            response.raise_for_status()
+        cpu, wall = time.process_time() - cpu_started, time.perf_counter() - wall_started
+
+    return {
+        "cpu_ms": round(cpu / requests * 1000, 2),
+        "wall_ms": round(wall / requests * 1000, 2),
+        "bytes": len(warmup.content),
+    }
+
+
+async def run(rows: int, requests: int) -> List[dict]:
+    data = make_rows(rows)
+    bench = serializer_app(data)
+    results = []
+
+    for mode in ("validated", "validated-orjson", "trusted"):
+        results.append({"path": f"serializer/{mode}", **await cpu_per_request(bench, f"/{mode}", requests)})
+
+    memory_store.reset()
+    memory_store.sweets.update({row["id"]: dict(row) for row in data})
+    headers = await register()
+
+    try:
+        for trusted in (False, True):
+            settings.trusted_upstream_responses = trusted
+            result = await cpu_per_request(app, f"/api/sweets?limit={rows}", requests, headers, catalog_cache.bump)
+            results.append({"path": f"GET /api/sweets ({'trusted' if trusted else 'validated'})", **result})
+    finally:
+        settings.trusted_upstream_responses = False
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CPU cost per request of catalog response serialization")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    args = parser.parse_args()
+
+    if args.rows > settings.catalog_max_page_size:
+        parser.error(f"--rows exceeds CATALOG_MAX_PAGE_SIZE ({settings.catalog_max_page_size})")
+
+    results = asyncio.run(run(args.rows, args.requests))
+
+    print(f"{'path':>36} {'cpu ms/req':>11} {'wall ms/req':>12} {'bytes':>10}")
+    for row in results:
+        print(f"{row['path']:>36} {row['cpu_ms']:>11.2f} {row['wall_ms']:>12.2f} {row['bytes']:>10}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"rows": args.rows, "requests": args.requests, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+os.environ["STORAGE_BACKEND"] = "memory"
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+import httpx
+from app.main import app
+from app.auth import profile_cache
+from app.catalog_cache import catalog_cache
+from app.database import run_upstream
+from app.repositories import (
+    memory_store, get_sweet_repository, get_inventory_repository,
+    get_purchase_repository, get_user_repository
+)
+from app.repositories.memory import (
+    MemorySweetRepository, MemoryInventoryRepository, MemoryPurchaseRepository, MemoryUserRepository
+)
+
+SCENARIOS = ["list", "search", "purchase", "restock", "login", "flash_sale"]
+CATEGORIES = ["chocolate", "candy", "toffee", "fudge"]
+PASSWORD = "benchpassword"
+
+Send = Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+
+
+class LatencyProxy:
+    def __init__(self, inner, latency: float, jitter: float, rng: random.Random):
+        self.inner = inner
+        self.latency = latency
+        self.jitter = jitter
+        self.rng = rng
+
+    def _delay(self) -> float:
+        return max(0.0, self.latency * (1 + self.jitter * self.rng.uniform(-1, 1)))
+
+    def __getattr__(self, name):
+        attr = getattr(self.inner, name)
+        if not asyncio.iscoroutinefunction(attr):
+            return attr
+
+        async def call(*args, **kwargs):
+            if self.latency:
+                await run_upstream(time.sleep, self._delay())
+            return await attr(*args, **kwargs)
+        return call
+
+
+def install_backend(latency: float, jitter: float, seed: int):
+    rng = random.Random(seed)
+    repositories = {
+        get_sweet_repository: MemorySweetRepository,
+        get_inventory_repository: MemoryInventoryRepository,
+        get_purchase_repository: MemoryPurchaseRepository,
+        get_user_repository: MemoryUserRepository,
+    }
+    for dependency, repository in repositories.items():
+        app.dependency_overrides[dependency] = (
+            lambda repository=repository: LatencyProxy(repository(memory_store), latency, jitter, rng)
+        )
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = math.ceil(pct / 100 * len(ordered))
+    return ordered[max(0, min(len(ordered), rank) - 1)]
+
+
+def summarize(name: str, concurrency: int, latencies: List[float], statuses: Counter, elapsed: float) -> Dict[str, Any]:
+    ms = [latency * 1000 for latency in latencies]
+    return {
+        "scenario": name,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "elapsed_s": round(elapsed, 4),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(ms, 50), 3),
+            "p95": round(percentile(ms, 95), 3),
+            "p99": round(percentile(ms, 99), 3),
+            "mean": round(sum(ms) / len(ms), 3) if ms else 0.0,
+            "max": round(max(ms), 3) if ms else 0.0,
+        },
+        "status_codes": {str(code): count for code, count in sorted(statuses.items())},
+        "errors": sum(count for code, count in statuses.items() if code >= 400),
+    }
+
+
+async def measure(client: httpx.AsyncClient, name: str, concurrency: int, requests: int, send: Send) -> Dict[str, Any]:
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    remaining = iter(range(requests))
+
+    async def worker():
+        for i in remaining:
+            started = time.perf_counter()
+            response = await send(client, i)
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(name, concurrency, latencies, statuses, time.perf_counter() - started)
+
+
+class Fixture:
+    def __init__(self, sweets: int, users: int, stock: int):
+        self.sweet_count = sweets
+        self.user_count = users
+        self.stock = stock
+        self.sweet_ids: List[str] = []
+        self.emails: List[str] = []
+        self.user_headers: List[Dict[str, str]] = []
+        self.admin_headers: Dict[str, str] = {}
+
+    async def seed(self):
+        memory_store.reset()
+        profile_cache.clear()
+        catalog_cache.bump()
+
+        sweets = MemorySweetRepository(memory_store)
+        for i in range(self.sweet_count):
+            sweet = await sweets.create({
+                "name": f"Sweet {i}",
+                "description": f"Bench sweet number {i}",
+                "category": CATEGORIES[i % len(CATEGORIES)],
+                "price": round(1 + (i % 20) * 0.25, 2),
+                "quantity": self.stock,
+                "image_url": ""
+            })
+            self.sweet_ids.append(sweet["id"])
+
+        users = MemoryUserRepository(memory_store)
+        for i in range(self.user_count + 1):
+            email = f"bench{i}@example.com"
+            session = await users.sign_up(email, PASSWORD, f"Bench {i}")
+            headers = {"Authorization": f"Bearer {session.access_token}"}
+            if i == 0:
+                memory_store.profiles[session.user_id]["role"] = "admin"
+                self.admin_headers = headers
+            else:
+                self.emails.append(email)
+                self.user_headers.append(headers)
+
+    def user(self, i: int) -> Dict[str, str]:
+        return self.user_headers[i % len(self.user_headers)]
+
+    def sweet(self, i: int) -> str:
+        return self.sweet_ids[i % len(self.sweet_ids)]
+
+
+def scenario_requests(fixture: Fixture, cache: bool) -> Dict[str, Send]:
+    def fresh():
+        if not cache:
+            catalog_cache.bump()
+
+    async def list_sweets(client, i):
+        fresh()
+        return await client.get("/api/sweets", params={"limit": 20}, headers=fixture.user(i))
+
+    async def search(client, i):
+        fresh()
+        return await client.get(
+            "/api/sweets/search",
+            params={"name": f"Sweet {i % 10}", "category": CATEGORIES[i % len(CATEGORIES)], "max_price": 5},
+            headers=fixture.user(i)
+        )
+
+    async def purchase(client, i):
+        return await client.post(f"/api/sweets/{fixture.sweet(i)}/purchase", json={"quantity": 1}, headers=fixture.user(i))
+
+    async def restock(client, i):
+        return await client.post(f"/api/sweets/{fixture.sweet(i)}/restock", json={"quantity": 1}, headers=fixture.admin_headers)
+
+    async def login(client, i):
+        email = fixture.emails[i % len(fixture.emails)]
+        return await client.post("/api/auth/login", json={"email": email, "password": PASSWORD})
+
+    return {"list": list_sweets, "search": search, "purchase": purchase, "restock": restock, "login": login}
+
+
+async def flash_sale(client: httpx.AsyncClient, fixture: Fixture, buyers: int, stock: int) -> Dict[str, Any]:
+    sweet = await MemorySweetRepository(memory_store).create({
+        "name": "Flash Sale Truffle",
+        "category": "chocolate",
+        "price": 9.99,
+        "quantity": stock
+    })
+
+    async def buy(client, i):
+        return await client.post(f"/api/sweets/{sweet['id']}/purchase", json={"quantity": 1}, headers=fixture.user(i))
+
+    result = await measure(client, "flash_sale", buyers, buyers, buy)
+
+    sold = result["status_codes"].get("200", 0)
+    purchases = sum(1 for row in memory_store.purchases if row["sweet_id"] == sweet["id"])
+    remaining = memory_store.sweets[sweet["id"]]["quantity"]
+    result["flash_sale"] = {
+        "stock": stock,
+        "buyers": buyers,
+        "sold": sold,
+        "purchases_recorded": purchases,
+        "remaining": remaining,
+        "oversold": max(0, purchases - stock),
+        "passed": sold == purchases == min(stock, buyers) and remaining == stock - purchases and remaining >= 0,
+    }
+    return result
+
+
+async def run(args) -> List[Dict[str, Any]]:
+    fixture = Fixture(args.sweets, args.users, stock=max(args.requests, 1) * len(args.concurrency) + 1000)
+    await fixture.seed()
+    sends = scenario_requests(fixture, args.cache)
+    results = []
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for name in args.scenarios:
+            if name == "flash_sale":
+                results.append(await flash_sale(client, fixture, args.flash_buyers, args.flash_stock))
+                continue
+
+            for concurrency in args.concurrency:
+                requests = args.login_requests if name == "login" else args.requests
+                results.append(await measure(client, name, concurrency, requests, sends[name]))
+    return results
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    previous = {(row["scenario"], row["concurrency"]): row for row in baseline.get("results", [])}
+    regressions = []
+
+    print(f"\n{'scenario':>12} {'conc':>5} {'rps':>10} {'Δrps':>8} {'p95 ms':>9} {'Δp95':>8}")
+    for row in results:
+        old = previous.get((row["scenario"], row["concurrency"]))
+        if old is None:
+            continue
+
+        rps_change = (row["throughput_rps"] - old["throughput_rps"]) / old["throughput_rps"] * 100 if old["throughput_rps"] else 0.0
+        p95_change = (row["latency_ms"]["p95"] - old["latency_ms"]["p95"]) / old["latency_ms"]["p95"] * 100 if old["latency_ms"]["p95"] else 0.0
+        print(f"{row['scenario']:>12} {row['concurrency']:>5} {row['throughput_rps']:>10.1f} {rps_change:>+7.1f}% "
+              f"{row['latency_ms']['p95']:>9.2f} {p95_change:>+7.1f}%")
+
+        if rps_change < -threshold or p95_change > threshold:
+            regressions.append(f"{row['scenario']}@{row['concurrency']}")
+    return regressions
+
+
+def print_table(results: List[Dict[str, Any]]):
+    print(f"{'scenario':>12} {'conc':>5} {'reqs':>6} {'rps':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for row in results:
+        latency = row["latency_ms"]
+        print(f"{row['scenario']:>12} {row['concurrency']:>5} {row['requests']:>6} {row['throughput_rps']:>10.1f} "
+              f"{latency['p50']:>9.2f} {latency['p95']:>9.2f} {latency['p99']:>9.2f} {row['errors']:>7}")
+
+    for row in results:
+        if "flash_sale" in row:
+            sale = row["flash_sale"]
+            verdict = "ok" if sale["passed"] else "FAILED"
+            print(f"\nflash sale: {sale['buyers']} buyers, stock {sale['stock']}, sold {sale['sold']}, "
+                  f"remaining {sale['remaining']}, oversold {sale['oversold']} -> {verdict}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test of the API against the in-memory backend")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=SCENARIOS)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--login-requests", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.01, help="Simulated storage latency per call in seconds")
+    parser.add_argument("--jitter", type=float, default=0.25, help="Latency jitter as a fraction of --latency")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--sweets", type=int, default=200)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--cache", action="store_true", help="Keep the catalog response cache warm")
+    parser.add_argument("--flash-buyers", type=int, default=500)
+    parser.add_argument("--flash-stock", type=int, default=50)
+    parser.add_argument("--output", help="Write JSON results to this file")
+    parser.add_argument("--compare", help="Baseline JSON results to compare against")
+    parser.add_argument("--max-regression", type=float, default=20.0, help="Allowed throughput/p95 regression in percent")
+    args = parser.parse_args()
+
+    install_backend(args.latency, args.jitter, args.seed)
+    results = asyncio.run(run(args))
+    print_table(results)
+
+    report = {
+        "commit": git_commit(),
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    failed = [row["scenario"] for row in results if not row.get("flash_sale", {"passed": True})["passed"]]
+    if args.compare:
+        with open(args.compare) as f:
+            failed += compare(results, json.load(f), args.max_regression)
+
+    if failed:
+        print(f"\nFAILED: {', '.join(failed)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
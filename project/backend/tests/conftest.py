@@ -1,10 +1,25 @@
+import asyncio
+import os
 import pytest
 from fastapi.testclient import TestClient
+
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+os.environ.setdefault("MEMORY_ADMIN_EMAILS", '["admin@example.com"]')
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
 from app.main import app
+from app.auth import profile_cache
+from app.catalog_cache import catalog_cache
+from app.repositories import memory_store
+from app.reservations import reservations
 
 
 @pytest.fixture
 def client():
+    memory_store.reset()
+    profile_cache.clear()
+    catalog_cache.bump()
+    reservations.clear()
     return TestClient(app)
 
 
@@ -36,3 +51,9 @@ def test_sweet_data():
         "quantity": 50,
         "image_url": "https://example.com/chocolate.jpg"
     }
+
+
+def pending_user(user):
+    async def dependency():
+        return asyncio.ensure_future(asyncio.sleep(0, result=user))
+    return dependency
@@ -0,0 +1,96 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.auth import get_current_admin_user
+from app.database import get_supabase_admin_client
+from app.repositories import get_purchase_repository, get_supabase_purchase_repository
+
+SUMMARY = {
+    "units": 5,
+    "revenue": 7.5,
+    "by_sweet": [
+        {"sweet_id": "sweet-1", "name": "Fudge", "category": "candy", "units": 3, "revenue": 6.0},
+        {"sweet_id": "sweet-2", "name": "Mint", "category": "mints", "units": 2, "revenue": 1.5}
+    ],
+    "by_category": [
+        {"category": "candy", "units": 3, "revenue": 6.0},
+        {"category": "mints", "units": 2, "revenue": 1.5}
+    ],
+    "timeline": [{"bucket": "2025-12-14T00:00:00", "units": 5, "revenue": 7.5}],
+    "top_sellers": [
+        {"sweet_id": "sweet-1", "name": "Fudge", "category": "candy", "units": 3, "revenue": 6.0}
+    ]
+}
+
+
+class FakeRPC:
+    def __init__(self):
+        self.calls = []
+
+    def rpc(self, fn, params):
+        self.calls.append((fn, params))
+        return self
+
+    def execute(self):
+        return type("Response", (), {"data": SUMMARY})()
+
+
+@pytest.fixture
+def analytics_client(client: TestClient):
+    fake = FakeRPC()
+    app.dependency_overrides[get_current_admin_user] = lambda: {"id": "admin-1", "role": "admin"}
+    app.dependency_overrides[get_supabase_admin_client] = lambda: fake
+    app.dependency_overrides[get_purchase_repository] = get_supabase_purchase_repository
+    yield client, fake
+    app.dependency_overrides.clear()
+
+
+def test_sales_summary_reads_rollups_in_one_call(analytics_client):
+    client, fake = analytics_client
+
+    response = client.get("/api/analytics/sales", params={
+        "from": "2025-12-01T00:00:00Z", "to": "2025-12-15T00:00:00Z", "top": 1
+    })
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["revenue"] == "7.5"
+    assert [row["category"] for row in data["by_category"]] == ["candy", "mints"]
+    assert data["top_sellers"][0]["sweet_id"] == "sweet-1"
+    assert fake.calls == [("sales_summary", {
+        "p_from": "2025-12-01T00:00:00+00:00",
+        "p_to": "2025-12-15T00:00:00+00:00",
+        "p_granularity": "day",
+        "p_top": 1
+    })]
+
+
+def test_sales_summary_defaults_to_recent_days(analytics_client):
+    client, fake = analytics_client
+
+    response = client.get("/api/analytics/sales")
+
+    assert response.status_code == 200
+    assert response.json()["granularity"] == "day"
+    assert len(fake.calls) == 1
+
+
+def test_sales_summary_limits_hourly_range(analytics_client):
+    client, fake = analytics_client
+
+    response = client.get("/api/analytics/sales", params={
+        "from": "2025-01-01T00:00:00Z", "to": "2025-12-01T00:00:00Z", "granularity": "hour"
+    })
+
+    assert response.status_code == 400
+    assert fake.calls == []
+
+
+def test_sales_summary_rejects_inverted_range(analytics_client):
+    client, _ = analytics_client
+
+    response = client.get("/api/analytics/sales", params={
+        "from": "2025-12-15T00:00:00Z", "to": "2025-12-01T00:00:00Z"
+    })
+
+    assert response.status_code == 400
@@ -71,3 +71,12 @@ def test_login_wrong_password(client: TestClient, test_user_data):
     }
     response = client.post("/api/auth/login", json=login_data)
     assert response.status_code == 401
+
+
+def test_invalidating_a_profile_always_succeeds(client: TestClient, test_admin_data):
+    admin = client.post("/api/auth/register", json=test_admin_data).json()
+    headers = {"Authorization": f"Bearer {admin['access_token']}"}
+    user_id = admin["user"]["id"]
+
+    assert client.delete(f"/api/admin/cache/profiles/{user_id}", headers=headers).status_code == 204
+    assert client.delete("/api/admin/cache/profiles/never-cached", headers=headers).status_code == 204
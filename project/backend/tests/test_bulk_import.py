@@ -0,0 +1,153 @@
+import asyncio
+import json
+import pytest
+from fastapi.testclient import TestClient
+from postgrest import APIError
+from app.main import app
+from app.auth import get_current_admin_user
+from app.bulk_import import iter_lines, iter_sweets
+from app.catalog_cache import catalog_cache
+from app.database import get_supabase_client
+from app.repositories import get_supabase_sweet_repository, get_sweet_repository
+
+
+class FakeTable:
+    def __init__(self, supabase):
+        self.supabase = supabase
+        self.rows = None
+
+    def upsert(self, rows, **kwargs):
+        self.rows = rows
+        self.supabase.batches.append((rows, kwargs))
+        return self
+
+    def execute(self):
+        if self.supabase.fail_batch == len(self.supabase.batches):
+            raise APIError({"message": "duplicate key", "code": "23505"})
+        return type("Response", (), {"data": None})()
+
+
+class FakeSupabase:
+    def __init__(self):
+        self.batches = []
+        self.fail_batch = None
+
+    def table(self, name):
+        return FakeTable(self)
+
+
+@pytest.fixture
+def bulk_client(client: TestClient):
+    fake = FakeSupabase()
+    catalog_cache.bump()
+    app.dependency_overrides[get_current_admin_user] = lambda: {"id": "admin-1", "role": "admin"}
+    app.dependency_overrides[get_supabase_client] = lambda: fake
+    app.dependency_overrides[get_sweet_repository] = get_supabase_sweet_repository
+    yield client, fake
+    app.dependency_overrides.clear()
+
+
+async def chunked(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+async def collect(iterator):
+    return [item async for item in iterator]
+
+
+def ndjson(rows) -> bytes:
+    return "\n".join(json.dumps(row) for row in rows).encode()
+
+
+def sweet(i: int) -> dict:
+    return {"name": f"Sweet {i}", "category": "candy", "price": "1.25", "quantity": i}
+
+
+def test_iter_lines_handles_split_multibyte_chunks():
+    data = "name\nCrème brûlée\r\nlast".encode()
+    lines = asyncio.run(collect(iter_lines(chunked(data, 3))))
+    assert lines == [(1, "name"), (2, "Crème brûlée"), (3, "last")]
+
+
+def test_csv_quoted_fields_may_span_lines():
+    data = b'name,description,category,price,quantity\n"Fudge","Rich,\nbuttery",candy,2.50,3\n'
+    records = asyncio.run(collect(iter_sweets(chunked(data, 7), "csv")))
+    assert records == [(2, {
+        "name": "Fudge", "description": "Rich,\nbuttery", "category": "candy",
+        "price": 2.5, "quantity": 3, "image_url": ""
+    })]
+
+
+def test_bulk_import_batches_ndjson_upload(bulk_client):
+    client, fake = bulk_client
+
+    response = client.post(
+        "/api/sweets/bulk?batch_size=2",
+        content=ndjson([sweet(i) for i in range(5)]),
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "received": 5, "upserted": 5, "failed": 0, "errors": [], "errors_truncated": False
+    }
+    assert [len(rows) for rows, _ in fake.batches] == [2, 2, 1]
+    assert fake.batches[0][1]["on_conflict"] == "name,category"
+
+
+def test_bulk_import_reports_invalid_rows(bulk_client):
+    client, fake = bulk_client
+    data = (
+        b"name,category,price,quantity\n"
+        b"Toffee,candy,1.00,5\n"
+        b"Broken,candy,-1,5\n"
+        b"Short,candy\n"
+    )
+
+    response = client.post("/api/sweets/bulk", content=data, headers={"Content-Type": "text/csv"})
+
+    body = response.json()
+    assert body["received"] == 3
+    assert body["upserted"] == 1
+    assert [error["line"] for error in body["errors"]] == [3, 4]
+    assert "price" in body["errors"][0]["error"]
+    assert len(fake.batches) == 1
+
+
+def test_bulk_import_dedupes_natural_key_within_batch(bulk_client):
+    client, fake = bulk_client
+    rows = [sweet(1), {**sweet(1), "quantity": 9}]
+
+    response = client.post(
+        "/api/sweets/bulk",
+        content=ndjson(rows),
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+
+    body = response.json()
+    assert (body["received"], body["upserted"], body["failed"]) == (2, 1, 1)
+    assert body["errors"] == [{"line": 1, "error": "Superseded by line 2 with the same name and category"}]
+    assert fake.batches[0][0] == [{**sweet(1), "quantity": 9, "price": 1.25, "description": "", "image_url": ""}]
+
+
+def test_bulk_import_rejected_batch_fails_its_rows(bulk_client):
+    client, fake = bulk_client
+    fake.fail_batch = 1
+
+    response = client.post(
+        "/api/sweets/bulk?batch_size=2",
+        content=ndjson([sweet(i) for i in range(3)]),
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+
+    body = response.json()
+    assert body["upserted"] == 1
+    assert body["failed"] == 2
+    assert [error["line"] for error in body["errors"]] == [1, 2]
+
+
+def test_bulk_import_requires_supported_content_type(bulk_client):
+    client, _ = bulk_client
+    response = client.post("/api/sweets/bulk", content=b"{}", headers={"Content-Type": "application/json"})
+    assert response.status_code == 415
@@ -0,0 +1,125 @@
+import json
+import pytest
+from fastapi.testclient import TestClient
+from postgrest import APIError
+from app.main import app
+from app.auth import get_current_admin_user
+from app.catalog_cache import catalog_cache
+from app.database import get_supabase_admin_client
+from app.repositories import get_inventory_repository, get_supabase_inventory_repository
+
+
+class FakeRPC:
+    def __init__(self):
+        self.result = None
+        self.error = None
+        self.calls = []
+
+    def rpc(self, fn, params):
+        self.calls.append((fn, params))
+        return self
+
+    def execute(self):
+        if self.error:
+            raise self.error
+        return type("Response", (), {"data": self.result})()
+
+
+@pytest.fixture
+def bulk_client(client: TestClient):
+    fake = FakeRPC()
+    app.dependency_overrides[get_current_admin_user] = lambda: {"id": "admin-1", "role": "admin"}
+    app.dependency_overrides[get_supabase_admin_client] = lambda: fake
+    app.dependency_overrides[get_inventory_repository] = get_supabase_inventory_repository
+    yield client, fake
+    app.dependency_overrides.clear()
+
+
+def sweet_row(sweet_id: str, quantity: int, price: str = "1.50") -> dict:
+    return {
+        "id": sweet_id,
+        "name": f"Sweet {sweet_id}",
+        "description": "",
+        "category": "candy",
+        "price": price,
+        "quantity": quantity,
+        "image_url": "",
+        "created_at": "2025-12-14T10:00:00+00:00",
+        "updated_at": "2025-12-14T10:00:00+00:00"
+    }
+
+
+def test_bulk_restock_applies_all_deltas_in_one_call(bulk_client):
+    client, fake = bulk_client
+    fake.result = [sweet_row("a", 15), sweet_row("b", 2)]
+    version = catalog_cache.version
+
+    response = client.post("/api/sweets/bulk/restock", json={"items": [
+        {"sweet_id": "a", "quantity_delta": 10},
+        {"sweet_id": "b", "quantity_delta": -1}
+    ]})
+
+    assert response.status_code == 200
+    assert response.json()["updated"] == 2
+    assert [item["quantity"] for item in response.json()["items"]] == [15, 2]
+    assert fake.calls == [("bulk_restock", {"p_items": [
+        {"sweet_id": "a", "quantity_delta": 10},
+        {"sweet_id": "b", "quantity_delta": -1}
+    ]})]
+    assert catalog_cache.version > version
+
+
+def test_bulk_restock_rejects_zero_delta(bulk_client):
+    client, fake = bulk_client
+
+    response = client.post("/api/sweets/bulk/restock", json={"items": [{"sweet_id": "a", "quantity_delta": 0}]})
+
+    assert response.status_code == 422
+    assert fake.calls == []
+
+
+def test_bulk_restock_reports_negative_stock(bulk_client):
+    client, fake = bulk_client
+    fake.error = APIError({
+        "message": "Not enough stock",
+        "code": "SW409",
+        "details": json.dumps({"sweet_id": "b", "available": 1})
+    })
+
+    response = client.post("/api/sweets/bulk/restock", json={"items": [{"sweet_id": "b", "quantity_delta": -5}]})
+
+    assert response.status_code == 400
+    assert "sweet b" in response.json()["detail"]
+
+
+def test_bulk_price_update_sends_exact_prices(bulk_client):
+    client, fake = bulk_client
+    fake.result = [sweet_row("a", 5, "2.25")]
+
+    response = client.post("/api/sweets/bulk/prices", json={"items": [{"sweet_id": "a", "price": "2.25"}]})
+
+    assert response.status_code == 200
+    assert response.json()["items"][0]["price"] == "2.25"
+    assert fake.calls == [("bulk_update_prices", {"p_items": [{"sweet_id": "a", "price": "2.25"}]})]
+
+
+def test_bulk_price_update_reports_missing_sweet(bulk_client):
+    client, fake = bulk_client
+    fake.error = APIError({"message": "Sweet not found", "code": "SW404", "details": "missing"})
+
+    response = client.post("/api/sweets/bulk/prices", json={"items": [{"sweet_id": "missing", "price": 1}]})
+
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Sweet not found: missing"
+
+
+def test_bulk_price_update_reports_duplicate_items(bulk_client):
+    client, fake = bulk_client
+    fake.error = APIError({"message": "Each sweet may appear only once", "code": "22023"})
+
+    response = client.post("/api/sweets/bulk/prices", json={"items": [
+        {"sweet_id": "a", "price": 1}, {"sweet_id": "a", "price": 2}
+    ]})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Each sweet may appear only once"
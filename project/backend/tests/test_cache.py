@@ -0,0 +1,73 @@
+from app.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cache_hit_and_miss():
+    cache = TTLCache(maxsize=10, ttl=60)
+    assert cache.get("a") == (False, None)
+
+    cache.set("a", {"role": "user"})
+    assert cache.get("a") == (True, {"role": "user"})
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_cache_entries_expire():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=10, ttl=60, clock=clock)
+    cache.set("a", 1)
+
+    clock.now = 59
+    assert cache.get("a") == (True, 1)
+    clock.now = 60
+    assert cache.get("a") == (False, None)
+    assert cache.stats()["expirations"] == 1
+
+
+def test_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, 1)
+    assert cache.get("c") == (True, 3)
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_negative_entries_use_negative_ttl():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=10, ttl=60, negative_ttl=5, clock=clock)
+    cache.set("missing", None)
+
+    assert cache.get("missing") == (True, None)
+    clock.now = 5
+    assert cache.get("missing") == (False, None)
+
+
+def test_cache_invalidate_and_clear():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    assert cache.invalidate("a")
+    assert not cache.invalidate("a")
+    assert cache.clear() == 1
+    assert cache.stats()["size"] == 0
+
+
+def test_disabled_cache_stores_nothing():
+    cache = TTLCache(maxsize=10, ttl=0)
+    cache.set("a", 1)
+    assert cache.get("a") == (False, None)
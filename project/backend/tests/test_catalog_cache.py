@@ -0,0 +1,129 @@
+import gzip
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.auth import get_current_user, get_pending_user, get_current_admin_user
+from app.catalog_cache import CatalogCache, catalog_cache
+from app.database import get_supabase_client
+from app.repositories import get_supabase_sweet_repository, get_sweet_repository
+from tests.conftest import pending_user
+
+SWEET = {
+    "id": "sweet-1",
+    "name": "Milk Chocolate Bar",
+    "description": "Smooth and creamy milk chocolate " * 40,
+    "category": "chocolate",
+    "price": 2.99,
+    "quantity": 100,
+    "image_url": "",
+    "created_at": "2025-12-12T21:18:37+00:00",
+    "updated_at": "2025-12-12T21:18:37+00:00"
+}
+
+
+class FakeQuery:
+    def __init__(self, supabase):
+        self.supabase = supabase
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        self.supabase.executions += 1
+        return type("Response", (), {"data": [dict(SWEET)]})()
+
+
+class FakeSupabase:
+    def __init__(self):
+        self.executions = 0
+
+    def table(self, name):
+        return FakeQuery(self)
+
+
+@pytest.fixture
+def cached_client(client: TestClient):
+    fake = FakeSupabase()
+    catalog_cache.bump()
+    app.dependency_overrides[get_current_user] = lambda: {"id": "admin-1", "role": "admin"}
+    app.dependency_overrides[get_pending_user] = pending_user({"id": "admin-1", "role": "admin"})
+    app.dependency_overrides[get_current_admin_user] = lambda: {"id": "admin-1", "role": "admin"}
+    app.dependency_overrides[get_supabase_client] = lambda: fake
+    app.dependency_overrides[get_sweet_repository] = get_supabase_sweet_repository
+    yield client, fake
+    app.dependency_overrides.clear()
+
+
+def test_cache_entry_is_dropped_when_version_changes():
+    cache = CatalogCache(maxsize=10, ttl=60)
+    cache.put("key", cache.version, b"[]", {})
+    assert cache.get("key") is not None
+
+    cache.bump()
+    assert cache.get("key") is None
+
+
+def test_cache_ignores_results_read_before_a_write():
+    cache = CatalogCache(maxsize=10, ttl=60)
+    version = cache.version
+    cache.bump()
+
+    cache.put("key", version, b"[]", {})
+    assert cache.get("key") is None
+
+
+def test_repeated_reads_are_served_from_cache(cached_client):
+    client, fake = cached_client
+
+    first = client.get("/api/sweets")
+    second = client.get("/api/sweets")
+
+    assert first.status_code == 200
+    assert second.json() == first.json()
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert fake.executions == 1
+    assert catalog_cache.stats()["hits"] >= 1
+
+
+def test_matching_etag_returns_not_modified(cached_client):
+    client, fake = cached_client
+    etag = client.get("/api/sweets").headers["ETag"]
+
+    response = client.get("/api/sweets", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert fake.executions == 1
+
+
+def test_large_pages_are_served_gzipped(cached_client):
+    client, fake = cached_client
+
+    response = client.get("/api/sweets", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.json()[0]["id"] == "sweet-1"
+
+
+def test_gzip_and_identity_bodies_have_distinct_etags(cached_client):
+    client, fake = cached_client
+
+    gzipped = client.get("/api/sweets", headers={"Accept-Encoding": "gzip"}).headers["ETag"]
+    identity = client.get("/api/sweets", headers={"Accept-Encoding": "identity"}).headers["ETag"]
+
+    assert gzipped == identity[:-1] + '-gz"'
+    for etag in (gzipped, identity, f"W/{identity}"):
+        response = client.get("/api/sweets", headers={"If-None-Match": etag, "Accept-Encoding": "identity"})
+        assert response.status_code == 304
+        assert response.headers["ETag"] == identity
+    assert fake.executions == 1
+
+
+def test_writes_invalidate_cached_pages(cached_client):
+    client, fake = cached_client
+    client.get("/api/sweets")
+
+    client.delete("/api/sweets/sweet-1")
+    client.get("/api/sweets")
+
+    assert fake.executions == 3
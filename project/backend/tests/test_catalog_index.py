@@ -0,0 +1,180 @@
+from decimal import Decimal
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.auth import get_current_user, get_pending_user
+from app.catalog_cache import catalog_cache
+from app.catalog_index import CatalogIndex, catalog_index
+from app.database import get_supabase_client
+from app.repositories import get_supabase_sweet_repository, get_sweet_repository
+from app.pagination import decode_cursor
+from tests.conftest import pending_user
+
+
+def sweet(sweet_id, name, category, price, day):
+    return {
+        "id": sweet_id,
+        "name": name,
+        "description": "",
+        "category": category,
+        "price": price,
+        "quantity": 10,
+        "image_url": "",
+        "created_at": f"2025-12-{day:02d}T10:00:00+00:00",
+        "updated_at": f"2025-12-{day:02d}T10:00:00+00:00"
+    }
+
+
+ROWS = [
+    sweet("a", "Milk Chocolate Bar", "chocolate", 2.99, 1),
+    sweet("b", "Gummy Bears", "gummy", 1.99, 2),
+    sweet("c", "Dark Chocolate Truffles", "chocolate", 4.99, 3),
+    sweet("d", "Sour Worms", "gummy", 2.49, 4),
+    sweet("e", "White Chocolate Bar", "chocolate", 3.49, 5),
+]
+
+
+@pytest.fixture
+def index():
+    index = CatalogIndex(enabled=True)
+    index.load(ROWS)
+    return index
+
+
+def ids(rows):
+    return [row["id"] for row in rows]
+
+
+def test_search_by_category_newest_first(index):
+    rows, cursor = index.search(category="chocolate")
+    assert ids(rows) == ["e", "c", "a"]
+    assert cursor is None
+
+
+def test_search_by_price_range(index):
+    rows, _ = index.search(min_price=Decimal("2.49"), max_price=Decimal("3.49"))
+    assert ids(rows) == ["e", "d", "a"]
+
+
+def test_search_by_name_substring(index):
+    rows, _ = index.search(name="CHOCOLATE b")
+    assert ids(rows) == ["e", "a"]
+
+    rows, _ = index.search(name="ar")
+    assert ids(rows) == ["e", "c", "b", "a"]
+
+
+def test_search_combines_filters(index):
+    rows, _ = index.search(name="chocolate", category="chocolate", max_price=Decimal("3"))
+    assert ids(rows) == ["a"]
+
+
+def test_search_pages_with_cursor(index):
+    rows, cursor = index.search(limit=2)
+    assert ids(rows) == ["e", "d"]
+
+    rows, cursor = index.search(cursor=decode_cursor(cursor), limit=2)
+    assert ids(rows) == ["c", "b"]
+
+
+def test_write_paths_keep_index_current(index):
+    index.upsert({**ROWS[1], "name": "Gummy Chocolate Bears", "price": 5.5})
+    index.remove("e")
+    index.adjust_quantity("a", -3)
+
+    rows, _ = index.search(name="chocolate")
+    assert ids(rows) == ["c", "b", "a"]
+    assert rows[2]["quantity"] == 7
+
+    rows, _ = index.search(min_price=Decimal("5"))
+    assert ids(rows) == ["b"]
+
+
+def test_paging_matches_a_full_sort_for_selective_and_broad_filters():
+    catalog = [
+        sweet(f"s{i:03d}", f"Sweet {i} {'Chocolate' if i % 3 else 'Gummy'}", f"cat-{i % 40}", 1 + i % 7, 1 + i % 28)
+        for i in range(400)
+    ]
+    index = CatalogIndex(enabled=True)
+    index.load(catalog[:200])
+    for row in catalog[200:]:
+        index.upsert(row)
+
+    cases = [
+        ({}, lambda row: True),
+        ({"category": "cat-7"}, lambda row: row["category"] == "cat-7"),
+        ({"name": "chocolate"}, lambda row: "chocolate" in row["name"].lower()),
+        ({"min_price": Decimal("6")}, lambda row: row["price"] >= 6),
+    ]
+    for filters, matches in cases:
+        newest_first = sorted(
+            (row for row in catalog if matches(row)),
+            key=lambda row: (-int(row["created_at"][8:10]), row["id"])
+        )
+        paged, cursor = [], None
+        while True:
+            rows, cursor = index.search(cursor=decode_cursor(cursor) if cursor else None, limit=7, **filters)
+            paged += ids(rows)
+            if cursor is None:
+                break
+        assert paged == ids(newest_first)
+
+
+def test_diff_reports_drift(index):
+    index.adjust_quantity("a", -1)
+    table = ROWS[:4] + [sweet("f", "Lollipops", "hard candy", 0.99, 6)]
+
+    report = index.diff(table)
+
+    assert not report["consistent"]
+    assert report["missing_from_index"] == ["f"]
+    assert report["not_in_table"] == ["e"]
+    assert report["mismatched"] == {"a": ["quantity"]}
+    assert index.diff(ROWS[:1])["mismatched"] == {"a": ["quantity"]}
+
+
+def test_reconcile_replaces_index_contents(index):
+    index.reconcile(ROWS[:2])
+    rows, _ = index.search()
+    assert ids(rows) == ["b", "a"]
+    assert index.diff(ROWS[:2])["consistent"]
+
+
+def test_reconcile_keeps_writes_made_while_fetching(index):
+    since = index.generation
+    fetched = [dict(row) for row in ROWS]
+
+    index.upsert({**ROWS[0], "price": 9.99})
+    index.remove("b")
+    index.adjust_quantity("c", -4)
+    report = index.reconcile(fetched, since)
+
+    rows = {row["id"]: row for row in index.search(limit=10)[0]}
+    assert report["consistent"]
+    assert rows["a"]["price"] == 9.99
+    assert "b" not in rows
+    assert rows["c"]["quantity"] == 6
+    assert ids(index.search(min_price=Decimal("9"))[0]) == ["a"]
+
+    index.reconcile(fetched, index.generation)
+    assert "b" in {row["id"] for row in index.search(limit=10)[0]}
+
+
+def test_search_endpoint_answers_from_memory(client: TestClient, monkeypatch):
+    monkeypatch.setattr(catalog_index, "enabled", True)
+    catalog_index.load(ROWS)
+    catalog_cache.bump()
+    app.dependency_overrides[get_current_user] = lambda: {"id": "user-1", "role": "user"}
+    app.dependency_overrides[get_pending_user] = pending_user({"id": "user-1", "role": "user"})
+    app.dependency_overrides[get_supabase_client] = lambda: None
+    app.dependency_overrides[get_sweet_repository] = get_supabase_sweet_repository
+
+    try:
+        response = client.get("/api/sweets/search?category=gummy")
+    finally:
+        app.dependency_overrides.clear()
+        catalog_index.load([])
+        catalog_index.loaded_at = None
+
+    assert response.status_code == 200
+    assert ids(response.json()) == ["d", "b"]
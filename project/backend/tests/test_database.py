@@ -0,0 +1,123 @@
+import asyncio
+import threading
+import time
+import anyio
+import pytest
+from app import database
+from app.database import SupabasePool, PoolTimeoutError, acquire_client, run_upstream
+from app.metrics import upstream_calls
+
+
+@pytest.fixture
+def pool():
+    pool = SupabasePool(
+        url="http://localhost:54321",
+        key="header.payload.signature",
+        size=2,
+        acquire_timeout=0.05,
+        request_timeout=1.0,
+        keepalive_connections=4,
+        keepalive_expiry=30.0,
+    )
+    yield pool
+    pool.close()
+
+
+def test_pool_reuses_released_clients(pool: SupabasePool):
+    with pool.client() as first:
+        pass
+    with pool.client() as second:
+        assert second is first
+
+    stats = pool.stats()
+    assert stats["created"] == 1
+    assert stats["in_use"] == 0
+    assert stats["idle"] == 1
+
+
+def test_pool_tracks_clients_in_use(pool: SupabasePool):
+    client = pool.acquire()
+    stats = pool.stats()
+    assert stats["in_use"] == 1
+    assert stats["idle"] == 0
+
+    pool.release(client)
+    assert pool.stats()["in_use"] == 0
+
+
+def test_pool_times_out_when_exhausted(pool: SupabasePool):
+    first = pool.acquire()
+    second = pool.acquire()
+
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+    assert pool.stats()["acquire_timeouts"] == 1
+
+    pool.release(first)
+    pool.release(second)
+
+
+def test_pool_hands_released_client_to_waiter(pool: SupabasePool):
+    pool.acquire_timeout = 2.0
+    first = pool.acquire()
+    second = pool.acquire()
+    acquired = []
+
+    waiter = threading.Thread(target=lambda: acquired.append(pool.acquire()))
+    waiter.start()
+    pool.release(first)
+    waiter.join()
+
+    assert acquired == [first]
+    assert pool.stats()["created"] == 2
+    pool.release(second)
+    pool.release(acquired[0])
+
+
+def test_pool_clears_user_session_on_release(pool: SupabasePool):
+    client = pool.acquire()
+    client._listen_to_auth_events("SIGNED_IN", type("Session", (), {"access_token": "user.access.token"})())
+    assert client.has_session()
+
+    pool.release(client)
+    assert not client.has_session()
+
+
+def test_pool_uses_configured_keepalive_limits(pool: SupabasePool):
+    with pool.client() as client:
+        transport = client.postgrest.session._transport
+        assert transport._pool._max_keepalive_connections == 4
+        assert transport._pool._keepalive_expiry == 30.0
+
+
+def test_run_upstream_overlaps_blocking_calls():
+    def blocking():
+        time.sleep(0.2)
+        return True
+
+    async def run_many():
+        return await asyncio.gather(*(run_upstream(blocking) for _ in range(8)))
+
+    started = time.perf_counter()
+    assert asyncio.run(run_many()) == [True] * 8
+    assert time.perf_counter() - started < 1.0
+
+
+def test_waiting_for_a_pooled_client_does_not_hold_an_upstream_slot(pool: SupabasePool, monkeypatch):
+    pool.acquire_timeout = 2.0
+    first = pool.acquire()
+    second = pool.acquire()
+    before = upstream_calls.value(table="-", operation="_acquire")
+
+    async def run():
+        monkeypatch.setattr(database, "_upstream_limiter", anyio.CapacityLimiter(1))
+        waiter = asyncio.create_task(acquire_client(pool))
+        await asyncio.sleep(0.05)
+        assert await asyncio.wait_for(run_upstream(lambda: True), timeout=1.0)
+        pool.release(first)
+        return await waiter
+
+    assert asyncio.run(run()) is first
+    assert upstream_calls.value(table="-", operation="_acquire") == before
+    pool.release(first)
+    pool.release(second)
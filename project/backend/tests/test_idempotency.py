@@ -0,0 +1,159 @@
+import asyncio
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.idempotency import IdempotencyRecord, LocalIdempotencyStore, idempotency_store
+from app.repositories import get_inventory_repository, memory_store
+from app.repositories.memory import MemoryInventoryRepository
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def shop(client: TestClient, test_admin_data, test_user_data, test_sweet_data):
+    idempotency_store.clear()
+    admin = client.post("/api/auth/register", json=test_admin_data).json()["access_token"]
+    user = client.post("/api/auth/register", json=test_user_data).json()["access_token"]
+    sweet_id = client.post(
+        "/api/sweets", json=test_sweet_data, headers={"Authorization": f"Bearer {admin}"}
+    ).json()["id"]
+    return {
+        "admin": {"Authorization": f"Bearer {admin}"},
+        "user": {"Authorization": f"Bearer {user}"},
+        "sweet_id": sweet_id,
+    }
+
+
+def purchase(client, shop, key=None, quantity=2, headers=None):
+    headers = {**(headers or shop["user"]), **({"Idempotency-Key": key} if key else {})}
+    return client.post(f"/api/sweets/{shop['sweet_id']}/purchase", json={"quantity": quantity}, headers=headers)
+
+
+def test_retried_purchase_is_replayed_without_charging_again(client: TestClient, shop):
+    first = purchase(client, shop, "order-1")
+    retry = purchase(client, shop, "order-1")
+
+    assert first.status_code == retry.status_code == 200
+    assert retry.content == first.content
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert len(memory_store.purchases) == 1
+    assert memory_store.sweets[shop["sweet_id"]]["quantity"] == 48
+
+
+def test_requests_without_a_key_are_not_deduplicated(client: TestClient, shop):
+    purchase(client, shop)
+    purchase(client, shop)
+
+    assert len(memory_store.purchases) == 2
+
+
+def test_key_reuse_with_a_different_body_is_rejected(client: TestClient, shop):
+    purchase(client, shop, "order-1")
+    response = purchase(client, shop, "order-1", quantity=3)
+
+    assert response.status_code == 422
+    assert len(memory_store.purchases) == 1
+
+
+def test_keys_are_scoped_per_user(client: TestClient, shop):
+    purchase(client, shop, "order-1")
+    purchase(client, shop, "order-1", headers=shop["admin"])
+
+    assert len(memory_store.purchases) == 2
+
+
+def test_create_and_restock_are_replayed(client: TestClient, shop, test_sweet_data):
+    headers = {**shop["admin"], "Idempotency-Key": "create-1"}
+    sweet = {**test_sweet_data, "name": "Toffee"}
+    created = [client.post("/api/sweets", json=sweet, headers=headers) for _ in range(2)]
+
+    headers = {**shop["admin"], "Idempotency-Key": "restock-1"}
+    restocked = [
+        client.post(f"/api/sweets/{shop['sweet_id']}/restock", json={"quantity": 5}, headers=headers)
+        for _ in range(2)
+    ]
+
+    assert [response.status_code for response in created] == [201, 201]
+    assert created[0].json()["id"] == created[1].json()["id"]
+    assert len(memory_store.sweets) == 2
+    assert restocked[1].json() == restocked[0].json()
+    assert memory_store.sweets[shop["sweet_id"]]["quantity"] == 55
+
+
+def test_client_errors_are_stored_but_server_errors_are_not(client: TestClient, shop):
+    too_many = purchase(client, shop, "big", quantity=500)
+    memory_store.sweets[shop["sweet_id"]]["quantity"] = 1000
+    assert purchase(client, shop, "big", quantity=500).json() == too_many.json()
+
+    class Failing(MemoryInventoryRepository):
+        async def purchase(self, *args):
+            raise RuntimeError("upstream timeout")
+
+    app.dependency_overrides[get_inventory_repository] = lambda: Failing(memory_store)
+    try:
+        assert purchase(client, shop, "flaky").status_code == 500
+    finally:
+        app.dependency_overrides.clear()
+
+    assert purchase(client, shop, "flaky").status_code == 200
+    assert len(memory_store.purchases) == 1
+
+
+def test_concurrent_duplicates_wait_for_the_first_execution(client: TestClient, shop):
+    calls = []
+
+    class Slow(MemoryInventoryRepository):
+        async def purchase(self, *args):
+            calls.append(args)
+            await asyncio.sleep(0.1)
+            return await super().purchase(*args)
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            headers = {**shop["user"], "Idempotency-Key": "order-1"}
+            url = f"/api/sweets/{shop['sweet_id']}/purchase"
+            return await asyncio.gather(*(http.post(url, json={"quantity": 1}, headers=headers) for _ in range(5)))
+
+    app.dependency_overrides[get_inventory_repository] = lambda: Slow(memory_store)
+    try:
+        responses = asyncio.run(run())
+    finally:
+        app.dependency_overrides.clear()
+
+    assert len(calls) == 1
+    assert {response.status_code for response in responses} == {200}
+    assert len({response.content for response in responses}) == 1
+    assert sum(response.headers.get("Idempotent-Replayed") == "true" for response in responses) == 4
+
+
+def test_local_store_expires_results_and_stale_locks():
+    clock = FakeClock()
+    store = LocalIdempotencyStore(max_keys=10, clock=clock, ttl=60.0, lock_timeout=5.0, wait_timeout=0.0)
+
+    async def run():
+        assert await store.claim("k", "fp") is None
+        with pytest.raises(Exception) as in_progress:
+            await store.claim("k", "fp")
+        assert in_progress.value.status_code == 409
+
+        clock.now = 6.0
+        assert await store.claim("k", "fp") is None
+        await store.complete("k", IdempotencyRecord("fp", 201, b"{}"))
+        clock.now = 60.0
+        replay = await store.claim("k", "fp")
+        clock.now = 67.0
+        return replay, await store.claim("k", "fp")
+
+    replay, expired = asyncio.run(run())
+
+    assert replay.status_code == 201
+    assert expired is None
@@ -0,0 +1,160 @@
+import time
+import pytest
+from jose import jwt
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from pydantic import ValidationError
+from app import auth
+from app.config import DEFAULT_JWT_SECRET_KEY, Settings
+from app.auth import verify_token_locally, get_current_user, get_pending_user, profile_cache, InvalidTokenError
+from app.repositories.supabase import SupabaseUserRepository
+
+SECRET = "current-secret"
+PREVIOUS_SECRET = "previous-secret"
+
+
+@pytest.fixture(autouse=True)
+def jwt_settings(monkeypatch):
+    monkeypatch.setattr(auth.settings, "jwt_secret_key", SECRET)
+    monkeypatch.setattr(auth.settings, "jwt_previous_secret_keys", [PREVIOUS_SECRET])
+    monkeypatch.setattr(auth.settings, "jwt_audience", "authenticated")
+    monkeypatch.setattr(auth.settings, "jwt_local_verification", True)
+    profile_cache.clear()
+
+
+def make_token(key: str = SECRET, **overrides) -> str:
+    claims = {"sub": "user-1", "aud": "authenticated", "exp": int(time.time()) + 3600}
+    claims.update(overrides)
+    return jwt.encode(claims, key, algorithm="HS256")
+
+
+class FakeQuery:
+    def __init__(self, row):
+        self.row = row
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        return type("Response", (), {"data": self.row})()
+
+
+class FakeAuth:
+    def __init__(self):
+        self.calls = 0
+
+    def get_user(self, token):
+        self.calls += 1
+        user = type("User", (), {"id": "user-1"})()
+        return type("UserResponse", (), {"user": user})()
+
+
+class FakeSupabase:
+    def __init__(self, row):
+        self.auth = FakeAuth()
+        self.row = row
+        self.queries = 0
+
+    def table(self, name):
+        self.queries += 1
+        return FakeQuery(self.row)
+
+
+def test_verify_token_with_current_key():
+    claims = verify_token_locally(make_token())
+    assert claims["sub"] == "user-1"
+
+
+def test_verify_token_with_rotated_key():
+    claims = verify_token_locally(make_token(PREVIOUS_SECRET))
+    assert claims["sub"] == "user-1"
+
+
+def test_verify_token_with_unknown_key_is_unverified():
+    assert verify_token_locally(make_token("other-secret")) is None
+
+
+def test_verify_expired_token_is_rejected():
+    with pytest.raises(InvalidTokenError):
+        verify_token_locally(make_token(exp=int(time.time()) - 10))
+
+
+def test_verify_wrong_audience_is_rejected():
+    with pytest.raises(InvalidTokenError):
+        verify_token_locally(make_token(aud="anon"))
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_skips_remote_check_for_local_token():
+    supabase = FakeSupabase({"id": "user-1", "role": "user"})
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=make_token())
+
+    user = await get_current_user(credentials, SupabaseUserRepository(supabase))
+
+    assert user["id"] == "user-1"
+    assert supabase.auth.calls == 0
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_falls_back_to_remote_check():
+    supabase = FakeSupabase({"id": "user-1", "role": "user"})
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=make_token("other-secret"))
+
+    user = await get_current_user(credentials, SupabaseUserRepository(supabase))
+
+    assert user["id"] == "user-1"
+    assert supabase.auth.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_caches_profile_lookups():
+    supabase = FakeSupabase({"id": "user-1", "role": "user"})
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=make_token())
+
+    for _ in range(50):
+        user = await get_current_user(credentials, SupabaseUserRepository(supabase))
+
+    assert user["role"] == "user"
+    assert supabase.queries == 1
+
+
+@pytest.mark.asyncio
+async def test_get_current_user_caches_missing_profiles():
+    supabase = FakeSupabase(None)
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=make_token())
+
+    for _ in range(2):
+        with pytest.raises(HTTPException) as exc_info:
+            await get_current_user(credentials, SupabaseUserRepository(supabase))
+        assert exc_info.value.status_code == 404
+
+    assert supabase.queries == 1
+
+
+@pytest.mark.asyncio
+async def test_pending_user_overlaps_only_locally_verified_tokens():
+    supabase = FakeSupabase({"id": "user-1", "role": "user"})
+    users = SupabaseUserRepository(supabase)
+
+    pending = await get_pending_user(HTTPAuthorizationCredentials(scheme="Bearer", credentials=make_token()), users)
+    assert not pending.done()
+    assert (await pending)["id"] == "user-1"
+
+    remote = await get_pending_user(
+        HTTPAuthorizationCredentials(scheme="Bearer", credentials=make_token("other-secret")), users
+    )
+    assert remote.done() and supabase.auth.calls == 1
+
+    with pytest.raises(HTTPException) as exc_info:
+        await get_pending_user(
+            HTTPAuthorizationCredentials(scheme="Bearer", credentials=make_token(exp=int(time.time()) - 10)), users
+        )
+    assert exc_info.value.status_code == 401
+
+
+@pytest.mark.parametrize("secret", [DEFAULT_JWT_SECRET_KEY, ""])
+def test_local_verification_refuses_placeholder_secret(secret):
+    with pytest.raises(ValidationError, match="JWT_SECRET_KEY"):
+        Settings(storage_backend="memory", jwt_local_verification=True, jwt_secret_key=secret)
+
+    assert Settings(storage_backend="memory", jwt_local_verification=False, jwt_secret_key=secret)
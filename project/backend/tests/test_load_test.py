@@ -0,0 +1,40 @@
+import asyncio
+import httpx
+import pytest
+from app.main import app
+from benchmarks.load_test import Fixture, flash_sale, install_backend, measure, percentile, scenario_requests
+
+
+@pytest.fixture
+def bench_backend():
+    install_backend(latency=0.001, jitter=0.5, seed=1)
+    yield
+    app.dependency_overrides.clear()
+
+
+def test_percentile_uses_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([7.0], 95) == 7.0
+    assert percentile([], 95) == 0.0
+
+
+def test_flash_sale_never_oversells(bench_backend):
+    async def run():
+        fixture = Fixture(sweets=3, users=4, stock=100)
+        await fixture.seed()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            purchases = await measure(client, "purchase", 4, 8, scenario_requests(fixture, cache=False)["purchase"])
+            sale = await flash_sale(client, fixture, buyers=60, stock=10)
+        return purchases, sale
+
+    purchases, sale = asyncio.run(run())
+
+    assert purchases["requests"] == 8 and purchases["errors"] == 0
+    assert set(purchases["latency_ms"]) == {"p50", "p95", "p99", "mean", "max"}
+    assert sale["flash_sale"]["passed"]
+    assert sale["flash_sale"]["sold"] == 10
+    assert sale["flash_sale"]["remaining"] == 0
+    assert sale["status_codes"] == {"200": 10, "400": 50}
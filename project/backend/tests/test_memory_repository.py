@@ -0,0 +1,140 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import pytest
+from fastapi.testclient import TestClient
+from app.repositories import InsufficientStockError, SweetNotFoundError
+from app.repositories.memory import (
+    MemoryStore, MemorySweetRepository, MemoryInventoryRepository, MemoryPurchaseRepository
+)
+
+
+SWEET = {
+    "name": "Fudge",
+    "description": "Butter fudge",
+    "category": "candy",
+    "price": 2.5,
+    "quantity": 10,
+    "image_url": ""
+}
+
+
+@pytest.fixture
+def store():
+    return MemoryStore()
+
+
+def test_concurrent_purchases_never_oversell(store):
+    sweet = asyncio.run(MemorySweetRepository(store).create(dict(SWEET)))
+    inventory = MemoryInventoryRepository(store)
+    barrier = threading.Barrier(50)
+
+    def buy(user_id):
+        barrier.wait()
+        try:
+            return asyncio.run(inventory.purchase(user_id, sweet["id"], 1))
+        except InsufficientStockError as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=50) as executor:
+        results = list(executor.map(buy, [f"user-{i}" for i in range(50)]))
+
+    sold = [result for result in results if isinstance(result, dict)]
+    rejected = [result for result in results if isinstance(result, InsufficientStockError)]
+    assert len(sold) == 10
+    assert len(rejected) == 40
+    assert store.sweets[sweet["id"]]["quantity"] == 0
+    assert len(store.purchases) == 10
+
+
+@pytest.mark.asyncio
+async def test_checkout_is_all_or_nothing(store):
+    sweets = MemorySweetRepository(store)
+    fudge = await sweets.create(dict(SWEET))
+    toffee = await sweets.create({**SWEET, "name": "Toffee", "quantity": 1})
+    inventory = MemoryInventoryRepository(store)
+
+    with pytest.raises(InsufficientStockError) as excinfo:
+        await inventory.checkout("user-1", [
+            {"sweet_id": fudge["id"], "quantity": 3},
+            {"sweet_id": toffee["id"], "quantity": 2}
+        ])
+
+    assert excinfo.value.sweet_id == toffee["id"]
+    assert excinfo.value.available == 1
+    assert store.sweets[fudge["id"]]["quantity"] == 10
+    assert store.purchases == []
+
+    with pytest.raises(SweetNotFoundError):
+        await inventory.checkout("user-1", [{"sweet_id": "missing", "quantity": 1}])
+
+
+@pytest.mark.asyncio
+async def test_checkout_merges_repeated_sweets_into_one_purchase(store):
+    sweets = MemorySweetRepository(store)
+    fudge = await sweets.create(dict(SWEET))
+    toffee = await sweets.create({**SWEET, "name": "Toffee", "price": 1.0})
+    inventory = MemoryInventoryRepository(store)
+
+    rows = await inventory.checkout("user-1", [
+        {"sweet_id": fudge["id"], "quantity": 2},
+        {"sweet_id": toffee["id"], "quantity": 1},
+        {"sweet_id": fudge["id"], "quantity": 3}
+    ])
+
+    assert [(row["sweet_id"], row["quantity"]) for row in rows] == sorted(
+        [(fudge["id"], 5), (toffee["id"], 1)]
+    )
+    assert {row["sweet_id"]: float(row["total_price"]) for row in rows} == {fudge["id"]: 12.5, toffee["id"]: 1.0}
+    assert len(store.purchases) == 2
+    assert store.sweets[fudge["id"]]["quantity"] == 5
+
+
+@pytest.mark.asyncio
+async def test_purchases_feed_export_and_sales_summary(store):
+    sweet = await MemorySweetRepository(store).create(dict(SWEET))
+    inventory = MemoryInventoryRepository(store)
+    for _ in range(3):
+        await inventory.purchase("user-1", sweet["id"], 2)
+
+    purchases = MemoryPurchaseRepository(store)
+    rows, cursor = await purchases.export_page([("sweet_id", "eq", sweet["id"])], None, 2)
+    assert len(rows) == 2 and cursor is not None
+    rest, cursor = await purchases.export_page([], cursor, 2)
+    assert len(rest) == 1 and cursor is None
+
+    moment = datetime.fromisoformat(store.purchases[0]["purchased_at"])
+    summary = await purchases.sales_summary(moment - timedelta(days=1), moment + timedelta(days=1), "day", 10)
+    assert summary["units"] == 6
+    assert summary["revenue"] == 15
+    assert summary["top_sellers"][0]["name"] == "Fudge"
+
+
+def test_api_runs_end_to_end_in_memory(client: TestClient, test_user_data, test_admin_data, test_sweet_data):
+    admin = client.post("/api/auth/register", json=test_admin_data).json()
+    assert admin["user"]["role"] == "admin"
+    admin_headers = {"Authorization": f"Bearer {admin['access_token']}"}
+
+    created = client.post("/api/sweets", json=test_sweet_data, headers=admin_headers)
+    assert created.status_code == 201
+    sweet_id = created.json()["id"]
+
+    client.post("/api/auth/register", json=test_user_data)
+    login = client.post("/api/auth/login", json={
+        "email": test_user_data["email"],
+        "password": test_user_data["password"]
+    })
+    assert login.status_code == 200
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    purchase = client.post(f"/api/sweets/{sweet_id}/purchase", json={"quantity": 2}, headers=headers)
+    assert purchase.status_code == 200
+    assert float(purchase.json()["total_price"]) == pytest.approx(7.98)
+
+    restock = client.post(f"/api/sweets/{sweet_id}/restock", json={"quantity": 5}, headers=admin_headers)
+    assert restock.status_code == 200
+    assert restock.json()["quantity"] == 53
+
+    listing = client.get("/api/sweets/search?name=choc", headers=headers)
+    assert [sweet["id"] for sweet in listing.json()] == [sweet_id]
@@ -0,0 +1,73 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from postgrest import SyncPostgrestClient
+from app.database import run_upstream
+from app.metrics import (
+    Histogram, MetricsMiddleware, http_requests, upstream_calls, upstream_labels
+)
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    histogram.observe(0.05, route="/a")
+    histogram.observe(0.5, route="/a")
+    histogram.observe(5.0, route="/a")
+
+    assert histogram.samples() == [
+        'latency_seconds_bucket{route="/a",le="0.1"} 1',
+        'latency_seconds_bucket{route="/a",le="1"} 2',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 3',
+        'latency_seconds_sum{route="/a"} 5.55',
+        'latency_seconds_count{route="/a"} 3',
+    ]
+
+
+def test_upstream_labels_describe_table_and_operation():
+    postgrest = SyncPostgrestClient("http://localhost:3000")
+
+    assert upstream_labels(postgrest.from_("sweets").select("*").execute) == ("sweets", "select")
+    assert upstream_labels(postgrest.from_("sweets").update({"quantity": 1}).eq("id", "a").execute) == ("sweets", "update")
+    assert upstream_labels(postgrest.from_("sweets").upsert({"name": "a"}).execute) == ("sweets", "upsert")
+    assert upstream_labels(postgrest.rpc("purchase_sweet", {}).execute) == ("purchase_sweet", "rpc")
+
+
+class FakeQuery:
+    path = "/profiles"
+    http_method = "GET"
+    headers = {}
+
+    def execute(self):
+        return "ok"
+
+
+def test_server_timing_breaks_down_upstream_calls():
+    timed = FastAPI()
+
+    @timed.get("/items/{item_id}")
+    async def read_item(item_id: str):
+        await run_upstream(FakeQuery().execute)
+        await run_upstream(FakeQuery().execute)
+        return {"id": item_id}
+
+    timed.add_middleware(MetricsMiddleware, routes=timed.router.routes, server_timing=True)
+    before = upstream_calls.value(table="profiles", operation="select")
+
+    response = TestClient(timed).get("/items/1")
+
+    header = response.headers["server-timing"]
+    assert header.startswith('upstream;dur=')
+    assert 'desc="2 calls"' in header
+    assert 'profiles.select;dur=' in header
+    assert upstream_calls.value(table="profiles", operation="select") == before + 2
+    assert http_requests.value(method="GET", route="/items/{item_id}", status="200") == 1
+
+
+def test_metrics_endpoint_exposes_prometheus_text(client: TestClient):
+    client.get("/health")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert "# TYPE http_request_duration_seconds histogram" in response.text
+    assert 'http_requests_total{method="GET",route="/health",status="200"}' in response.text
@@ -0,0 +1,84 @@
+import pytest
+from fastapi.testclient import TestClient
+from postgrest import APIError
+from app.main import app
+from app.auth import get_current_user
+from app.database import get_supabase_admin_client
+from app.repositories import get_inventory_repository, get_supabase_inventory_repository
+
+
+class FakeRPC:
+    def __init__(self):
+        self.result = None
+        self.error = None
+        self.calls = []
+
+    def rpc(self, fn, params):
+        self.calls.append((fn, params))
+        return self
+
+    def execute(self):
+        if self.error:
+            raise self.error
+        return type("Response", (), {"data": self.result})()
+
+
+@pytest.fixture
+def checkout_client(client: TestClient):
+    fake = FakeRPC()
+    app.dependency_overrides[get_current_user] = lambda: {"id": "user-1", "role": "user"}
+    app.dependency_overrides[get_supabase_admin_client] = lambda: fake
+    app.dependency_overrides[get_inventory_repository] = get_supabase_inventory_repository
+    yield client, fake
+    app.dependency_overrides.clear()
+
+
+def purchase_row(sweet_id: str, quantity: int, total_price: str) -> dict:
+    return {
+        "id": f"purchase-{sweet_id}",
+        "user_id": "user-1",
+        "sweet_id": sweet_id,
+        "quantity": quantity,
+        "total_price": total_price,
+        "purchased_at": "2025-12-14T10:00:00+00:00"
+    }
+
+
+def test_checkout_sends_all_lines_in_one_call(checkout_client):
+    client, fake = checkout_client
+    fake.result = [purchase_row("a", 2, "5.98"), purchase_row("b", 1, "0.99")]
+
+    response = client.post("/api/orders/checkout", json={
+        "items": [{"sweet_id": "a", "quantity": 2}, {"sweet_id": "b", "quantity": 1}]
+    })
+
+    assert response.status_code == 201
+    data = response.json()
+    assert len(data["items"]) == 2
+    assert data["total_price"] == "6.97"
+    assert len(fake.calls) == 1
+    assert fake.calls[0][0] == "checkout_order"
+
+
+def test_checkout_rejects_empty_basket(checkout_client):
+    client, fake = checkout_client
+
+    response = client.post("/api/orders/checkout", json={"items": []})
+
+    assert response.status_code == 422
+    assert fake.calls == []
+
+
+def test_checkout_insufficient_stock(checkout_client):
+    client, fake = checkout_client
+    fake.error = APIError({
+        "code": "SW409",
+        "message": "Not enough stock",
+        "details": '{"sweet_id" : "b", "available" : 0}',
+        "hint": None
+    })
+
+    response = client.post("/api/orders/checkout", json={"items": [{"sweet_id": "b", "quantity": 1}]})
+
+    assert response.status_code == 400
+    assert "stock" in response.json()["detail"].lower()
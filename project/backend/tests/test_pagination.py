@@ -0,0 +1,181 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from postgrest import SyncPostgrestClient
+from app.main import app
+from app.auth import get_current_user, get_pending_user
+from app.catalog_cache import catalog_cache
+from app.database import get_supabase_client
+from app.repositories import get_supabase_sweet_repository, get_sweet_repository, get_user_repository
+from app.pagination import (
+    apply_keyset, decode_cursor, encode_cursor, split_page, InvalidCursorError
+)
+from tests.conftest import pending_user
+
+ROWS = [
+    {
+        "id": f"sweet-{i}",
+        "name": f"Sweet {i}",
+        "description": "",
+        "category": "chocolate",
+        "price": 1.5,
+        "quantity": 10,
+        "image_url": "",
+        "created_at": f"2025-12-{20 - i:02d}T10:00:00+00:00",
+        "updated_at": f"2025-12-{20 - i:02d}T10:00:00+00:00"
+    }
+    for i in range(5)
+]
+
+
+class FakeQuery:
+    def __init__(self, supabase):
+        self.supabase = supabase
+
+    def __getattr__(self, name):
+        def record(*args, **kwargs):
+            self.supabase.calls.append((name, args))
+            return self
+        return record
+
+    def select(self, columns):
+        self.supabase.calls.append(("select", (columns,)))
+        return self
+
+    def execute(self):
+        limit = next(args[0] for name, args in self.supabase.calls if name == "limit")
+        return type("Response", (), {"data": ROWS[:limit]})()
+
+
+class FakeSupabase:
+    def __init__(self):
+        self.calls = []
+
+    def table(self, name):
+        return FakeQuery(self)
+
+
+@pytest.fixture
+def catalog_client(client: TestClient):
+    fake = FakeSupabase()
+    catalog_cache.bump()
+    app.dependency_overrides[get_current_user] = lambda: {"id": "user-1", "role": "user"}
+    app.dependency_overrides[get_pending_user] = pending_user({"id": "user-1", "role": "user"})
+    app.dependency_overrides[get_supabase_client] = lambda: fake
+    app.dependency_overrides[get_sweet_repository] = get_supabase_sweet_repository
+    yield client, fake
+    app.dependency_overrides.clear()
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor("2025-12-14T10:00:00+00:00", "sweet-1")
+    assert decode_cursor(cursor) == ("2025-12-14T10:00:00+00:00", "sweet-1")
+
+
+def test_invalid_cursor_is_rejected():
+    with pytest.raises(InvalidCursorError):
+        decode_cursor("not-a-cursor")
+
+
+def test_apply_keyset_builds_seek_filter():
+    query = SyncPostgrestClient("http://localhost:3000").from_("sweets").select("*")
+    query = apply_keyset(query, "created_at", ("2025-12-14T10:00:00+00:00", "sweet-1"), 10)
+
+    assert query.params["order"] == "created_at.desc,id"
+    assert query.params["limit"] == "11"
+    assert query.params["or"] == (
+        '(created_at.lt."2025-12-14T10:00:00+00:00",'
+        'and(created_at.eq."2025-12-14T10:00:00+00:00",id.gt."sweet-1"))'
+    )
+
+
+def test_split_page_returns_cursor_for_last_row():
+    rows, cursor = split_page(ROWS, "created_at", 2)
+    assert [row["id"] for row in rows] == ["sweet-0", "sweet-1"]
+    assert decode_cursor(cursor) == (ROWS[1]["created_at"], "sweet-1")
+
+    rows, cursor = split_page(ROWS, "created_at", 5)
+    assert len(rows) == 5
+    assert cursor is None
+
+
+def test_get_sweets_returns_page_and_next_cursor(catalog_client):
+    client, fake = catalog_client
+
+    response = client.get("/api/sweets?limit=2")
+
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+    assert decode_cursor(response.headers["X-Next-Cursor"]) == (ROWS[1]["created_at"], "sweet-1")
+
+
+def test_get_sweets_projects_requested_fields(catalog_client):
+    client, fake = catalog_client
+
+    response = client.get("/api/sweets?fields=id,name,price,quantity")
+
+    assert response.status_code == 200
+    assert response.json()[0] == {"id": "sweet-0", "name": "Sweet 0", "price": "1.5", "quantity": 10}
+    assert ("select", ("id,name,price,quantity,created_at",)) in fake.calls
+
+
+def test_get_sweets_rejects_unknown_fields(catalog_client):
+    client, fake = catalog_client
+
+    response = client.get("/api/sweets?fields=id,secret")
+
+    assert response.status_code == 400
+
+
+def test_get_sweets_rejects_bad_cursor(catalog_client):
+    client, fake = catalog_client
+
+    response = client.get("/api/sweets?cursor=garbage")
+
+    assert response.status_code == 400
+
+
+def test_failed_auth_cancels_catalog_load(client: TestClient):
+    fake = FakeSupabase()
+    catalog_cache.bump()
+
+    async def rejected():
+        async def fail():
+            raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+        return asyncio.ensure_future(fail())
+
+    app.dependency_overrides[get_pending_user] = rejected
+    app.dependency_overrides[get_supabase_client] = lambda: fake
+    app.dependency_overrides[get_sweet_repository] = get_supabase_sweet_repository
+    try:
+        response = client.get("/api/sweets")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 401
+    assert catalog_cache.stats()["size"] == 0
+
+
+class SlowRejectingUsers:
+    async def get_user_id(self, token):
+        await asyncio.sleep(0.05)
+        return None
+
+
+def test_invalid_token_never_reaches_the_catalog(client: TestClient):
+    fake = FakeSupabase()
+    catalog_cache.bump()
+    app.dependency_overrides[get_user_repository] = SlowRejectingUsers
+    app.dependency_overrides[get_supabase_client] = lambda: fake
+    app.dependency_overrides[get_sweet_repository] = get_supabase_sweet_repository
+    try:
+        responses = [
+            client.get(path, headers={"Authorization": "Bearer not-a-token"})
+            for path in ("/api/sweets", "/api/sweets/search?name=sweet")
+        ]
+    finally:
+        app.dependency_overrides.clear()
+
+    assert [response.status_code for response in responses] == [401, 401]
+    assert fake.calls == []
@@ -0,0 +1,110 @@
+import asyncio
+import pytest
+from fastapi.testclient import TestClient
+from app.repositories import memory_store
+from app.repositories.supabase import SupabasePurchaseRepository
+
+
+def record(purchase_id, user_id, sweet_id, purchased_at):
+    memory_store.purchases.append({
+        "id": purchase_id,
+        "user_id": user_id,
+        "sweet_id": sweet_id,
+        "quantity": 1,
+        "total_price": 3.99,
+        "purchased_at": purchased_at
+    })
+
+
+@pytest.fixture
+def history(client: TestClient, test_admin_data, test_user_data, test_sweet_data):
+    admin = client.post("/api/auth/register", json=test_admin_data).json()["access_token"]
+    user = client.post("/api/auth/register", json=test_user_data).json()
+    admin_headers = {"Authorization": f"Bearer {admin}"}
+    user_headers = {"Authorization": f"Bearer {user['access_token']}"}
+    sweet_id = client.post("/api/sweets", json=test_sweet_data, headers=admin_headers).json()["id"]
+    user_id = user["user"]["id"]
+
+    for day in range(1, 5):
+        record(f"mine-{day}", user_id, sweet_id, f"2025-12-0{day}T10:00:00+00:00")
+    record("mine-4b", user_id, sweet_id, "2025-12-04T10:00:00+00:00")
+    record("theirs-3", "someone-else", sweet_id, "2025-12-03T12:00:00+00:00")
+    record("mine-other", user_id, "other-sweet", "2025-12-02T12:00:00+00:00")
+
+    return {"admin": admin_headers, "user": user_headers, "sweet_id": sweet_id}
+
+
+def pages(client, url, headers, **params):
+    result, cursor = [], None
+    while True:
+        response = client.get(url, params={**params, **({"cursor": cursor} if cursor else {})}, headers=headers)
+        assert response.status_code == 200
+        result.append([row["id"] for row in response.json()])
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return result
+
+
+def test_my_purchases_are_keyset_paginated_newest_first(client: TestClient, history):
+    assert pages(client, "/api/purchases/me", history["user"], limit=2) == [
+        ["mine-4", "mine-4b"],
+        ["mine-3", "mine-other"],
+        ["mine-2", "mine-1"],
+    ]
+
+
+def test_sweet_purchases_are_admin_only(client: TestClient, history):
+    url = f"/api/sweets/{history['sweet_id']}/purchases"
+
+    assert client.get(url, headers=history["user"]).status_code == 403
+    assert pages(client, url, history["admin"], limit=3) == [
+        ["mine-4", "mine-4b", "theirs-3"],
+        ["mine-3", "mine-2", "mine-1"],
+    ]
+
+
+def test_sweet_details_are_joined_only_when_requested(client: TestClient, history):
+    plain = client.get("/api/purchases/me", params={"limit": 1}, headers=history["user"]).json()[0]
+    joined = client.get(
+        "/api/purchases/me", params={"limit": 1, "include_sweet": True}, headers=history["user"]
+    ).json()[0]
+
+    assert "sweet" not in plain
+    assert joined["sweet"] == {"name": "Test Chocolate", "price": "3.99"}
+    assert {key: value for key, value in joined.items() if key != "sweet"} == plain
+
+
+def test_invalid_cursor_and_limit_are_rejected(client: TestClient, history):
+    assert client.get("/api/purchases/me", params={"cursor": "nope"}, headers=history["user"]).status_code == 400
+    assert client.get("/api/purchases/me", params={"limit": 1000}, headers=history["user"]).status_code == 422
+    assert client.get("/api/purchases/me").status_code == 401
+
+
+class RecordingQuery:
+    def __init__(self, calls):
+        self.calls = calls
+
+    def __getattr__(self, name):
+        def method(*args):
+            self.calls.append((name, args))
+            return self
+        return method
+
+    def execute(self):
+        return type("Response", (), {"data": []})()
+
+
+def test_supabase_history_uses_one_keyset_query_with_embedded_sweet():
+    calls = []
+    client = type("Client", (), {"table": lambda self, name: calls.append(("table", (name,))) or RecordingQuery(calls)})()
+
+    rows, cursor = asyncio.run(SupabasePurchaseRepository(client).history_page(
+        "user_id", "user-1", ("2025-12-04T10:00:00+00:00", "mine-4"), 2, True
+    ))
+
+    assert (rows, cursor) == ([], None)
+    assert calls[0] == ("table", ("purchases",))
+    assert calls[1] == ("select", ("id,user_id,sweet_id,quantity,total_price,purchased_at,sweet:sweets(name,price)",))
+    assert calls[2] == ("eq", ("user_id", "user-1"))
+    assert [name for name, _ in calls[3:]] == ["or_", "order", "limit"]
+    assert calls[4] == ("order", ("purchased_at.desc,id",))
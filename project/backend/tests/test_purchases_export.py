@@ -0,0 +1,138 @@
+import csv
+import io
+import json
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.auth import get_current_admin_user
+from app.config import get_settings
+from app.database import get_supabase_admin_pool
+from app.repositories import get_purchase_lease, get_supabase_purchase_lease
+
+PURCHASES = [
+    {
+        "id": f"purchase-{i}",
+        "user_id": "user-1",
+        "sweet_id": "sweet-1",
+        "quantity": 1,
+        "total_price": 1.5,
+        "purchased_at": f"2025-12-{20 - i:02d}T10:00:00+00:00"
+    }
+    for i in range(5)
+]
+
+
+class FakeQuery:
+    def __init__(self, supabase):
+        self.supabase = supabase
+        self.offset = 0
+        self.limit_to = None
+
+    def __getattr__(self, name):
+        def record(*args, **kwargs):
+            self.supabase.calls.append((name, args))
+            return self
+        return record
+
+    def or_(self, seek):
+        self.offset = next(
+            i + 1 for i, row in enumerate(PURCHASES) if f'id.gt."{row["id"]}"' in seek
+        )
+        return self
+
+    def limit(self, count):
+        self.limit_to = count
+        return self
+
+    def execute(self):
+        if self.supabase.error:
+            raise self.supabase.error
+        self.supabase.pages += 1
+        return type("Response", (), {"data": PURCHASES[self.offset:self.offset + self.limit_to]})()
+
+
+class FakeSupabase:
+    def __init__(self):
+        self.calls = []
+        self.pages = 0
+        self.error = None
+
+    def table(self, name):
+        return FakeQuery(self)
+
+
+class FakePool:
+    def __init__(self):
+        self.client = FakeSupabase()
+        self.leased = 0
+
+    def acquire(self):
+        self.leased += 1
+        return self.client
+
+    def release(self, client):
+        self.leased -= 1
+
+
+@pytest.fixture
+def export_client(client: TestClient, monkeypatch):
+    pool = FakePool()
+    monkeypatch.setattr(get_settings(), "export_batch_size", 2)
+    app.dependency_overrides[get_current_admin_user] = lambda: {"id": "admin-1", "role": "admin"}
+    app.dependency_overrides[get_supabase_admin_pool] = lambda: pool
+    app.dependency_overrides[get_purchase_lease] = get_supabase_purchase_lease
+    yield client, pool
+    app.dependency_overrides.clear()
+
+
+def test_export_streams_every_page_as_ndjson(export_client):
+    client, pool = export_client
+
+    response = client.get("/api/purchases/export", headers={"Accept-Encoding": "identity"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == [row["id"] for row in PURCHASES]
+    assert pool.client.pages == 3
+    assert pool.leased == 0
+
+
+def test_export_csv_is_gzipped_when_accepted(export_client):
+    client, _ = export_client
+
+    response = client.get(
+        "/api/purchases/export?format=csv",
+        headers={"Accept-Encoding": "gzip"}
+    )
+
+    assert response.headers["content-encoding"] == "gzip"
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 5
+    assert rows[0]["id"] == "purchase-0"
+
+
+def test_export_applies_filters(export_client):
+    client, pool = export_client
+
+    client.get(
+        "/api/purchases/export",
+        params={"from": "2025-12-01T00:00:00Z", "to": "2025-12-31T00:00:00Z", "sweet_id": "sweet-1", "user_id": "user-1"}
+    )
+
+    filters = [call for call in pool.client.calls if call[0] in ("gte", "lt", "eq")]
+    assert ("gte", ("purchased_at", "2025-12-01T00:00:00+00:00")) in filters
+    assert ("lt", ("purchased_at", "2025-12-31T00:00:00+00:00")) in filters
+    assert ("eq", ("sweet_id", "sweet-1")) in filters
+    assert ("eq", ("user_id", "user-1")) in filters
+
+
+def test_export_upstream_failure_releases_client(export_client):
+    client, pool = export_client
+
+    pool.client.error = RuntimeError("upstream down")
+
+    response = client.get("/api/purchases/export")
+
+    assert response.status_code == 500
+    assert pool.leased == 0
@@ -0,0 +1,166 @@
+import anyio
+import pytest
+from fastapi.testclient import TestClient
+from app import rate_limit
+from app.config import get_settings
+from app.metrics import rate_limit_rejections
+from app.rate_limit import AdmissionLimiter, TokenBucketLimiter, parse_rate
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def limits_enabled(monkeypatch):
+    monkeypatch.setattr(get_settings(), "rate_limit_enabled", True)
+    monkeypatch.setattr(rate_limit, "limiters", {})
+    monkeypatch.setattr(rate_limit, "admission", AdmissionLimiter(4, 4, 1.0))
+    return rate_limit
+
+
+def test_parse_rate():
+    assert parse_rate("10/minute") == (10, 60.0)
+    assert parse_rate(" 5 / second ") == (5, 1.0)
+    assert parse_rate("") is None
+    assert parse_rate("0/hour") is None
+    with pytest.raises(ValueError):
+        parse_rate("10 per minute")
+
+
+def test_token_bucket_refills_at_rate():
+    clock = FakeClock()
+    limiter = TokenBucketLimiter(3, 60.0, clock=clock)
+
+    assert [limiter.take("a") for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.take("a") == pytest.approx(20.0)
+    assert limiter.take("b") == 0.0
+
+    clock.now = 20.0
+    assert limiter.take("a") == 0.0
+    assert limiter.take("a") == pytest.approx(20.0)
+    assert limiter.stats()["rejected"] == 2
+
+
+def test_token_bucket_evicts_least_recent_keys():
+    limiter = TokenBucketLimiter(1, 60.0, max_keys=2, clock=FakeClock())
+
+    for key in ("a", "b", "c"):
+        limiter.take(key)
+
+    assert limiter.stats()["tracked_keys"] == 2
+    assert limiter.take("a") == 0.0
+    assert limiter.take("c") > 0
+
+
+def test_admission_sheds_when_queue_is_full():
+    limiter = AdmissionLimiter(max_concurrency=1, max_queue=1, queue_timeout=5.0)
+    outcomes = []
+
+    async def run():
+        assert await limiter.acquire() is None
+
+        async def queued():
+            outcomes.append(await limiter.acquire())
+
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(queued)
+            await anyio.wait_all_tasks_blocked()
+            outcomes.append(await limiter.acquire())
+            limiter.release()
+
+        limiter.release()
+
+    anyio.run(run)
+
+    assert outcomes == ["queue_full", None]
+    assert limiter.stats()["active"] == 0
+    assert limiter.stats()["waiting"] == 0
+
+
+def test_admission_times_out_waiting():
+    limiter = AdmissionLimiter(max_concurrency=1, max_queue=5, queue_timeout=0.01)
+
+    async def run():
+        await limiter.acquire()
+        return await limiter.acquire()
+
+    assert anyio.run(run) == "queue_timeout"
+    assert limiter.timed_out == 1
+
+
+def test_login_is_limited_per_email(client: TestClient, test_user_data, limits_enabled):
+    limits_enabled.limiters[("login", "user")] = TokenBucketLimiter(2, 60.0)
+    credentials = {"email": test_user_data["email"], "password": "wrong-password"}
+    before = rate_limit_rejections.value(route="login", reason="user")
+
+    statuses = [client.post("/api/auth/login", json=credentials).status_code for _ in range(3)]
+    other = client.post("/api/auth/login", json={**credentials, "email": "other@example.com"})
+    response = client.post("/api/auth/login", json={**credentials, "email": credentials["email"].upper()})
+
+    assert statuses == [401, 401, 429]
+    assert other.status_code == 401
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) == 30
+    assert rate_limit_rejections.value(route="login", reason="user") == before + 2
+
+
+def test_register_is_limited_per_ip(client: TestClient, limits_enabled):
+    limits_enabled.limiters[("register", "ip")] = TokenBucketLimiter(1, 3600.0)
+
+    first = client.post("/api/auth/register", json={"email": "a@example.com", "password": "password123"})
+    second = client.post("/api/auth/register", json={"email": "b@example.com", "password": "password123"})
+
+    assert first.status_code == 201
+    assert second.status_code == 429
+    assert second.headers["Retry-After"] == "3600"
+
+
+def test_purchase_is_limited_per_user(client: TestClient, test_admin_data, test_user_data, test_sweet_data, limits_enabled):
+    admin = client.post("/api/auth/register", json=test_admin_data).json()
+    user = client.post("/api/auth/register", json=test_user_data).json()
+    sweet = client.post(
+        "/api/sweets", json=test_sweet_data, headers={"Authorization": f"Bearer {admin['access_token']}"}
+    ).json()
+    limits_enabled.limiters[("purchase", "user")] = TokenBucketLimiter(1, 60.0)
+
+    def purchase(token):
+        return client.post(
+            f"/api/sweets/{sweet['id']}/purchase",
+            json={"quantity": 1},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+
+    assert purchase(user["access_token"]).status_code == 200
+    assert purchase(user["access_token"]).status_code == 429
+    assert purchase(admin["access_token"]).status_code == 200
+
+
+def test_overload_is_shed_before_upstream(client: TestClient, test_user_data, limits_enabled, monkeypatch):
+    admission = AdmissionLimiter(max_concurrency=1, max_queue=0, queue_timeout=1.0)
+    monkeypatch.setattr(rate_limit, "admission", admission)
+    anyio.run(admission.acquire)
+
+    response = client.post("/api/auth/register", json=test_user_data)
+    admission.release()
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
+    assert admission.stats()["queue_full"] == 1
+    assert client.post("/api/auth/register", json=test_user_data).status_code == 201
+    assert admission.stats()["active"] == 0
+
+
+def test_rate_limit_stats(client: TestClient, test_admin_data, limits_enabled):
+    limits_enabled.limiters[("login", "ip")] = TokenBucketLimiter(30, 60.0)
+    token = client.post("/api/auth/register", json=test_admin_data).json()["access_token"]
+
+    stats = client.get("/api/admin/rate-limits", headers={"Authorization": f"Bearer {token}"}).json()
+
+    assert stats["enabled"] is True
+    assert stats["admission"]["admitted"] == 1
+    assert stats["limits"]["login:ip"]["capacity"] == 30
@@ -0,0 +1,153 @@
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+from app import database
+from app.database import HealthCheckedTransport, SupabasePool, read_pool
+from app.replicas import ReplicaSet, SessionPins, replica_set, session_key, session_pins
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def request(headers=None):
+    raw = [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+@pytest.fixture
+def replicas(monkeypatch):
+    configured = ReplicaSet(["http://replica-a/", "http://replica-b"], failure_threshold=2, ejection_time=30)
+    monkeypatch.setattr(replica_set, "members", configured.members)
+    monkeypatch.setattr(replica_set, "failure_threshold", configured.failure_threshold)
+    monkeypatch.setattr(database, "_pools", {})
+    session_pins.clear()
+    yield replica_set.members
+    session_pins.clear()
+
+
+def test_replicas_are_picked_round_robin_and_ejected_after_failures():
+    clock = Clock()
+    replicas = ReplicaSet(["http://a", "http://b"], failure_threshold=2, ejection_time=30, clock=clock)
+    a, b = replicas.members
+
+    assert [replicas.pick().url for _ in range(4)] == ["http://a", "http://b", "http://a", "http://b"]
+
+    replicas.record(a, False)
+    replicas.record(a, True)
+    replicas.record(a, False)
+    assert replicas.pick() is not None and a.ejections == 0
+
+    replicas.record(a, False)
+    assert a.ejections == 1
+    assert {replicas.pick().url for _ in range(3)} == {"http://b"}
+
+    clock.now += 31
+    assert {replicas.pick().url for _ in range(2)} == {"http://a", "http://b"}
+
+
+def test_all_replicas_ejected_falls_back_to_primary():
+    replicas = ReplicaSet(["http://a"], failure_threshold=1, ejection_time=30, clock=Clock())
+    replicas.record(replicas.members[0], False)
+
+    assert replicas.pick() is None
+    assert replicas.stats()["fallbacks"] == 1
+    assert replicas.stats()["replicas"][0]["healthy"] is False
+
+
+def test_session_pins_expire_and_are_bounded():
+    clock = Clock()
+    pins = SessionPins(window=5, max_sessions=2, clock=clock)
+
+    pins.pin("a")
+    pins.pin("b")
+    pins.pin("c")
+    assert not pins.pinned("a")
+    assert pins.pinned("b") and pins.pinned("c")
+
+    clock.now += 5
+    assert not pins.pinned("b")
+    assert pins.stats()["pinned_sessions"] == 1
+
+
+def test_reads_go_to_replicas_unless_primary_is_required(replicas):
+    token = {"Authorization": "Bearer token"}
+
+    assert read_pool("anon", request(token)).url == "http://replica-a"
+    assert read_pool("anon", request(token)).url == "http://replica-b"
+    assert read_pool("anon", request({**token, "X-Read-Consistency": "primary"})).url == database.settings.supabase_url
+
+    session_pins.pin(session_key("Bearer token"))
+    assert read_pool("anon", request(token)).url == database.settings.supabase_url
+    assert read_pool("anon", request({"Authorization": "Bearer other"})).url.startswith("http://replica-")
+
+
+def test_health_checked_transport_reports_failures():
+    results = []
+
+    def handler(request):
+        if request.url.path == "/down":
+            raise httpx.ConnectError("refused")
+        return httpx.Response(503 if request.url.path == "/busy" else 200)
+
+    http = httpx.Client(transport=HealthCheckedTransport(httpx.MockTransport(handler), results.append))
+    http.get("http://replica/ok")
+    http.get("http://replica/busy")
+    with pytest.raises(httpx.ConnectError):
+        http.get("http://replica/down")
+
+    assert results == [True, False, False]
+
+
+def test_failing_replica_is_ejected_through_its_pool(replicas):
+    pool = SupabasePool(
+        url=replicas[0].url,
+        key="header.payload.signature",
+        size=1,
+        acquire_timeout=0.05,
+        request_timeout=1.0,
+        keepalive_connections=1,
+        keepalive_expiry=30.0,
+        on_result=lambda ok: replica_set.record(replicas[0], ok),
+    )
+    with pool.client() as client:
+        client.postgrest.session._transport._transport = httpx.MockTransport(lambda request: httpx.Response(500))
+        for _ in range(2):
+            with pytest.raises(Exception):
+                client.table("sweets").select("*").execute()
+    pool.close()
+
+    assert replicas[0].ejections == 1
+    assert {read_pool("anon", request()).url for _ in range(3)} == {"http://replica-b"}
+
+
+def test_only_successful_opted_in_writes_pin_the_session(client: TestClient, replicas, test_admin_data, test_sweet_data):
+    token = client.post("/api/auth/register", json=test_admin_data).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    key = session_key(headers["Authorization"])
+
+    assert client.post("/api/sweets", json={}, headers={**headers, "X-Read-Your-Writes": "true"}).status_code == 422
+    assert not session_pins.pinned(key)
+
+    assert client.post("/api/sweets", json=test_sweet_data, headers=headers).status_code == 201
+    assert not session_pins.pinned(key)
+
+    client.post("/api/sweets", json={**test_sweet_data, "name": "Fudge"}, headers={**headers, "X-Read-Your-Writes": "true"})
+    assert session_pins.pinned(key)
+
+
+def test_admin_can_see_replica_health(client: TestClient, replicas, test_admin_data, test_user_data):
+    admin = client.post("/api/auth/register", json=test_admin_data).json()["access_token"]
+    user = client.post("/api/auth/register", json=test_user_data).json()["access_token"]
+    session_pins.pin(session_key(f"Bearer {admin}"))
+
+    stats = client.get("/api/admin/replicas", headers={"Authorization": f"Bearer {admin}"}).json()
+
+    assert [replica["url"] for replica in stats["replicas"]] == ["http://replica-a", "http://replica-b"]
+    assert stats["read_your_writes"]["pinned_sessions"] == 1
+    assert client.get("/api/admin/replicas", headers={"Authorization": f"Bearer {user}"}).status_code == 403
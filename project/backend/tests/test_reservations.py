@@ -0,0 +1,186 @@
+import asyncio
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.repositories import memory_store
+from app.reservations import reconcile_reservations, reservations, sweep_reservations_once
+
+
+@pytest.fixture
+def shop(client: TestClient, test_admin_data, test_user_data, test_sweet_data):
+    admin = client.post("/api/auth/register", json=test_admin_data).json()["access_token"]
+    user = client.post("/api/auth/register", json=test_user_data).json()["access_token"]
+    admin_headers = {"Authorization": f"Bearer {admin}"}
+    sweet_id = client.post("/api/sweets", json=test_sweet_data, headers=admin_headers).json()["id"]
+    return {
+        "admin": admin_headers,
+        "user": {"Authorization": f"Bearer {user}"},
+        "sweet_id": sweet_id,
+    }
+
+
+def reserve(client, shop, quantity=2, headers=None, **extra):
+    return client.post(
+        f"/api/sweets/{shop['sweet_id']}/reserve",
+        json={"quantity": quantity, **extra},
+        headers=headers or shop["user"]
+    )
+
+
+def stock(shop):
+    return memory_store.sweets[shop["sweet_id"]]["quantity"]
+
+
+def consistent():
+    return asyncio.run(reconcile_reservations())["consistent"]
+
+
+def test_reserve_withdraws_a_share_and_serves_later_holds_from_memory(client: TestClient, shop):
+    first = reserve(client, shop)
+    second = reserve(client, shop, quantity=3)
+
+    assert first.status_code == second.status_code == 201
+    assert first.json()["quantity"] == 2
+    assert stock(shop) == 36
+    assert reservations.stats()["withdrawals"] == 1
+    assert reservations.balances() == {shop["sweet_id"]: 14}
+    assert consistent()
+
+
+def test_checkout_confirms_holds_without_touching_stock_again(client: TestClient, shop):
+    hold = reserve(client, shop).json()
+    before = stock(shop)
+
+    response = client.post("/api/orders/checkout", json={"reservation_ids": [hold["id"]]}, headers=shop["user"])
+    again = client.post("/api/orders/checkout", json={"reservation_ids": [hold["id"]]}, headers=shop["user"])
+
+    assert response.status_code == 201
+    assert response.json()["items"][0]["quantity"] == 2
+    assert response.json()["total_price"] == "7.98"
+    assert again.status_code == 404
+    assert stock(shop) == before
+    assert len(memory_store.purchases) == 1
+    assert reservations.stats()["held"] == 0
+    assert consistent()
+
+
+def test_checkout_takes_items_or_reservations(client: TestClient, shop):
+    hold = reserve(client, shop).json()
+    body = {"items": [{"sweet_id": shop["sweet_id"], "quantity": 1}], "reservation_ids": [hold["id"]]}
+
+    assert client.post("/api/orders/checkout", json=body, headers=shop["user"]).status_code == 422
+    assert client.post("/api/orders/checkout", json={}, headers=shop["user"]).status_code == 422
+
+
+def test_only_the_owner_can_release_a_hold(client: TestClient, shop):
+    hold = reserve(client, shop).json()
+
+    assert client.delete(f"/api/sweets/reservations/{hold['id']}", headers=shop["admin"]).status_code == 404
+    assert client.delete(f"/api/sweets/reservations/{hold['id']}", headers=shop["user"]).status_code == 204
+    assert client.delete(f"/api/sweets/reservations/{hold['id']}", headers=shop["user"]).status_code == 404
+    assert reservations.stats()["held"] == 0
+    assert reservations.stats()["pooled"] == 14
+    assert consistent()
+
+
+def test_expired_holds_are_swept_back_into_stock(client: TestClient, shop, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(reservations, "_clock", lambda: now[0])
+    hold = reserve(client, shop, ttl_seconds=30).json()
+    kept = reserve(client, shop, quantity=1, ttl_seconds=600).json()
+
+    now[0] += 31
+    expired = client.post("/api/orders/checkout", json={"reservation_ids": [hold["id"]]}, headers=shop["user"])
+    report = asyncio.run(sweep_reservations_once(idle_after=0))
+
+    assert expired.status_code == 404
+    assert report["expired"] == 1
+    assert report["returned"] == 13
+    assert stock(shop) == 49
+    assert asyncio.run(reconcile_reservations())["drift"] == []
+    assert reservations.balances() == {shop["sweet_id"]: 1}
+    assert client.post("/api/orders/checkout", json={"reservation_ids": [kept["id"]]}, headers=shop["user"]).status_code == 201
+    assert consistent()
+
+
+def test_ttl_is_capped(client: TestClient, shop, monkeypatch):
+    monkeypatch.setattr(reservations, "_clock", lambda: 0.0)
+    hold = reserve(client, shop, ttl_seconds=10 ** 6).json()
+
+    assert hold["expires_at"].startswith("1970-01-01T00:15:00")
+
+
+def test_reserve_reports_stock_including_the_local_pool(client: TestClient, shop):
+    reserve(client, shop, quantity=45)
+    response = reserve(client, shop, quantity=10)
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Not enough stock. Available: 5"
+    assert reserve(client, shop, quantity=5).status_code == 201
+    assert stock(shop) == 0
+
+
+def test_flash_sale_never_oversells_and_batches_withdrawals(client: TestClient, shop):
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            url = f"/api/sweets/{shop['sweet_id']}/reserve"
+            return await asyncio.gather(*(http.post(url, json={"quantity": 1}, headers=shop["user"]) for _ in range(60)))
+
+    responses = asyncio.run(run())
+    statuses = [response.status_code for response in responses]
+
+    assert statuses.count(201) == 50
+    assert statuses.count(400) == 10
+    assert stock(shop) == 0
+    assert reservations.stats()["withdrawals"] == 12
+    assert consistent()
+
+
+def test_a_small_hold_does_not_block_buying_the_rest(client: TestClient, shop):
+    memory_store.sweets[shop["sweet_id"]]["quantity"] = 15
+    hold = reserve(client, shop, quantity=1).json()
+
+    purchase = client.post(f"/api/sweets/{shop['sweet_id']}/purchase", json={"quantity": 14}, headers=shop["user"])
+
+    assert purchase.status_code == 200
+    assert stock(shop) == 0
+    assert reservations.stats()["pooled"] == 0
+    assert client.post("/api/orders/checkout", json={"reservation_ids": [hold["id"]]}, headers=shop["user"]).status_code == 201
+    assert consistent()
+
+
+def test_checkout_returns_the_local_pool_before_failing(client: TestClient, shop):
+    memory_store.sweets[shop["sweet_id"]]["quantity"] = 15
+    reserve(client, shop, quantity=1)
+    order = {"items": [{"sweet_id": shop["sweet_id"], "quantity": 14}]}
+
+    assert client.post("/api/orders/checkout", json=order, headers=shop["user"]).status_code == 201
+    response = client.post("/api/orders/checkout", json=order, headers=shop["user"])
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == f"Not enough stock for sweet {shop['sweet_id']}. Available: 0"
+    assert consistent()
+
+
+def test_escrow_of_a_dead_worker_is_reclaimed(client: TestClient, shop):
+    memory_store.sweets[shop["sweet_id"]]["quantity"] = 40
+    memory_store.escrow[("dead-worker", shop["sweet_id"])] = {"quantity": 10, "updated_at": 0.0}
+
+    report = asyncio.run(sweep_reservations_once(idle_after=0))
+
+    assert report["reclaimed"] == [{"sweet_id": shop["sweet_id"], "quantity": 10}]
+    assert stock(shop) == 50
+    assert memory_store.escrow == {}
+
+
+def test_admin_reservation_endpoints(client: TestClient, shop):
+    reserve(client, shop)
+
+    stats = client.get("/api/admin/reservations", headers=shop["admin"]).json()
+    check = client.get("/api/admin/reservations/check", headers=shop["admin"]).json()
+
+    assert stats["holds"] == 1 and stats["held"] == 2
+    assert check == {"consistent": True, "drift": []}
+    assert client.get("/api/admin/reservations", headers=shop["user"]).status_code == 403
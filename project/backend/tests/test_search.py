@@ -0,0 +1,89 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.auth import get_current_user, get_pending_user
+from app.catalog_cache import catalog_cache
+from app.database import get_supabase_client
+from app.repositories import get_supabase_sweet_repository, get_sweet_repository
+from tests.conftest import pending_user
+
+RANKED = [
+    {
+        "id": "sweet-2",
+        "name": "Dark Chocolate Truffles",
+        "description": "",
+        "category": "chocolate",
+        "price": 4.99,
+        "quantity": 75,
+        "image_url": "",
+        "created_at": "2025-12-12T21:18:37+00:00",
+        "updated_at": "2025-12-12T21:18:37+00:00"
+    }
+]
+
+
+class FakeRPC:
+    def __init__(self):
+        self.calls = []
+
+    def rpc(self, fn, params):
+        self.calls.append((fn, params))
+        return self
+
+    def execute(self):
+        return type("Response", (), {"data": RANKED})()
+
+
+@pytest.fixture
+def search_client(client: TestClient):
+    fake = FakeRPC()
+    catalog_cache.bump()
+    app.dependency_overrides[get_current_user] = lambda: {"id": "user-1", "role": "user"}
+    app.dependency_overrides[get_pending_user] = pending_user({"id": "user-1", "role": "user"})
+    app.dependency_overrides[get_supabase_client] = lambda: fake
+    app.dependency_overrides[get_sweet_repository] = get_supabase_sweet_repository
+    yield client, fake
+    app.dependency_overrides.clear()
+
+
+def test_ranked_search_calls_trigram_function(search_client):
+    client, fake = search_client
+
+    response = client.get("/api/sweets/search?name=chocolte&mode=ranked&category=chocolate&limit=5")
+
+    assert response.status_code == 200
+    assert [sweet["id"] for sweet in response.json()] == ["sweet-2"]
+    assert fake.calls == [("search_sweets_ranked", {
+        "p_query": "chocolte",
+        "p_category": "chocolate",
+        "p_min_price": None,
+        "p_max_price": None,
+        "p_limit": 5
+    })]
+
+
+def test_ranked_search_requires_name(search_client):
+    client, fake = search_client
+
+    response = client.get("/api/sweets/search?mode=ranked")
+
+    assert response.status_code == 400
+    assert fake.calls == []
+
+
+def test_ranked_search_rejects_cursor(search_client):
+    client, fake = search_client
+
+    response = client.get("/api/sweets/search?name=chocolte&mode=ranked&cursor=abc")
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Ranked search does not support cursor"
+    assert fake.calls == []
+
+
+def test_unknown_search_mode_is_rejected(search_client):
+    client, fake = search_client
+
+    response = client.get("/api/sweets/search?name=x&mode=regex")
+
+    assert response.status_code == 422
@@ -0,0 +1,90 @@
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import List
+import pytest
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+from app.catalog_cache import catalog_cache
+from app.config import get_settings
+from app.models import OrderResponse, SweetListItem, SweetResponse
+from app.serialization import dumps, to_jsonable
+
+ROW = {
+    "id": "sweet-1",
+    "name": "Fudge",
+    "description": "",
+    "category": "candy",
+    "price": 3.99,
+    "quantity": 4,
+    "image_url": "",
+    "created_at": "2025-12-14T10:00:00.123456+00:00",
+    "updated_at": "2025-12-14T10:00:00+05:30",
+    "internal_note": "not part of the API"
+}
+
+
+def validated(model, content, exclude_unset=False) -> bytes:
+    adapter = TypeAdapter(model)
+    return adapter.dump_json(adapter.validate_python(content), exclude_unset=exclude_unset)
+
+
+@pytest.mark.parametrize("price", [3.99, 4, 1e-7, "2.50", Decimal("0.10")])
+def test_trusted_rows_match_validated_output(price):
+    row = {**ROW, "price": price}
+
+    assert json.loads(dumps(to_jsonable(row, SweetResponse))) == json.loads(validated(SweetResponse, row))
+    assert dumps(to_jsonable(row, SweetResponse)) == validated(SweetResponse, row)
+
+
+@pytest.mark.parametrize("created_at", [
+    "2025-12-14T10:00:00.000000+00:00",
+    "2025-12-14T10:00:00.123+00:00",
+    "2025-12-14 10:00:00.1+05:30",
+    "2025-12-14T10:00:00Z"
+])
+def test_trusted_datetimes_match_validated_output(created_at):
+    row = {**ROW, "created_at": created_at}
+
+    assert dumps(to_jsonable(row, SweetResponse)) == validated(SweetResponse, row)
+
+
+def test_trusted_projection_matches_exclude_unset():
+    rows = [{"id": "sweet-1", "price": 2, "created_at": "2025-12-14T10:00:00+00:00"}, ROW]
+    trusted = dumps([to_jsonable(row, SweetListItem, exclude_unset=True) for row in rows])
+
+    assert trusted == validated(List[SweetListItem], rows, exclude_unset=True)
+
+
+def test_trusted_nested_models_and_datetimes():
+    purchase = {
+        "id": "purchase-1",
+        "user_id": "user-1",
+        "sweet_id": "sweet-1",
+        "quantity": 2,
+        "total_price": 7.98,
+        "purchased_at": datetime(2025, 12, 14, 9, tzinfo=timezone.utc)
+    }
+    order = {"items": [purchase], "total_price": Decimal("7.98")}
+
+    assert dumps(to_jsonable(order, OrderResponse)) == validated(OrderResponse, order)
+
+
+def test_endpoints_return_identical_bodies_in_trusted_mode(client: TestClient, test_admin_data, test_sweet_data, monkeypatch):
+    admin = client.post("/api/auth/register", json=test_admin_data).json()
+    headers = {"Authorization": f"Bearer {admin['access_token']}"}
+    sweet_id = client.post("/api/sweets", json=test_sweet_data, headers=headers).json()["id"]
+
+    listing = client.get("/api/sweets", headers=headers)
+    monkeypatch.setattr(get_settings(), "trusted_upstream_responses", True)
+    catalog_cache.bump()
+    trusted_listing = client.get("/api/sweets", headers=headers)
+
+    trusted_update = client.put(f"/api/sweets/{sweet_id}", json={"price": 4.5}, headers=headers)
+    monkeypatch.setattr(get_settings(), "trusted_upstream_responses", False)
+    update = client.put(f"/api/sweets/{sweet_id}", json={"price": 4.5}, headers=headers)
+
+    assert trusted_update.status_code == update.status_code == 200
+    assert {**trusted_update.json(), "updated_at": None} == {**update.json(), "updated_at": None}
+    assert json.loads(trusted_listing.content)[0]["price"] == "3.99"
+    assert trusted_listing.content == listing.content
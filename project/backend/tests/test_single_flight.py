@@ -0,0 +1,127 @@
+import asyncio
+import httpx
+import pytest
+from app.main import app
+from app.auth import get_pending_user
+from app.catalog_cache import catalog_cache
+from app.repositories import get_sweet_repository, memory_store
+from app.repositories.memory import MemorySweetRepository
+from app.single_flight import SingleFlight, catalog_reads
+from tests.conftest import pending_user
+
+
+class CountingFetch:
+    def __init__(self, result="rows", delay=0.01, error=None):
+        self.result = result
+        self.delay = delay
+        self.error = error
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.result
+
+
+def test_concurrent_callers_share_one_call():
+    group = SingleFlight("test")
+    fetch = CountingFetch()
+
+    async def run():
+        return await asyncio.gather(*(group.do("key", fetch) for _ in range(10)))
+
+    assert asyncio.run(run()) == ["rows"] * 10
+    assert fetch.calls == 1
+    assert group.stats()["leaders"] == 1
+    assert group.stats()["coalesced"] == 9
+    assert group.stats()["top_keys"] == [{"key": "'key'", "leaders": 1, "coalesced": 9}]
+    assert group.in_flight == 0
+
+
+def test_distinct_keys_and_later_calls_are_not_coalesced():
+    group = SingleFlight("test")
+    fetch = CountingFetch()
+
+    async def run():
+        await asyncio.gather(group.do("a", fetch), group.do("b", fetch))
+        await group.do("a", fetch)
+
+    asyncio.run(run())
+
+    assert fetch.calls == 3
+    assert group.stats()["coalesced"] == 0
+
+
+def test_errors_reach_every_caller_and_are_not_cached():
+    group = SingleFlight("test")
+    failing = CountingFetch(error=RuntimeError("upstream down"))
+
+    async def run():
+        results = await asyncio.gather(*(group.do("key", failing) for _ in range(3)), return_exceptions=True)
+        return results, await group.do("key", CountingFetch())
+
+    results, retry = asyncio.run(run())
+
+    assert [str(result) for result in results] == ["upstream down"] * 3
+    assert failing.calls == 1
+    assert retry == "rows"
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    group = SingleFlight("test")
+    fetch = CountingFetch(delay=0.05)
+
+    async def run():
+        leader = asyncio.ensure_future(group.do("key", fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(group.do("key", fetch))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(run()) == "rows"
+    assert fetch.calls == 1
+
+
+@pytest.fixture
+def slow_catalog():
+    memory_store.reset()
+    catalog_cache.bump()
+    memory_store.sweets["sweet-1"] = {
+        "id": "sweet-1", "name": "Fudge", "description": "", "category": "fudge",
+        "price": 2.5, "quantity": 10, "image_url": "",
+        "created_at": "2025-12-14T10:00:00+00:00", "updated_at": "2025-12-14T10:00:00+00:00"
+    }
+
+    class SlowRepository(MemorySweetRepository):
+        calls = 0
+
+        async def page(self, *args, **kwargs):
+            SlowRepository.calls += 1
+            await asyncio.sleep(0.02)
+            return await super().page(*args, **kwargs)
+
+    app.dependency_overrides[get_pending_user] = pending_user({"id": "user-1", "role": "user"})
+    app.dependency_overrides[get_sweet_repository] = lambda: SlowRepository(memory_store)
+    yield SlowRepository
+    app.dependency_overrides.clear()
+
+
+def test_identical_catalog_requests_share_one_upstream_read(slow_catalog):
+    before = catalog_reads.stats()["coalesced"]
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            listing = [client.get("/api/sweets") for _ in range(10)]
+            search = [client.get("/api/sweets/search", params={"category": "fudge"}) for _ in range(10)]
+            return await asyncio.gather(*listing, *search)
+
+    responses = asyncio.run(run())
+
+    assert {response.status_code for response in responses} == {200}
+    assert len({response.content for response in responses[:10]}) == 1
+    assert slow_catalog.calls == 2
+    assert catalog_reads.stats()["coalesced"] == before + 18
@@ -0,0 +1,140 @@
+import asyncio
+import json
+import pytest
+from fastapi import WebSocketDisconnect
+from fastapi.testclient import TestClient
+from app.routers.sweets import _sse_events
+from app.stock_stream import StockStream, StreamFullError, stock_stream
+
+
+def drain(subscription):
+    events = []
+    while subscription.buffer:
+        events.append(json.loads(subscription.buffer.popleft().data))
+    return events
+
+
+def test_subscribers_receive_sequenced_deltas():
+    stream = StockStream(history_size=10, buffer_size=10, max_subscribers=10)
+    subscription = stream.subscribe()
+
+    stream.adjust_quantity("sweet-1", -2)
+    stream.upsert({"id": "sweet-2", "name": "Fudge", "price": 2.5, "quantity": 4})
+    stream.remove("sweet-3")
+
+    events = drain(subscription)
+    assert [event["seq"] for event in events] == [1, 2, 3]
+    assert events[0] == {"seq": 1, "type": "stock", "id": "sweet-1", "delta": -2}
+    assert events[1]["sweet"]["price"] == "2.5"
+    assert events[1]["sweet"]["description"] is None
+    assert events[2] == {"seq": 3, "type": "delete", "id": "sweet-3"}
+
+
+def test_resume_replays_missed_events():
+    stream = StockStream(history_size=3, buffer_size=10, max_subscribers=10)
+    first = stream.publish("stock", id="a", delta=-1)
+    for _ in range(2):
+        stream.adjust_quantity("a", -1)
+
+    resumed = stream.subscribe(first.id)
+    unknown = stream.subscribe("other-epoch-1")
+    current = stream.subscribe(stream.history[-1].id)
+
+    assert [event["seq"] for event in drain(resumed)] == [2, 3]
+    assert drain(unknown) == [{"seq": 3, "type": "reset"}]
+    assert drain(current) == []
+
+    for _ in range(3):
+        stream.adjust_quantity("a", -1)
+    assert drain(stream.subscribe(first.id)) == [{"seq": 6, "type": "reset"}]
+
+
+def test_slow_consumer_gets_a_reset_instead_of_unbounded_buffer():
+    stream = StockStream(history_size=10, buffer_size=2, max_subscribers=10)
+    slow = stream.subscribe()
+
+    for _ in range(3):
+        stream.adjust_quantity("a", -1)
+    stream.adjust_quantity("a", -1)
+
+    assert [event["type"] for event in drain(slow)] == ["reset", "stock"]
+    assert stream.stats()["overflows"] == 1
+
+
+def test_fan_out_to_many_idle_subscribers():
+    stream = StockStream(history_size=10, buffer_size=4, max_subscribers=10000)
+    subscriptions = [stream.subscribe() for _ in range(5000)]
+
+    event = stream.publish("stock", id="a", delta=-1)
+
+    assert all(subscription.buffer[0] is event for subscription in subscriptions)
+
+
+def test_subscriber_limit_and_unsubscribe():
+    stream = StockStream(history_size=10, buffer_size=2, max_subscribers=1)
+    subscription = stream.subscribe()
+
+    with pytest.raises(StreamFullError):
+        stream.subscribe()
+
+    subscription.close()
+    stream.subscribe()
+    assert stream.stats()["subscribers"] == 1
+
+
+def test_sse_events_wait_for_publish_and_send_heartbeats(monkeypatch):
+    from app.routers import sweets
+    stream = StockStream(history_size=10, buffer_size=10, max_subscribers=10)
+    monkeypatch.setattr(sweets.settings, "stream_heartbeat_interval", 0.01)
+
+    async def run():
+        subscription = stream.subscribe()
+        events = _sse_events(subscription)
+        heartbeat = await events.__anext__()
+        pending = asyncio.ensure_future(events.__anext__())
+        await asyncio.sleep(0)
+        stream.adjust_quantity("sweet-1", -1)
+        event = await pending
+        await events.aclose()
+        return heartbeat, event
+
+    heartbeat, event = asyncio.run(run())
+
+    assert heartbeat == b": ping\n\n"
+    assert event.startswith(f"id: {stream.epoch}-1\nevent: stock\ndata: ".encode())
+    assert event.endswith(b"\n\n")
+    assert stream.stats()["subscribers"] == 0
+
+
+def test_stream_endpoint_requires_auth_and_sheds_when_full(client: TestClient, test_user_data, monkeypatch):
+    token = client.post("/api/auth/register", json=test_user_data).json()["access_token"]
+    monkeypatch.setattr(stock_stream, "max_subscribers", 0)
+
+    assert client.get("/api/sweets/stream").status_code == 401
+    assert client.get("/api/sweets/stream", params={"access_token": token}).status_code == 503
+
+
+def test_websocket_receives_purchase_and_restock_deltas(client: TestClient, test_admin_data, test_sweet_data):
+    token = client.post("/api/auth/register", json=test_admin_data).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    sweet_id = client.post("/api/sweets", json=test_sweet_data, headers=headers).json()["id"]
+    last_seq = stock_stream.seq
+
+    with client.websocket_connect(f"/api/sweets/stream/ws?access_token={token}") as websocket:
+        client.post(f"/api/sweets/{sweet_id}/purchase", json={"quantity": 3}, headers=headers)
+        client.post(f"/api/sweets/{sweet_id}/restock", json={"quantity": 10}, headers=headers)
+        client.delete(f"/api/sweets/{sweet_id}", headers=headers)
+
+        purchase = websocket.receive_json()
+        restock = websocket.receive_json()
+        delete = websocket.receive_json()
+
+    assert purchase == {"seq": last_seq + 1, "type": "stock", "id": sweet_id, "delta": -3}
+    assert restock["type"] == "upsert" and restock["sweet"]["quantity"] == 57
+    assert delete == {"seq": last_seq + 3, "type": "delete", "id": sweet_id}
+
+
+def test_websocket_rejects_bad_token(client: TestClient):
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect("/api/sweets/stream/ws?access_token=nope") as websocket:
+            websocket.receive_json()
@@ -1,5 +1,12 @@
 import pytest
 from fastapi.testclient import TestClient
+from postgrest import APIError
+from app.main import app
+from app.auth import get_current_admin_user, get_current_user
+from app.database import get_supabase_admin_client, get_supabase_client
+from app.repositories import (
+    get_inventory_repository, get_supabase_inventory_repository, get_supabase_sweet_repository, get_sweet_repository
+)
 
 
 def get_auth_token(client: TestClient, user_data: dict) -> str:
@@ -118,3 +125,100 @@ def test_restock_as_user(client: TestClient, test_user_data):
             headers=headers
         )
         assert response.status_code == 403
+
+
+class FakeRPC:
+    def __init__(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.calls = []
+
+    def rpc(self, fn, params):
+        self.calls.append((fn, params))
+        return self
+
+    def execute(self):
+        if self.error:
+            raise self.error
+        return type("Response", (), {"data": self.result})()
+
+
+@pytest.fixture
+def purchase_client(client: TestClient):
+    fake = FakeRPC()
+    app.dependency_overrides[get_current_user] = lambda: {"id": "user-1", "role": "user"}
+    app.dependency_overrides[get_supabase_admin_client] = lambda: fake
+    app.dependency_overrides[get_inventory_repository] = get_supabase_inventory_repository
+    yield client, fake
+    app.dependency_overrides.clear()
+
+
+def test_purchase_uses_single_rpc(purchase_client):
+    client, fake = purchase_client
+    fake.result = {
+        "id": "purchase-1",
+        "user_id": "user-1",
+        "sweet_id": "sweet-1",
+        "quantity": 2,
+        "total_price": "5.98",
+        "purchased_at": "2025-12-14T09:00:00+00:00"
+    }
+
+    response = client.post("/api/sweets/sweet-1/purchase", json={"quantity": 2})
+
+    assert response.status_code == 200
+    assert response.json()["total_price"] == "5.98"
+    assert fake.calls == [("purchase_sweet", {"p_user_id": "user-1", "p_sweet_id": "sweet-1", "p_quantity": 2})]
+
+
+def test_purchase_rpc_insufficient_stock(purchase_client):
+    client, fake = purchase_client
+    fake.error = APIError({"code": "SW409", "message": "Not enough stock", "details": "3", "hint": None})
+
+    response = client.post("/api/sweets/sweet-1/purchase", json={"quantity": 5})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Not enough stock. Available: 3"
+
+
+def test_purchase_rpc_unknown_sweet(purchase_client):
+    client, fake = purchase_client
+    fake.error = APIError({"code": "SW404", "message": "Sweet not found", "details": None, "hint": None})
+
+    response = client.post("/api/sweets/sweet-1/purchase", json={"quantity": 1})
+
+    assert response.status_code == 404
+
+
+def test_duplicate_name_and_category_conflicts(client: TestClient, test_admin_data, test_sweet_data):
+    headers = {"Authorization": f"Bearer {get_auth_token(client, test_admin_data)}"}
+    first = client.post("/api/sweets", json=test_sweet_data, headers=headers).json()
+    second = client.post("/api/sweets", json={**test_sweet_data, "category": "truffle"}, headers=headers).json()
+
+    assert client.post("/api/sweets", json=test_sweet_data, headers=headers).status_code == 409
+    assert client.put(f"/api/sweets/{second['id']}", json={"category": "chocolate"}, headers=headers).status_code == 409
+    assert client.put(f"/api/sweets/{first['id']}", json={"name": first["name"], "price": 4.5}, headers=headers).status_code == 200
+
+
+class UniqueViolationTable:
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        raise APIError({"code": "23505", "message": "duplicate key value violates unique constraint", "details": None, "hint": None})
+
+
+def test_supabase_unique_violation_maps_to_conflict(client: TestClient, test_sweet_data):
+    admin = {"id": "admin-1", "role": "admin"}
+    app.dependency_overrides[get_current_user] = lambda: admin
+    app.dependency_overrides[get_current_admin_user] = lambda: admin
+    app.dependency_overrides[get_supabase_client] = lambda: type("Client", (), {"table": lambda self, name: UniqueViolationTable()})()
+    app.dependency_overrides[get_sweet_repository] = get_supabase_sweet_repository
+    try:
+        created = client.post("/api/sweets", json=test_sweet_data)
+        updated = client.put("/api/sweets/sweet-1", json={"name": "Taken"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert created.status_code == updated.status_code == 409
+    assert created.json()["detail"] == "A sweet with this name and category already exists"
@@ -0,0 +1,68 @@
+/*
+  # Atomic purchase function
+
+  ## Overview
+  Moves the purchase flow (stock check, stock decrement, purchase insert) into a single
+  database function so the API needs one round trip per purchase and concurrent buyers
+  can no longer oversell a sweet.
+
+  ## New Functions
+
+  ### `purchase_sweet(p_user_id, p_sweet_id, p_quantity)`
+  - Decrements `sweets.quantity` only if enough stock is available (conditional UPDATE,
+    so concurrent purchases serialize on the row lock instead of losing updates)
+  - Inserts the matching `purchases` row priced from the current `sweets.price`
+  - Runs in one transaction: if the insert fails the decrement is rolled back
+  - Returns the inserted `purchases` row
+
+  ## Errors
+  - `SW404` - Sweet does not exist
+  - `SW409` - Not enough stock; `DETAIL` carries the available quantity
+
+  ## Security
+  - SECURITY DEFINER, executable by `service_role` only. The API authenticates the
+    caller and passes their id explicitly.
+*/
+
+CREATE OR REPLACE FUNCTION public.purchase_sweet(
+  p_user_id uuid,
+  p_sweet_id uuid,
+  p_quantity integer
+)
+RETURNS purchases AS $$
+DECLARE
+  v_price numeric(10,2);
+  v_available integer;
+  v_purchase purchases;
+BEGIN
+  IF p_quantity IS NULL OR p_quantity <= 0 THEN
+    RAISE EXCEPTION 'Quantity must be greater than zero' USING ERRCODE = '22023';
+  END IF;
+
+  UPDATE sweets
+     SET quantity = quantity - p_quantity
+   WHERE id = p_sweet_id
+     AND quantity >= p_quantity
+  RETURNING price INTO v_price;
+
+  IF NOT FOUND THEN
+    SELECT quantity INTO v_available FROM sweets WHERE id = p_sweet_id;
+
+    IF NOT FOUND THEN
+      RAISE EXCEPTION 'Sweet not found' USING ERRCODE = 'SW404';
+    END IF;
+
+    RAISE EXCEPTION 'Not enough stock'
+      USING ERRCODE = 'SW409', DETAIL = v_available::text;
+  END IF;
+
+  INSERT INTO purchases (user_id, sweet_id, quantity, total_price)
+  VALUES (p_user_id, p_sweet_id, p_quantity, v_price * p_quantity)
+  RETURNING * INTO v_purchase;
+
+  RETURN v_purchase;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+REVOKE ALL ON FUNCTION public.purchase_sweet(uuid, uuid, integer) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.purchase_sweet(uuid, uuid, integer) TO service_role;
@@ -0,0 +1,86 @@
+/*
+  # Multi-item checkout function
+
+  ## Overview
+  Lets a customer buy several sweets in one request. All lines are validated, stock is
+  decremented and every `purchases` row is written in a single transaction, so a basket
+  either succeeds completely or leaves the inventory untouched.
+
+  ## New Functions
+
+  ### `checkout_order(p_user_id, p_items)`
+  - `p_items` is a JSON array of `{"sweet_id": uuid, "quantity": integer}` objects
+  - Lines for the same sweet are merged before stock is checked
+  - Sweets are locked in id order so concurrent baskets cannot deadlock each other
+  - Returns the inserted `purchases` rows, one per distinct sweet
+
+  ## Errors
+  - `22023` - Empty basket or non-positive quantity
+  - `SW404` - A sweet does not exist; `DETAIL` carries its id
+  - `SW409` - Not enough stock; `DETAIL` is `{"sweet_id": ..., "available": ...}`
+
+  ## Security
+  - SECURITY DEFINER, executable by `service_role` only.
+*/
+
+CREATE OR REPLACE FUNCTION public.checkout_order(
+  p_user_id uuid,
+  p_items jsonb
+)
+RETURNS SETOF purchases AS $$
+DECLARE
+  v_line record;
+  v_available integer;
+BEGIN
+  IF p_items IS NULL OR jsonb_typeof(p_items) <> 'array' OR jsonb_array_length(p_items) = 0 THEN
+    RAISE EXCEPTION 'Order has no items' USING ERRCODE = '22023';
+  END IF;
+
+  FOR v_line IN
+    SELECT (item->>'sweet_id')::uuid AS sweet_id,
+           SUM((item->>'quantity')::integer)::integer AS quantity
+      FROM jsonb_array_elements(p_items) AS item
+     GROUP BY 1
+     ORDER BY 1
+  LOOP
+    IF v_line.quantity IS NULL OR v_line.quantity <= 0 THEN
+      RAISE EXCEPTION 'Quantity must be greater than zero' USING ERRCODE = '22023';
+    END IF;
+
+    UPDATE sweets
+       SET quantity = quantity - v_line.quantity
+     WHERE id = v_line.sweet_id
+       AND quantity >= v_line.quantity;
+
+    IF NOT FOUND THEN
+      SELECT quantity INTO v_available FROM sweets WHERE id = v_line.sweet_id;
+
+      IF NOT FOUND THEN
+        RAISE EXCEPTION 'Sweet not found'
+          USING ERRCODE = 'SW404', DETAIL = v_line.sweet_id::text;
+      END IF;
+
+      RAISE EXCEPTION 'Not enough stock'
+        USING ERRCODE = 'SW409',
+              DETAIL = json_build_object('sweet_id', v_line.sweet_id, 'available', v_available)::text;
+    END IF;
+  END LOOP;
+
+  RETURN QUERY
+  WITH lines AS (
+    SELECT (item->>'sweet_id')::uuid AS sweet_id,
+           SUM((item->>'quantity')::integer)::integer AS quantity
+      FROM jsonb_array_elements(p_items) AS item
+     GROUP BY 1
+  )
+  INSERT INTO purchases (user_id, sweet_id, quantity, total_price)
+  SELECT p_user_id, l.sweet_id, l.quantity, s.price * l.quantity
+    FROM lines l
+    JOIN sweets s ON s.id = l.sweet_id
+   ORDER BY l.sweet_id
+  RETURNING *;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+REVOKE ALL ON FUNCTION public.checkout_order(uuid, jsonb) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.checkout_order(uuid, jsonb) TO service_role;
@@ -0,0 +1,17 @@
+/*
+  # Keyset pagination index for the catalog
+
+  ## Overview
+  The catalog endpoints page through `sweets` ordered by `created_at DESC, id` and resume
+  from an opaque cursor holding the last row's `(created_at, id)`. This index serves both
+  the ordering and the `(created_at, id)` seek without sorting the table.
+
+  ## Changes
+  - Backfill and enforce `sweets.created_at NOT NULL` so every row has a sort key
+  - Add `idx_sweets_created_at_id` on `sweets(created_at DESC, id)`
+*/
+
+UPDATE sweets SET created_at = now() WHERE created_at IS NULL;
+ALTER TABLE sweets ALTER COLUMN created_at SET NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_sweets_created_at_id ON sweets(created_at DESC, id);
@@ -0,0 +1,56 @@
+/*
+  # Trigram search for sweets
+
+  ## Overview
+  `ilike '%term%'` cannot use the btree index on `sweets.name`, so every substring search
+  scans the whole table. This migration adds `pg_trgm` GIN indexes on `name` and
+  `description` and a ranked, typo-tolerant search function that uses them.
+
+  ## Changes
+  - Enable the `pg_trgm` extension
+  - Add `idx_sweets_name_trgm` and `idx_sweets_description_trgm` (GIN, gin_trgm_ops).
+    These also serve the existing `ilike` substring search.
+
+  ## New Functions
+
+  ### `search_sweets_ranked(p_query, p_category, p_min_price, p_max_price, p_limit)`
+  - Matches sweets whose name or description contains a word similar to `p_query`
+    (`<%` word-similarity operator), plus plain substring matches on `name`
+  - Orders by relevance: name similarity first, description similarity at half weight
+  - Optional category and price filters; at most `p_limit` rows (capped at 500)
+  - SECURITY INVOKER, so the usual `sweets` row level security applies
+*/
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA extensions;
+
+CREATE INDEX IF NOT EXISTS idx_sweets_name_trgm
+  ON sweets USING gin (name extensions.gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_sweets_description_trgm
+  ON sweets USING gin (description extensions.gin_trgm_ops);
+
+CREATE OR REPLACE FUNCTION public.search_sweets_ranked(
+  p_query text,
+  p_category text DEFAULT NULL,
+  p_min_price numeric DEFAULT NULL,
+  p_max_price numeric DEFAULT NULL,
+  p_limit integer DEFAULT 20
+)
+RETURNS SETOF sweets AS $$
+  SELECT s.*
+    FROM sweets s
+   WHERE (
+           p_query <% s.name
+        OR p_query <% s.description
+        OR s.name ILIKE '%' || replace(replace(replace(p_query, '\', '\\'), '%', '\%'), '_', '\_') || '%'
+         )
+     AND (p_category IS NULL OR s.category = p_category)
+     AND (p_min_price IS NULL OR s.price >= p_min_price)
+     AND (p_max_price IS NULL OR s.price <= p_max_price)
+   ORDER BY GREATEST(
+              word_similarity(p_query, s.name),
+              0.5 * word_similarity(p_query, coalesce(s.description, ''))
+            ) DESC,
+            s.name,
+            s.id
+   LIMIT LEAST(GREATEST(coalesce(p_limit, 20), 1), 500);
+$$ LANGUAGE sql STABLE SET search_path = public, extensions;
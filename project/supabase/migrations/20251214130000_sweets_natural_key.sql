@@ -0,0 +1,17 @@
+/*
+  # Natural key for catalog imports
+
+  ## Overview
+  Bulk imports upsert sweets by `(name, category)` instead of by generated id, so a
+  seasonal catalog can be re-uploaded without creating duplicates. PostgREST's
+  `on_conflict` needs a unique constraint on exactly those columns.
+
+  ## Changes
+  - Add unique constraint `sweets_name_category_key` on `sweets(name, category)`
+
+  ## Notes
+  - Existing duplicate `(name, category)` rows must be merged before applying this migration
+*/
+
+ALTER TABLE sweets
+  ADD CONSTRAINT sweets_name_category_key UNIQUE (name, category);
@@ -0,0 +1,18 @@
+/*
+  # Keyset index for purchase exports
+
+  ## Overview
+  `GET /api/purchases/export` streams the purchase history page by page, ordered by
+  `purchased_at DESC, id` and resuming from the last row's `(purchased_at, id)`. This index
+  serves the ordering, the seek and the date-range filter without sorting the table, so
+  every page costs the same regardless of how much history precedes it.
+
+  ## Changes
+  - Backfill and enforce `purchases.purchased_at NOT NULL` so every row has a sort key
+  - Add `idx_purchases_purchased_at_id` on `purchases(purchased_at DESC, id)`
+*/
+
+UPDATE purchases SET purchased_at = now() WHERE purchased_at IS NULL;
+ALTER TABLE purchases ALTER COLUMN purchased_at SET NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_purchases_purchased_at_id ON purchases(purchased_at DESC, id);
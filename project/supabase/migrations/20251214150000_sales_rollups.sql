@@ -0,0 +1,186 @@
+/*
+  # Incremental sales rollups
+
+  ## Overview
+  Sales dashboards aggregated the whole `purchases` table on every refresh. This migration
+  keeps hourly and daily per-sweet totals up to date as purchases are recorded, so the
+  analytics endpoint reads only the rollup rows inside the requested range and its cost
+  no longer grows with purchase history.
+
+  ## New Tables
+  - `sales_rollup_hourly` - units and revenue per `(bucket, sweet_id)`, `bucket` being the
+    UTC hour of `purchased_at`
+  - `sales_rollup_daily` - units and revenue per `(day, sweet_id)`, `day` being the UTC date
+  Both carry the sweet's category at the time of sale. Row level security is enabled with
+  no policies, so only `service_role` can read them.
+
+  ## Triggers
+  - `purchases_rollup_insert` / `purchases_rollup_delete` - statement-level triggers that
+    fold the inserted or deleted rows (transition tables) into both rollups in one
+    `INSERT ... ON CONFLICT DO UPDATE` per rollup. A multi-item checkout costs one merge,
+    not one per line.
+
+  ## New Functions
+
+  ### `sales_summary(p_from, p_to, p_granularity, p_top)`
+  - Reads `sales_rollup_hourly` (`p_granularity = 'hour'`) or `sales_rollup_daily`
+    (`'day'`) for buckets in `[p_from, p_to)`
+  - Returns one JSON document with overall totals, `by_sweet`, `by_category`, `timeline`
+    and the `p_top` best sellers by units
+  - SECURITY DEFINER, executable by `service_role` only
+
+  ## Notes
+  - Existing purchases are backfilled while `purchases` is locked against writes
+*/
+
+CREATE TABLE IF NOT EXISTS sales_rollup_hourly (
+  bucket timestamp NOT NULL,
+  sweet_id uuid NOT NULL,
+  category text NOT NULL DEFAULT '',
+  units bigint NOT NULL DEFAULT 0,
+  revenue numeric(14,2) NOT NULL DEFAULT 0,
+  PRIMARY KEY (bucket, sweet_id)
+);
+
+CREATE TABLE IF NOT EXISTS sales_rollup_daily (
+  day date NOT NULL,
+  sweet_id uuid NOT NULL,
+  category text NOT NULL DEFAULT '',
+  units bigint NOT NULL DEFAULT 0,
+  revenue numeric(14,2) NOT NULL DEFAULT 0,
+  PRIMARY KEY (day, sweet_id)
+);
+
+ALTER TABLE sales_rollup_hourly ENABLE ROW LEVEL SECURITY;
+ALTER TABLE sales_rollup_daily ENABLE ROW LEVEL SECURITY;
+
+CREATE OR REPLACE FUNCTION public.merge_sales_rollups(p_rows purchases[], p_sign integer)
+RETURNS void AS $$
+BEGIN
+  INSERT INTO sales_rollup_hourly AS h (bucket, sweet_id, category, units, revenue)
+  SELECT date_trunc('hour', p.purchased_at AT TIME ZONE 'UTC'),
+         p.sweet_id,
+         coalesce(max(s.category), ''),
+         p_sign * sum(p.quantity),
+         p_sign * sum(p.total_price)
+    FROM unnest(p_rows) p
+    LEFT JOIN sweets s ON s.id = p.sweet_id
+   GROUP BY 1, 2
+   ORDER BY 1, 2
+  ON CONFLICT (bucket, sweet_id) DO UPDATE
+     SET units = h.units + EXCLUDED.units,
+         revenue = h.revenue + EXCLUDED.revenue;
+
+  INSERT INTO sales_rollup_daily AS d (day, sweet_id, category, units, revenue)
+  SELECT (p.purchased_at AT TIME ZONE 'UTC')::date,
+         p.sweet_id,
+         coalesce(max(s.category), ''),
+         p_sign * sum(p.quantity),
+         p_sign * sum(p.total_price)
+    FROM unnest(p_rows) p
+    LEFT JOIN sweets s ON s.id = p.sweet_id
+   GROUP BY 1, 2
+   ORDER BY 1, 2
+  ON CONFLICT (day, sweet_id) DO UPDATE
+     SET units = d.units + EXCLUDED.units,
+         revenue = d.revenue + EXCLUDED.revenue;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE OR REPLACE FUNCTION public.rollup_inserted_purchases()
+RETURNS trigger AS $$
+BEGIN
+  PERFORM merge_sales_rollups(ARRAY(SELECT n FROM new_rows n), 1);
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE OR REPLACE FUNCTION public.rollup_deleted_purchases()
+RETURNS trigger AS $$
+BEGIN
+  PERFORM merge_sales_rollups(ARRAY(SELECT o FROM old_rows o), -1);
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+LOCK TABLE purchases IN SHARE ROW EXCLUSIVE MODE;
+
+TRUNCATE sales_rollup_hourly, sales_rollup_daily;
+SELECT merge_sales_rollups(ARRAY(SELECT p FROM purchases p), 1);
+
+DROP TRIGGER IF EXISTS purchases_rollup_insert ON purchases;
+CREATE TRIGGER purchases_rollup_insert
+  AFTER INSERT ON purchases
+  REFERENCING NEW TABLE AS new_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION rollup_inserted_purchases();
+
+DROP TRIGGER IF EXISTS purchases_rollup_delete ON purchases;
+CREATE TRIGGER purchases_rollup_delete
+  AFTER DELETE ON purchases
+  REFERENCING OLD TABLE AS old_rows
+  FOR EACH STATEMENT EXECUTE FUNCTION rollup_deleted_purchases();
+
+CREATE OR REPLACE FUNCTION public.sales_summary(
+  p_from timestamptz,
+  p_to timestamptz,
+  p_granularity text DEFAULT 'day',
+  p_top integer DEFAULT 10
+)
+RETURNS jsonb AS $$
+  WITH rollup AS (
+    SELECT h.bucket, h.sweet_id, h.category, h.units, h.revenue
+      FROM sales_rollup_hourly h
+     WHERE p_granularity = 'hour'
+       AND h.bucket >= date_trunc('hour', p_from AT TIME ZONE 'UTC')
+       AND h.bucket < p_to AT TIME ZONE 'UTC'
+    UNION ALL
+    SELECT d.day::timestamp, d.sweet_id, d.category, d.units, d.revenue
+      FROM sales_rollup_daily d
+     WHERE p_granularity = 'day'
+       AND d.day >= (p_from AT TIME ZONE 'UTC')::date
+       AND d.day < p_to AT TIME ZONE 'UTC'
+  ),
+  by_sweet AS (
+    SELECT r.sweet_id, s.name, max(r.category) AS category,
+           sum(r.units) AS units, sum(r.revenue) AS revenue
+      FROM rollup r
+      LEFT JOIN sweets s ON s.id = r.sweet_id
+     GROUP BY r.sweet_id, s.name
+    HAVING sum(r.units) <> 0
+  )
+  SELECT jsonb_build_object(
+    'units', coalesce((SELECT sum(units) FROM by_sweet), 0),
+    'revenue', coalesce((SELECT sum(revenue) FROM by_sweet), 0),
+    'by_sweet', coalesce((
+      SELECT jsonb_agg(b ORDER BY b.revenue DESC, b.sweet_id) FROM by_sweet b
+    ), '[]'::jsonb),
+    'by_category', coalesce((
+      SELECT jsonb_agg(c ORDER BY c.revenue DESC, c.category)
+        FROM (
+          SELECT category, sum(units) AS units, sum(revenue) AS revenue
+            FROM by_sweet GROUP BY category
+        ) c
+    ), '[]'::jsonb),
+    'timeline', coalesce((
+      SELECT jsonb_agg(t ORDER BY t.bucket)
+        FROM (
+          SELECT bucket, sum(units) AS units, sum(revenue) AS revenue
+            FROM rollup GROUP BY bucket
+        ) t
+    ), '[]'::jsonb),
+    'top_sellers', coalesce((
+      SELECT jsonb_agg(b ORDER BY b.units DESC, b.revenue DESC, b.sweet_id)
+        FROM (
+          SELECT * FROM by_sweet
+           ORDER BY units DESC, revenue DESC, sweet_id
+           LIMIT LEAST(GREATEST(coalesce(p_top, 10), 1), 100)
+        ) b
+    ), '[]'::jsonb)
+  );
+$$ LANGUAGE sql STABLE SECURITY DEFINER SET search_path = public;
+
+REVOKE ALL ON FUNCTION public.merge_sales_rollups(purchases[], integer) FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION public.rollup_inserted_purchases() FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION public.rollup_deleted_purchases() FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION public.sales_summary(timestamptz, timestamptz, text, integer) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.sales_summary(timestamptz, timestamptz, text, integer) TO service_role;
@@ -0,0 +1,139 @@
+/*
+  # Bulk restock and bulk price updates
+
+  ## Overview
+  A weekly delivery restocks hundreds of sweets. Doing that through the per-sweet endpoints
+  costs a read and a write per sweet. These functions apply a whole batch in one transaction
+  with a single set-based `UPDATE`, adjusting stock server-side (`quantity = quantity + delta`)
+  instead of read-modify-write.
+
+  ## New Functions
+
+  ### `bulk_restock(p_items)`
+  - `p_items` is a JSON array of `{"sweet_id": uuid, "quantity_delta": integer}` objects
+  - Deltas for the same sweet are summed; negative deltas are allowed as long as no sweet
+    would drop below zero
+  - Returns the updated `sweets` rows
+
+  ### `bulk_update_prices(p_items)`
+  - `p_items` is a JSON array of `{"sweet_id": uuid, "price": numeric}` objects, one per sweet
+  - Returns the updated `sweets` rows
+
+  Both lock the affected sweets in id order before validating, so concurrent batches and
+  purchases cannot deadlock or slip in between the check and the update. Any invalid item
+  fails the whole batch.
+
+  ## Errors
+  - `22023` - Empty batch, duplicate sweet in a price batch, or a zero delta / negative price
+  - `SW404` - A sweet does not exist; `DETAIL` carries its id
+  - `SW409` - A delta would make stock negative; `DETAIL` is `{"sweet_id": ..., "available": ...}`
+
+  ## Security
+  - SECURITY DEFINER, executable by `service_role` only.
+*/
+
+CREATE OR REPLACE FUNCTION public.bulk_restock(p_items jsonb)
+RETURNS SETOF sweets AS $$
+DECLARE
+  v_ids uuid[];
+  v_deltas integer[];
+  v_line record;
+BEGIN
+  IF p_items IS NULL OR jsonb_typeof(p_items) <> 'array' OR jsonb_array_length(p_items) = 0 THEN
+    RAISE EXCEPTION 'Batch has no items' USING ERRCODE = '22023';
+  END IF;
+
+  SELECT array_agg(sweet_id ORDER BY sweet_id), array_agg(delta ORDER BY sweet_id)
+    INTO v_ids, v_deltas
+    FROM (
+      SELECT (item->>'sweet_id')::uuid AS sweet_id,
+             SUM((item->>'quantity_delta')::integer)::integer AS delta
+        FROM jsonb_array_elements(p_items) AS item
+       GROUP BY 1
+    ) lines;
+
+  IF EXISTS (SELECT 1 FROM unnest(v_deltas) AS delta WHERE delta IS NULL OR delta = 0) THEN
+    RAISE EXCEPTION 'Quantity delta must be non-zero' USING ERRCODE = '22023';
+  END IF;
+
+  PERFORM 1 FROM sweets WHERE id = ANY(v_ids) ORDER BY id FOR UPDATE;
+
+  SELECT l.sweet_id, s.id IS NULL AS missing, s.quantity AS available
+    INTO v_line
+    FROM unnest(v_ids, v_deltas) AS l(sweet_id, delta)
+    LEFT JOIN sweets s ON s.id = l.sweet_id
+   WHERE s.id IS NULL OR s.quantity + l.delta < 0
+   ORDER BY s.id IS NOT NULL, l.sweet_id
+   LIMIT 1;
+
+  IF FOUND THEN
+    IF v_line.missing THEN
+      RAISE EXCEPTION 'Sweet not found'
+        USING ERRCODE = 'SW404', DETAIL = v_line.sweet_id::text;
+    END IF;
+
+    RAISE EXCEPTION 'Not enough stock'
+      USING ERRCODE = 'SW409',
+            DETAIL = json_build_object('sweet_id', v_line.sweet_id, 'available', v_line.available)::text;
+  END IF;
+
+  RETURN QUERY
+  UPDATE sweets s
+     SET quantity = s.quantity + l.delta
+    FROM unnest(v_ids, v_deltas) AS l(sweet_id, delta)
+   WHERE s.id = l.sweet_id
+  RETURNING s.*;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE OR REPLACE FUNCTION public.bulk_update_prices(p_items jsonb)
+RETURNS SETOF sweets AS $$
+DECLARE
+  v_ids uuid[];
+  v_prices numeric[];
+  v_missing uuid;
+BEGIN
+  IF p_items IS NULL OR jsonb_typeof(p_items) <> 'array' OR jsonb_array_length(p_items) = 0 THEN
+    RAISE EXCEPTION 'Batch has no items' USING ERRCODE = '22023';
+  END IF;
+
+  SELECT array_agg((item->>'sweet_id')::uuid ORDER BY (item->>'sweet_id')::uuid),
+         array_agg((item->>'price')::numeric ORDER BY (item->>'sweet_id')::uuid)
+    INTO v_ids, v_prices
+    FROM jsonb_array_elements(p_items) AS item;
+
+  IF cardinality(v_ids) <> (SELECT count(DISTINCT id) FROM unnest(v_ids) AS id) THEN
+    RAISE EXCEPTION 'Each sweet may appear only once' USING ERRCODE = '22023';
+  END IF;
+
+  IF EXISTS (SELECT 1 FROM unnest(v_prices) AS price WHERE price IS NULL OR price < 0) THEN
+    RAISE EXCEPTION 'Price must be zero or greater' USING ERRCODE = '22023';
+  END IF;
+
+  PERFORM 1 FROM sweets WHERE id = ANY(v_ids) ORDER BY id FOR UPDATE;
+
+  SELECT l.sweet_id INTO v_missing
+    FROM unnest(v_ids) AS l(sweet_id)
+   WHERE NOT EXISTS (SELECT 1 FROM sweets s WHERE s.id = l.sweet_id)
+   ORDER BY l.sweet_id
+   LIMIT 1;
+
+  IF FOUND THEN
+    RAISE EXCEPTION 'Sweet not found'
+      USING ERRCODE = 'SW404', DETAIL = v_missing::text;
+  END IF;
+
+  RETURN QUERY
+  UPDATE sweets s
+     SET price = l.price
+    FROM unnest(v_ids, v_prices) AS l(sweet_id, price)
+   WHERE s.id = l.sweet_id
+  RETURNING s.*;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+REVOKE ALL ON FUNCTION public.bulk_restock(jsonb) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.bulk_restock(jsonb) TO service_role;
+
+REVOKE ALL ON FUNCTION public.bulk_update_prices(jsonb) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.bulk_update_prices(jsonb) TO service_role;
@@ -0,0 +1,89 @@
+/*
+  # Idempotency keys
+
+  ## Overview
+  Backs `IDEMPOTENCY_STORE=database`, so retries of purchase, restock and create requests
+  carrying the same `Idempotency-Key` are answered from the first result no matter which
+  API worker receives them.
+
+  ## New Tables
+
+  ### `idempotency_keys`
+  - `key` (text, primary key) - `<user id>:<Idempotency-Key header>`
+  - `fingerprint` (text) - Hash of method, path and body of the first request
+  - `status_code`, `body`, `headers` - The stored response; `status_code` is NULL while the
+    first request is still running
+  - `expires_at` (timestamptz) - End of the in-progress lock, then of the stored result
+
+  ## New Functions
+
+  ### `claim_idempotency_key(p_key, p_fingerprint, p_lock_seconds)`
+  - Inserts a pending row, or takes over a row whose `expires_at` has passed
+  - Returns true if the caller now owns the key, false if another request holds it
+
+  ### `complete_idempotency_key(p_key, p_status_code, p_body, p_headers, p_ttl_seconds)`
+  - Stores the response and extends `expires_at` to the result TTL
+
+  ## Security
+  - RLS enabled with no policies; only `service_role` reads or writes the table
+*/
+
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+  key text PRIMARY KEY,
+  fingerprint text NOT NULL,
+  status_code integer,
+  body text,
+  headers jsonb NOT NULL DEFAULT '{}'::jsonb,
+  created_at timestamptz NOT NULL DEFAULT now(),
+  expires_at timestamptz NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires_at ON idempotency_keys(expires_at);
+
+ALTER TABLE idempotency_keys ENABLE ROW LEVEL SECURITY;
+
+CREATE OR REPLACE FUNCTION public.claim_idempotency_key(
+  p_key text,
+  p_fingerprint text,
+  p_lock_seconds double precision
+)
+RETURNS boolean AS $$
+DECLARE
+  v_claimed text;
+BEGIN
+  INSERT INTO idempotency_keys (key, fingerprint, expires_at)
+  VALUES (p_key, p_fingerprint, now() + make_interval(secs => p_lock_seconds))
+  ON CONFLICT (key) DO UPDATE
+     SET fingerprint = EXCLUDED.fingerprint,
+         status_code = NULL,
+         body = NULL,
+         headers = '{}'::jsonb,
+         created_at = now(),
+         expires_at = EXCLUDED.expires_at
+   WHERE idempotency_keys.expires_at <= now()
+  RETURNING key INTO v_claimed;
+
+  RETURN v_claimed IS NOT NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE OR REPLACE FUNCTION public.complete_idempotency_key(
+  p_key text,
+  p_status_code integer,
+  p_body text,
+  p_headers jsonb,
+  p_ttl_seconds double precision
+)
+RETURNS void AS $$
+  UPDATE idempotency_keys
+     SET status_code = p_status_code,
+         body = p_body,
+         headers = p_headers,
+         expires_at = now() + make_interval(secs => p_ttl_seconds)
+   WHERE key = p_key;
+$$ LANGUAGE sql SECURITY DEFINER SET search_path = public;
+
+REVOKE ALL ON FUNCTION public.claim_idempotency_key(text, text, double precision) FROM PUBLIC, anon, authenticated;
+REVOKE ALL ON FUNCTION public.complete_idempotency_key(text, integer, text, jsonb, double precision) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.claim_idempotency_key(text, text, double precision) TO service_role;
+GRANT EXECUTE ON FUNCTION public.complete_idempotency_key(text, integer, text, jsonb, double precision) TO service_role;
@@ -0,0 +1,263 @@
+/*
+  # Stock escrow for time-limited reservations
+
+  ## Overview
+  During a flash sale every `purchase_sweet` call updates the same `sweets` row, so
+  throughput is capped by row-lock contention. Each API worker now withdraws stock in
+  batches into its own escrow row and serves `POST /api/sweets/{id}/reserve` from an
+  in-process counter. Confirming reserved units inserts `purchases` rows and decrements the
+  worker's escrow row only; the hot `sweets` row is touched once per batch instead of once
+  per sale. The `purchases` insert still fires the sales rollup trigger, which updates the
+  sweet's current rollup rows on every sale; `20251214200000_deferred_reservation_rollups`
+  moves that merge out of the confirmation path.
+
+  Invariant: for every sweet, `sweets.quantity + SUM(stock_escrow.quantity)` only changes
+  through restocks, normal purchases and confirmed reservations. A worker's escrow balance
+  must equal its in-process pool plus outstanding holds (`GET /api/admin/reservations/check`).
+
+  ## New Tables
+
+  ### `stock_escrow`
+  - `holder` (text) - API worker id
+  - `sweet_id` (uuid, foreign key to sweets, cascade on delete)
+  - `quantity` (integer, >= 0) - Units withdrawn from `sweets.quantity` and not yet sold
+    or returned
+  - `updated_at` (timestamptz) - Refreshed by every escrow change and by the owning worker's
+    sweeper; rows left untouched by a dead worker are returned to stock
+
+  ## New Functions
+
+  ### `withdraw_stock(p_holder, p_sweet_id, p_quantity, p_minimum)`
+  - Moves up to `p_quantity` units (at least `p_minimum`) from the sweet into escrow
+  - Returns the number of units moved
+
+  ### `return_stock(p_holder, p_items)`
+  - `p_items` is a JSON array of `{"sweet_id": uuid, "quantity": integer}` objects
+  - Moves units from escrow back into the sweets; lines for sweets without an escrow row
+    (deleted sweets) are skipped
+  - Returns the updated `sweets` rows
+
+  ### `confirm_reserved_order(p_holder, p_user_id, p_items)`
+  - Sells reserved units: decrements escrow and inserts one `purchases` row per item
+  - Does not update `sweets.quantity`, which already excludes escrowed units
+
+  ### `reclaim_stale_escrow(p_holder, p_stale_seconds)`
+  - Refreshes `p_holder`'s rows, then returns the balances of other holders not updated for
+    `p_stale_seconds` to stock
+  - Returns a JSON array of `{"sweet_id": ..., "quantity": ...}` for the reclaimed units
+
+  ## Errors
+  - `22023` - Invalid quantities, or an escrow balance lower than the requested units
+  - `SW404` - A sweet does not exist; `DETAIL` carries its id
+  - `SW409` - Fewer than `p_minimum` units in stock; `DETAIL` is
+    `{"sweet_id": ..., "available": ...}`
+
+  ## Security
+  - RLS is enabled on `stock_escrow` with no policies; only the service role reads it.
+  - All functions are SECURITY DEFINER, executable by `service_role` only.
+*/
+
+CREATE TABLE IF NOT EXISTS stock_escrow (
+  holder text NOT NULL,
+  sweet_id uuid NOT NULL REFERENCES sweets(id) ON DELETE CASCADE,
+  quantity integer NOT NULL DEFAULT 0 CHECK (quantity >= 0),
+  updated_at timestamptz NOT NULL DEFAULT now(),
+  PRIMARY KEY (holder, sweet_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_stock_escrow_updated_at ON stock_escrow(updated_at);
+
+ALTER TABLE stock_escrow ENABLE ROW LEVEL SECURITY;
+
+CREATE OR REPLACE FUNCTION public.withdraw_stock(
+  p_holder text,
+  p_sweet_id uuid,
+  p_quantity integer,
+  p_minimum integer
+)
+RETURNS integer AS $$
+DECLARE
+  v_available integer;
+  v_taken integer;
+BEGIN
+  IF p_minimum IS NULL OR p_minimum <= 0 OR p_quantity IS NULL OR p_quantity < p_minimum THEN
+    RAISE EXCEPTION 'Quantity must be at least the minimum and greater than zero' USING ERRCODE = '22023';
+  END IF;
+
+  SELECT quantity INTO v_available FROM sweets WHERE id = p_sweet_id FOR UPDATE;
+
+  IF NOT FOUND THEN
+    RAISE EXCEPTION 'Sweet not found'
+      USING ERRCODE = 'SW404', DETAIL = p_sweet_id::text;
+  END IF;
+
+  IF v_available < p_minimum THEN
+    RAISE EXCEPTION 'Not enough stock'
+      USING ERRCODE = 'SW409',
+            DETAIL = json_build_object('sweet_id', p_sweet_id, 'available', v_available)::text;
+  END IF;
+
+  v_taken := LEAST(v_available, p_quantity);
+
+  UPDATE sweets SET quantity = quantity - v_taken WHERE id = p_sweet_id;
+
+  INSERT INTO stock_escrow (holder, sweet_id, quantity)
+  VALUES (p_holder, p_sweet_id, v_taken)
+  ON CONFLICT (holder, sweet_id) DO UPDATE
+    SET quantity = stock_escrow.quantity + EXCLUDED.quantity,
+        updated_at = now();
+
+  RETURN v_taken;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE OR REPLACE FUNCTION public.return_stock(p_holder text, p_items jsonb)
+RETURNS SETOF sweets AS $$
+DECLARE
+  v_ids uuid[];
+  v_quantities integer[];
+  v_short uuid;
+BEGIN
+  IF p_items IS NULL OR jsonb_typeof(p_items) <> 'array' OR jsonb_array_length(p_items) = 0 THEN
+    RAISE EXCEPTION 'Batch has no items' USING ERRCODE = '22023';
+  END IF;
+
+  SELECT array_agg(l.sweet_id ORDER BY l.sweet_id), array_agg(l.quantity ORDER BY l.sweet_id)
+    INTO v_ids, v_quantities
+    FROM (
+      SELECT (item->>'sweet_id')::uuid AS sweet_id,
+             SUM((item->>'quantity')::integer)::integer AS quantity
+        FROM jsonb_array_elements(p_items) AS item
+       GROUP BY 1
+    ) l
+    JOIN stock_escrow e ON e.holder = p_holder AND e.sweet_id = l.sweet_id;
+
+  IF v_ids IS NULL THEN
+    RETURN;
+  END IF;
+
+  PERFORM 1 FROM stock_escrow WHERE holder = p_holder AND sweet_id = ANY(v_ids) ORDER BY sweet_id FOR UPDATE;
+
+  SELECT l.sweet_id INTO v_short
+    FROM unnest(v_ids, v_quantities) AS l(sweet_id, quantity)
+    JOIN stock_escrow e ON e.holder = p_holder AND e.sweet_id = l.sweet_id
+   WHERE l.quantity IS NULL OR l.quantity <= 0 OR e.quantity < l.quantity
+   ORDER BY l.sweet_id
+   LIMIT 1;
+
+  IF FOUND THEN
+    RAISE EXCEPTION 'Escrow balance too low for sweet %', v_short USING ERRCODE = '22023';
+  END IF;
+
+  UPDATE stock_escrow e
+     SET quantity = e.quantity - l.quantity,
+         updated_at = now()
+    FROM unnest(v_ids, v_quantities) AS l(sweet_id, quantity)
+   WHERE e.holder = p_holder AND e.sweet_id = l.sweet_id;
+
+  DELETE FROM stock_escrow WHERE holder = p_holder AND sweet_id = ANY(v_ids) AND quantity = 0;
+
+  RETURN QUERY
+  UPDATE sweets s
+     SET quantity = s.quantity + l.quantity
+    FROM unnest(v_ids, v_quantities) AS l(sweet_id, quantity)
+   WHERE s.id = l.sweet_id
+  RETURNING s.*;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE OR REPLACE FUNCTION public.confirm_reserved_order(
+  p_holder text,
+  p_user_id uuid,
+  p_items jsonb
+)
+RETURNS SETOF purchases AS $$
+DECLARE
+  v_line record;
+BEGIN
+  IF p_items IS NULL OR jsonb_typeof(p_items) <> 'array' OR jsonb_array_length(p_items) = 0 THEN
+    RAISE EXCEPTION 'Order has no items' USING ERRCODE = '22023';
+  END IF;
+
+  FOR v_line IN
+    SELECT (item->>'sweet_id')::uuid AS sweet_id,
+           SUM((item->>'quantity')::integer)::integer AS quantity
+      FROM jsonb_array_elements(p_items) AS item
+     GROUP BY 1
+     ORDER BY 1
+  LOOP
+    IF NOT EXISTS (SELECT 1 FROM sweets WHERE id = v_line.sweet_id) THEN
+      RAISE EXCEPTION 'Sweet not found'
+        USING ERRCODE = 'SW404', DETAIL = v_line.sweet_id::text;
+    END IF;
+
+    UPDATE stock_escrow
+       SET quantity = quantity - v_line.quantity,
+           updated_at = now()
+     WHERE holder = p_holder
+       AND sweet_id = v_line.sweet_id
+       AND v_line.quantity > 0
+       AND quantity >= v_line.quantity;
+
+    IF NOT FOUND THEN
+      RAISE EXCEPTION 'Escrow balance too low for sweet %', v_line.sweet_id USING ERRCODE = '22023';
+    END IF;
+  END LOOP;
+
+  DELETE FROM stock_escrow WHERE holder = p_holder AND quantity = 0;
+
+  RETURN QUERY
+  INSERT INTO purchases (user_id, sweet_id, quantity, total_price)
+  SELECT p_user_id, s.id, (item->>'quantity')::integer, s.price * (item->>'quantity')::integer
+    FROM jsonb_array_elements(p_items) WITH ORDINALITY AS items(item, position)
+    JOIN sweets s ON s.id = (item->>'sweet_id')::uuid
+   ORDER BY position
+  RETURNING *;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE OR REPLACE FUNCTION public.reclaim_stale_escrow(p_holder text, p_stale_seconds double precision)
+RETURNS jsonb AS $$
+DECLARE
+  v_reclaimed jsonb;
+BEGIN
+  UPDATE stock_escrow SET updated_at = now() WHERE holder = p_holder;
+
+  WITH stale AS (
+    DELETE FROM stock_escrow
+     WHERE holder <> p_holder
+       AND updated_at < now() - make_interval(secs => p_stale_seconds)
+    RETURNING sweet_id, quantity
+  ),
+  totals AS (
+    SELECT sweet_id, SUM(quantity)::integer AS quantity
+      FROM stale
+     GROUP BY 1
+    HAVING SUM(quantity) > 0
+  ),
+  returned AS (
+    UPDATE sweets s
+       SET quantity = s.quantity + t.quantity
+      FROM totals t
+     WHERE s.id = t.sweet_id
+    RETURNING s.id, t.quantity
+  )
+  SELECT COALESCE(jsonb_agg(jsonb_build_object('sweet_id', id, 'quantity', quantity) ORDER BY id), '[]'::jsonb)
+    INTO v_reclaimed
+    FROM returned;
+
+  RETURN v_reclaimed;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+REVOKE ALL ON FUNCTION public.withdraw_stock(text, uuid, integer, integer) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.withdraw_stock(text, uuid, integer, integer) TO service_role;
+
+REVOKE ALL ON FUNCTION public.return_stock(text, jsonb) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.return_stock(text, jsonb) TO service_role;
+
+REVOKE ALL ON FUNCTION public.confirm_reserved_order(text, uuid, jsonb) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.confirm_reserved_order(text, uuid, jsonb) TO service_role;
+
+REVOKE ALL ON FUNCTION public.reclaim_stale_escrow(text, double precision) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.reclaim_stale_escrow(text, double precision) TO service_role;
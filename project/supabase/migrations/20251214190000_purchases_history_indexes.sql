@@ -0,0 +1,29 @@
+/*
+  # Covering indexes for purchase history
+
+  ## Overview
+  `GET /api/purchases/me` lists one user's purchases and `GET /api/sweets/{id}/purchases`
+  lists one sweet's sales, both ordered by `purchased_at DESC, id` and resuming from the
+  last row's `(purchased_at, id)`. The single-column `user_id` / `sweet_id` indexes could
+  only find the rows; every page then had to fetch and sort the user's or sweet's whole
+  history. These composite indexes return each page in order straight from the index.
+  They also carry the remaining selected columns, so the pages are index-only scans.
+
+  ## Changes
+  - Add `idx_purchases_user_id_purchased_at` on
+    `purchases(user_id, purchased_at DESC, id) INCLUDE (sweet_id, quantity, total_price)`
+  - Add `idx_purchases_sweet_id_purchased_at` on
+    `purchases(sweet_id, purchased_at DESC, id) INCLUDE (user_id, quantity, total_price)`
+  - Drop `idx_purchases_user_id` and `idx_purchases_sweet_id`. The new indexes lead with
+    the same columns, so they still serve the foreign-key checks for cascading deletes
+    from `profiles` and `sweets`.
+*/
+
+CREATE INDEX IF NOT EXISTS idx_purchases_user_id_purchased_at
+  ON purchases(user_id, purchased_at DESC, id) INCLUDE (sweet_id, quantity, total_price);
+
+CREATE INDEX IF NOT EXISTS idx_purchases_sweet_id_purchased_at
+  ON purchases(sweet_id, purchased_at DESC, id) INCLUDE (user_id, quantity, total_price);
+
+DROP INDEX IF EXISTS idx_purchases_user_id;
+DROP INDEX IF EXISTS idx_purchases_sweet_id;
@@ -0,0 +1,168 @@
+/*
+  # Defer sales rollups for confirmed reservations
+
+  ## Overview
+  Stock escrow keeps flash-sale confirmations off the hot `sweets` row, but each
+  `confirm_reserved_order` still inserted into `purchases`. The statement trigger then merged
+  the sale into that sweet's current `sales_rollup_hourly` and `sales_rollup_daily` rows. Every
+  sale of the hot sweet therefore still waited on the same two rollup rows.
+
+  Purchases recorded by `confirm_reserved_order` now append their rows to
+  `sales_rollup_deltas`, which is insert-only and takes no row locks shared between
+  confirmations. Each worker's reservation sweeper folds the pending deltas into the rollups
+  in one merge per sweep. The rollup rows are then written once per sweep instead of once per
+  sale.
+
+  ## New Tables
+  - `sales_rollup_deltas` - same columns as `purchases`; reserved sales not yet folded into
+    the rollups. Row level security is enabled with no policies.
+
+  ## Changed Functions
+  - `rollup_inserted_purchases()` - when the transaction-local setting
+    `sweet_shop.defer_rollups` is `on`, copies the inserted rows into `sales_rollup_deltas`
+    instead of merging them
+  - `confirm_reserved_order(p_holder, p_user_id, p_items)` - turns the setting on around its
+    `purchases` insert; otherwise unchanged
+  - `reclaim_stale_escrow(p_holder, p_stale_seconds)` - also folds pending deltas; otherwise
+    unchanged
+
+  ## New Functions
+
+  ### `fold_sales_rollup_deltas()`
+  - Deletes all pending deltas and merges them into both rollups with `merge_sales_rollups`
+  - Returns the number of purchases folded
+
+  ## Notes
+  - `GET /api/analytics/sales` includes reserved sales after the next sweep, at most
+    `RESERVATION_SWEEP_INTERVAL` seconds later. Normal purchases and checkouts are still
+    merged immediately.
+*/
+
+CREATE TABLE IF NOT EXISTS sales_rollup_deltas (LIKE purchases INCLUDING DEFAULTS);
+
+ALTER TABLE sales_rollup_deltas ENABLE ROW LEVEL SECURITY;
+
+CREATE OR REPLACE FUNCTION public.rollup_inserted_purchases()
+RETURNS trigger AS $$
+BEGIN
+  IF current_setting('sweet_shop.defer_rollups', true) = 'on' THEN
+    INSERT INTO sales_rollup_deltas SELECT n.* FROM new_rows n;
+  ELSE
+    PERFORM merge_sales_rollups(ARRAY(SELECT n FROM new_rows n), 1);
+  END IF;
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE OR REPLACE FUNCTION public.fold_sales_rollup_deltas()
+RETURNS integer AS $$
+DECLARE
+  v_rows purchases[];
+BEGIN
+  WITH folded AS (
+    DELETE FROM sales_rollup_deltas RETURNING *
+  )
+  SELECT COALESCE(array_agg(ROW(f.*)::purchases), '{}')
+    INTO v_rows
+    FROM folded f;
+
+  IF cardinality(v_rows) > 0 THEN
+    PERFORM merge_sales_rollups(v_rows, 1);
+  END IF;
+
+  RETURN cardinality(v_rows);
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE OR REPLACE FUNCTION public.confirm_reserved_order(
+  p_holder text,
+  p_user_id uuid,
+  p_items jsonb
+)
+RETURNS SETOF purchases AS $$
+DECLARE
+  v_line record;
+BEGIN
+  IF p_items IS NULL OR jsonb_typeof(p_items) <> 'array' OR jsonb_array_length(p_items) = 0 THEN
+    RAISE EXCEPTION 'Order has no items' USING ERRCODE = '22023';
+  END IF;
+
+  FOR v_line IN
+    SELECT (item->>'sweet_id')::uuid AS sweet_id,
+           SUM((item->>'quantity')::integer)::integer AS quantity
+      FROM jsonb_array_elements(p_items) AS item
+     GROUP BY 1
+     ORDER BY 1
+  LOOP
+    IF NOT EXISTS (SELECT 1 FROM sweets WHERE id = v_line.sweet_id) THEN
+      RAISE EXCEPTION 'Sweet not found'
+        USING ERRCODE = 'SW404', DETAIL = v_line.sweet_id::text;
+    END IF;
+
+    UPDATE stock_escrow
+       SET quantity = quantity - v_line.quantity,
+           updated_at = now()
+     WHERE holder = p_holder
+       AND sweet_id = v_line.sweet_id
+       AND v_line.quantity > 0
+       AND quantity >= v_line.quantity;
+
+    IF NOT FOUND THEN
+      RAISE EXCEPTION 'Escrow balance too low for sweet %', v_line.sweet_id USING ERRCODE = '22023';
+    END IF;
+  END LOOP;
+
+  DELETE FROM stock_escrow WHERE holder = p_holder AND quantity = 0;
+
+  PERFORM set_config('sweet_shop.defer_rollups', 'on', true);
+
+  RETURN QUERY
+  INSERT INTO purchases (user_id, sweet_id, quantity, total_price)
+  SELECT p_user_id, s.id, (item->>'quantity')::integer, s.price * (item->>'quantity')::integer
+    FROM jsonb_array_elements(p_items) WITH ORDINALITY AS items(item, position)
+    JOIN sweets s ON s.id = (item->>'sweet_id')::uuid
+   ORDER BY position
+  RETURNING *;
+
+  PERFORM set_config('sweet_shop.defer_rollups', 'off', true);
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+CREATE OR REPLACE FUNCTION public.reclaim_stale_escrow(p_holder text, p_stale_seconds double precision)
+RETURNS jsonb AS $$
+DECLARE
+  v_reclaimed jsonb;
+BEGIN
+  UPDATE stock_escrow SET updated_at = now() WHERE holder = p_holder;
+
+  WITH stale AS (
+    DELETE FROM stock_escrow
+     WHERE holder <> p_holder
+       AND updated_at < now() - make_interval(secs => p_stale_seconds)
+    RETURNING sweet_id, quantity
+  ),
+  totals AS (
+    SELECT sweet_id, SUM(quantity)::integer AS quantity
+      FROM stale
+     GROUP BY 1
+    HAVING SUM(quantity) > 0
+  ),
+  returned AS (
+    UPDATE sweets s
+       SET quantity = s.quantity + t.quantity
+      FROM totals t
+     WHERE s.id = t.sweet_id
+    RETURNING s.id, t.quantity
+  )
+  SELECT COALESCE(jsonb_agg(jsonb_build_object('sweet_id', id, 'quantity', quantity) ORDER BY id), '[]'::jsonb)
+    INTO v_reclaimed
+    FROM returned;
+
+  PERFORM fold_sales_rollup_deltas();
+
+  RETURN v_reclaimed;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+REVOKE ALL ON FUNCTION public.fold_sales_rollup_deltas() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.fold_sales_rollup_deltas() TO service_role;
@@ -0,0 +1,59 @@
+/*
+  # Cap escrow withdrawals to a share of the remaining stock
+
+  ## Overview
+  `withdraw_stock` moved up to `p_quantity` units (`RESERVATION_BATCH_SIZE`) into a worker's
+  escrow even when the hold needed one unit. With low stock, one reservation emptied
+  `sweets.quantity`: plain purchases, checkouts and reservations on other workers then saw
+  the sweet as sold out while the units sat in one worker's pool.
+
+  ## Changed Functions
+
+  ### `withdraw_stock(p_holder, p_sweet_id, p_quantity, p_minimum)`
+  - Moves `p_minimum` units plus at most a quarter of the stock left after them, still
+    capped at `p_quantity`
+  - When fewer than four units would remain, only `p_minimum` units are moved
+  - Signature, errors and grants are unchanged
+*/
+
+CREATE OR REPLACE FUNCTION public.withdraw_stock(
+  p_holder text,
+  p_sweet_id uuid,
+  p_quantity integer,
+  p_minimum integer
+)
+RETURNS integer AS $$
+DECLARE
+  v_available integer;
+  v_taken integer;
+BEGIN
+  IF p_minimum IS NULL OR p_minimum <= 0 OR p_quantity IS NULL OR p_quantity < p_minimum THEN
+    RAISE EXCEPTION 'Quantity must be at least the minimum and greater than zero' USING ERRCODE = '22023';
+  END IF;
+
+  SELECT quantity INTO v_available FROM sweets WHERE id = p_sweet_id FOR UPDATE;
+
+  IF NOT FOUND THEN
+    RAISE EXCEPTION 'Sweet not found'
+      USING ERRCODE = 'SW404', DETAIL = p_sweet_id::text;
+  END IF;
+
+  IF v_available < p_minimum THEN
+    RAISE EXCEPTION 'Not enough stock'
+      USING ERRCODE = 'SW409',
+            DETAIL = json_build_object('sweet_id', p_sweet_id, 'available', v_available)::text;
+  END IF;
+
+  v_taken := p_minimum + LEAST(p_quantity - p_minimum, (v_available - p_minimum) / 4);
+
+  UPDATE sweets SET quantity = quantity - v_taken WHERE id = p_sweet_id;
+
+  INSERT INTO stock_escrow (holder, sweet_id, quantity)
+  VALUES (p_holder, p_sweet_id, v_taken)
+  ON CONFLICT (holder, sweet_id) DO UPDATE
+    SET quantity = stock_escrow.quantity + EXCLUDED.quantity,
+        updated_at = now();
+
+  RETURN v_taken;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;